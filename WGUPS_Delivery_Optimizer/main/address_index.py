@@ -0,0 +1,148 @@
+import re
+from collections import Counter
+from instrumentation import METRICS
+
+
+# ----------------------------
+# Address Normalization
+# ----------------------------
+
+_CANONICAL_TOKENS = {
+    "NORTH": "N", "SOUTH": "S", "EAST": "E", "WEST": "W",
+    "STREET": "ST", "AVENUE": "AVE", "AV": "AVE", "BOULEVARD": "BLVD", "ROAD": "RD",
+    "DRIVE": "DR", "LANE": "LN", "COURT": "CT", "PLACE": "PL", "PARKWAY": "PKWY",
+    "HIGHWAY": "HWY", "CIRCLE": "CIR", "TERRACE": "TER", "SUITE": "STE", "APARTMENT": "APT",
+}
+_UNIT_PATTERN = re.compile(r"(?:#|\b(?:STE|APT|UNIT)\b)\s*\w+")
+_NON_WORD_PATTERN = re.compile(r"[^\w\s]")
+_STREET_LINE_PATTERN = re.compile(r"^\s*\d")
+
+FUZZY_THRESHOLD = 0.5  # minimum trigram similarity for a fuzzy match
+FUZZY_MARGIN = 0.1     # best match must beat the runner-up by this much
+
+
+def normalize_address(address):
+    """
+    Canonicalizes a street address: upper case, no punctuation or unit numbers,
+    and directional / suffix words abbreviated ("600 E 900 South" -> "600 E 900 S").
+    """
+    text = _NON_WORD_PATTERN.sub(" ", _UNIT_PATTERN.sub(" ", address.upper().replace("#", " #")))
+    return " ".join(_CANONICAL_TOKENS.get(token, token) for token in text.split())
+
+
+def street_line(entry):
+    """
+    Picks the street line out of a multi-line address entry such as
+    "Council Hall\\n 300 State St" (the first line starting with a house number).
+    """
+    lines = entry.splitlines() or [entry]
+    for line in lines:
+        if _STREET_LINE_PATTERN.match(line):
+            return line.strip().rstrip(",")
+    return lines[-1].strip()
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ----------------------------
+# AddressIndex Class
+# ----------------------------
+
+class AddressIndex:
+    """
+    Resolves package addresses to distance-matrix indices in near-constant time.
+
+    Lookups first try the normalized street key (house number + street name,
+    units stripped), then fall back to a trigram similarity search that prefers
+    candidates with the same house number. Every result is cached, and addresses
+    that could not be resolved or matched more than one location are recorded
+    for report().
+
+    Rubric H – Replaces the linear substring scan in get_location_index.
+    """
+
+    def __init__(self, addresses):
+        self.addresses = list(addresses)
+        self._exact = {}
+        self._by_number = {}
+        self._trigram_postings = {}
+        self._trigram_sizes = []
+        self._cache = {}
+        self.unresolved = set()
+        self.ambiguous = {}
+        self.fuzzy_matches = 0
+
+        for idx, entry in enumerate(self.addresses):
+            normalized = normalize_address(street_line(entry))
+            self._exact.setdefault(normalized, []).append(idx)
+            number, _, _ = normalized.partition(" ")
+            self._by_number.setdefault(number, []).append(idx)
+            grams = _trigrams(normalized)
+            self._trigram_sizes.append(len(grams))
+            for gram in grams:
+                self._trigram_postings.setdefault(gram, []).append(idx)
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def resolve(self, address):
+        """
+        Returns the matrix index for a package address, or None if it cannot be resolved.
+        Ambiguous addresses resolve to their best candidate and are listed in report().
+        """
+        if address in self._cache:
+            return self._cache[address]
+        index = self._lookup(address)
+        self._cache[address] = index
+        return index
+
+    def _lookup(self, address):
+        normalized = normalize_address(street_line(address))
+        candidates = self._exact.get(normalized)
+        if candidates:
+            if len(candidates) > 1:
+                self.ambiguous[address] = list(candidates)
+            return candidates[0]
+
+        # Fuzzy fallback: rank addresses by trigram overlap, preferring the same house number
+        number, _, _ = normalized.partition(" ")
+        same_number = set(self._by_number.get(number, ()))
+        grams = _trigrams(normalized)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._trigram_postings.get(gram, ()))
+        scored = sorted(
+            ((count / (len(grams) + self._trigram_sizes[idx] - count), idx in same_number, idx)
+             for idx, count in shared.items()),
+            key=lambda item: (item[1], item[0], -item[2]), reverse=True,
+        )
+
+        if not scored or scored[0][0] < FUZZY_THRESHOLD:
+            self.unresolved.add(address)
+            METRICS.increment("address_unresolved")
+            return None
+        best_score, best_same_number, best_idx = scored[0]
+        close = [idx for score, same_number_match, idx in scored
+                 if same_number_match == best_same_number and best_score - score < FUZZY_MARGIN]
+        if len(close) > 1:
+            self.ambiguous[address] = close
+        self.fuzzy_matches += 1
+        METRICS.increment("address_fuzzy_matches")
+        return best_idx
+
+    def report(self):
+        """
+        Summarizes lookups that need attention.
+
+        Returns:
+            dict: {"unresolved": [addresses], "ambiguous": {address: [candidate indices]},
+                   "fuzzy_matches": int}
+        """
+        return {
+            "unresolved": sorted(self.unresolved),
+            "ambiguous": dict(self.ambiguous),
+            "fuzzy_matches": self.fuzzy_matches,
+        }
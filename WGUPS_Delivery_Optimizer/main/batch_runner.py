@@ -0,0 +1,296 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from delivery_helpers import load_network_data
+from delivery_simulation import prepare_packages, TRUCK_SPEED
+from hashmap import HashMap
+from instrumentation import configure_logging
+from package_loader import load_packages
+from parallel_routing import share_network, attach_network
+from route_cache import RouteCache
+from simulation_core import simulate, SimulationConfig, DEFAULT_START_TIMES, DEFAULT_CAPACITY
+
+
+# ----------------------------
+# What-If Fleet Planning
+# ----------------------------
+#
+# main.py runs one fixed fleet. This runner evaluates many fleet
+# configurations (truck count, start times, drivers, speed, capacity) against
+# the same network and manifest and prints a comparison table, e.g.:
+#
+#   python batch_runner.py --trucks 2 3 4 --drivers 2 3 --speeds 18 25 --capacities 16 20
+#
+# The CSVs are parsed and addresses resolved once. Scenarios run in a process
+# pool: the distance matrix is shared with every worker (see
+# parallel_routing.share_network) and the prepared packages are sent once per
+# worker; simulation_core.simulate() never changes them.
+#
+# Many scenarios give a truck the same load (only the fleet around it
+# changed), so solved routes go into a RouteCache. Workers start from a copy
+# of the parent's cache and send back the routes they solve; --route-cache
+# keeps the cache on disk between runs.
+
+BATCH_ROUTE_BUDGET = 0.2  # seconds of route improvement per truck; scenarios are compared, not shipped
+SORT_KEYS = {
+    "misses": lambda result: (result["deadline_misses"] + result["undelivered"], result["completion"] or "",
+                              result["total_miles"]),
+    "miles": lambda result: (result["undelivered"], result["total_miles"]),
+    "completion": lambda result: (result["undelivered"], result["completion"] or "", result["total_miles"]),
+}
+
+
+def parse_start_time(value):
+    """ Parses "08:00 AM" (or "08:00") the way main.py builds truck start times. """
+    for pattern in ("%I:%M %p", "%H:%M"):
+        try:
+            return datetime.strptime(value.strip(), pattern)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized start time '{value}'")
+
+
+# ----------------------------
+# FleetScenario Class
+# ----------------------------
+
+class FleetScenario:
+    """ One fleet configuration to simulate. """
+    __slots__ = ("name", "start_times", "speed", "capacity", "drivers")
+
+    def __init__(self, start_times, speed=TRUCK_SPEED, capacity=DEFAULT_CAPACITY, drivers=None, name=None):
+        """
+        Parameters:
+            start_times (List[datetime]): one start time per truck
+            speed (float): truck speed in miles per hour
+            capacity (int): packages per truckload
+            drivers (int): drivers available (defaults to one per truck)
+            name (str): label for the comparison table
+        """
+        self.start_times = list(start_times)
+        self.speed = speed
+        self.capacity = capacity
+        self.drivers = len(self.start_times) if drivers is None else drivers
+        self.name = name or (f"{len(self.start_times)}T/{self.drivers}D "
+                             f"@{speed:g}mph cap{capacity} "
+                             + ",".join(start.strftime("%H:%M") for start in self.start_times))
+
+    def config(self, route_time_budget=BATCH_ROUTE_BUDGET):
+        return SimulationConfig(tuple(start.strftime("%I:%M %p") for start in self.start_times), self.speed,
+                                self.capacity, self.drivers, route_time_budget)
+
+    def as_dict(self):
+        return {"scenario": self.name, "trucks": len(self.start_times), "drivers": self.drivers,
+                "speed": self.speed, "capacity": self.capacity,
+                "start_times": [start.strftime("%H:%M") for start in self.start_times]}
+
+
+def scenario_grid(truck_counts=(3,), schedules=(DEFAULT_START_TIMES,), speeds=(TRUCK_SPEED,),
+                  capacities=(DEFAULT_CAPACITY,), drivers=(None,)):
+    """
+    Builds the cross product of the given options.
+
+    A fleet of n trucks takes the first n start times of a schedule, repeating
+    the schedule when it is shorter. Driver counts above the truck count add
+    nothing and are skipped.
+
+    Returns:
+        List[FleetScenario]
+    """
+    scenarios = []
+    for count, schedule, speed, capacity, crew in itertools.product(truck_counts, schedules, speeds, capacities,
+                                                                    drivers):
+        if crew is not None and crew > count:
+            continue
+        starts = [parse_start_time(schedule[i % len(schedule)]) for i in range(count)]
+        scenarios.append(FleetScenario(starts, speed, capacity, crew))
+    return scenarios
+
+
+# ----------------------------
+# Running Scenarios
+# ----------------------------
+
+def run_scenario(scenario, distance_matrix, packages, route_time_budget=BATCH_ROUTE_BUDGET, route_cache=None):
+    """
+    Assigns, routes and simulates one scenario (see simulation_core.simulate).
+
+    Parameters:
+        scenario (FleetScenario): fleet to simulate
+        distance_matrix (DistanceMatrix): shared, read-only
+        packages (List[Package]): prepared packages (address_index set); left untouched
+        route_cache (RouteCache): reuse routes solved by earlier scenarios (optional)
+
+    Returns:
+        dict: the scenario's settings plus miles, completion time, deadline misses and runtime
+    """
+    started = time.perf_counter()
+    result = simulate(distance_matrix, packages, scenario.config(route_time_budget), route_cache=route_cache)
+    record = scenario.as_dict()
+    record.update(result.summary())
+    record["seconds"] = round(time.perf_counter() - started, 4)
+    return record
+
+
+_worker_block = None
+_worker_matrix = None
+_worker_packages = None
+_worker_routes = None
+
+
+def _attach_batch_worker(network_args, packages, route_entries, route_cache_bytes):
+    global _worker_block, _worker_matrix, _worker_packages, _worker_routes
+    _worker_block, _worker_matrix = attach_network(*network_args)
+    _worker_packages = packages
+    _worker_routes = RouteCache(route_cache_bytes)
+    for entry in route_entries:
+        _worker_routes.put(*entry)
+    _worker_routes.drain_new()
+
+
+def _scenario_task(scenario, route_time_budget):
+    record = run_scenario(scenario, _worker_matrix, _worker_packages, route_time_budget, _worker_routes)
+    return record, _worker_routes.drain_new()
+
+
+def run_batch(scenarios, distance_matrix, packages, route_time_budget=BATCH_ROUTE_BUDGET, max_workers=None,
+              route_cache=None):
+    """
+    Runs every scenario, in a process pool unless max_workers is 1.
+
+    Parameters:
+        route_cache (RouteCache): shared by every scenario; routes solved in
+            worker processes are added to it as their results come back
+
+    Returns:
+        List[dict]: one record per scenario (see run_scenario), in scenario order
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(scenarios) <= 1:
+        return [run_scenario(scenario, distance_matrix, packages, route_time_budget, route_cache)
+                for scenario in scenarios]
+
+    route_cache = route_cache if route_cache is not None else RouteCache()
+    block, network_args = share_network(distance_matrix)
+    try:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(scenarios)), initializer=_attach_batch_worker,
+                                 initargs=(network_args, packages, route_cache.entries(),
+                                           route_cache.max_bytes)) as pool:
+            chunk = max(1, len(scenarios) // (max_workers * 4))
+            results = []
+            for record, solved in pool.map(_scenario_task, scenarios, itertools.repeat(route_time_budget),
+                                           chunksize=chunk):
+                results.append(record)
+                for entry in solved:
+                    route_cache.put(*entry)
+            return results
+    finally:
+        block.close()
+        block.unlink()
+
+
+# ----------------------------
+# Comparison Table
+# ----------------------------
+
+TABLE_COLUMNS = (
+    ("Scenario", "scenario", "<"), ("Miles", "total_miles", ">"), ("Done", "completion", ">"),
+    ("Late", "deadline_misses", ">"), ("Undelivered", "undelivered", ">"), ("Trips", "trips", ">"),
+)
+
+
+def _cell(value):
+    if value is None:
+        return "-"
+    return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+
+def comparison_table(results, sort_by="misses", limit=None):
+    """
+    Formats scenario records as an aligned text table, best first.
+
+    Parameters:
+        sort_by (str): "misses" (deadline misses, then completion, then miles), "miles" or "completion"
+        limit (int): show only the first rows
+    """
+    rows = sorted(results, key=SORT_KEYS[sort_by])[:limit]
+    cells = [[header for header, _, _ in TABLE_COLUMNS]]
+    for result in rows:
+        cells.append([_cell(result[key]) for _, key, _ in TABLE_COLUMNS])
+    widths = [max(len(row[c]) for row in cells) for c in range(len(TABLE_COLUMNS))]
+    lines = []
+    for r, row in enumerate(cells):
+        lines.append("  ".join(f"{value:{align}{width}}"
+                               for value, width, (_, _, align) in zip(row, widths, TABLE_COLUMNS)))
+        if r == 0:
+            lines.append("  ".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+
+def write_results(results, path):
+    """ Saves the records as JSON, or as CSV when the path ends in .csv. """
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(file, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+        else:
+            file.write(json.dumps(results, indent=2) + "\n")
+
+
+# ----------------------------
+# Command Line
+# ----------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare fleet configurations on one network and manifest.")
+    parser.add_argument("--distances", default="distances_backup.csv", help="distance table CSV")
+    parser.add_argument("--addresses", default="addresses.csv", help="address list CSV")
+    parser.add_argument("--packages", default="packages.csv", help="package file CSV")
+    parser.add_argument("--trucks", type=int, nargs="+", default=[3], help="fleet sizes to try")
+    parser.add_argument("--schedules", nargs="+", default=[",".join(DEFAULT_START_TIMES)],
+                        help='comma-separated truck start times, e.g. "08:00 AM,08:30 AM"')
+    parser.add_argument("--speeds", type=float, nargs="+", default=[TRUCK_SPEED], help="truck speeds (mph)")
+    parser.add_argument("--capacities", type=int, nargs="+", default=[DEFAULT_CAPACITY], help="packages per load")
+    parser.add_argument("--drivers", type=int, nargs="+", help="driver counts (default: one per truck)")
+    parser.add_argument("--route-budget", type=float, default=BATCH_ROUTE_BUDGET,
+                        help="route improvement seconds per truck")
+    parser.add_argument("--workers", type=int, help="worker processes (1 runs in this process)")
+    parser.add_argument("--route-cache", metavar="PATH", help="load solved routes from / save them to this file")
+    parser.add_argument("--sort", choices=sorted(SORT_KEYS), default="misses", help="table order")
+    parser.add_argument("--top", type=int, help="show only the best N scenarios")
+    parser.add_argument("--output", help="also write every record here (.json or .csv)")
+    parser.add_argument("--verbose", action="store_true", help="show pipeline warnings")
+    args = parser.parse_args(argv)
+
+    if args.verbose:
+        configure_logging("WARNING", sys.stderr)
+
+    address_list, distance_matrix = load_network_data(args.distances, args.addresses)
+    package_hash = HashMap()
+    load_packages(args.packages, package_hash)
+    packages = prepare_packages(address_list, package_hash)
+
+    scenarios = scenario_grid(args.trucks, [schedule.split(",") for schedule in args.schedules], args.speeds,
+                              args.capacities, args.drivers or [None])
+    route_cache = RouteCache(path=args.route_cache)
+    started = time.perf_counter()
+    results = run_batch(scenarios, distance_matrix, packages, args.route_budget, args.workers, route_cache)
+    elapsed = time.perf_counter() - started
+    if args.route_cache:
+        route_cache.save()
+
+    print(comparison_table(results, args.sort, args.top))
+    print(f"\n{len(results)} scenarios in {elapsed:.2f}s; route cache: {len(route_cache)} routes", file=sys.stderr)
+    if args.output and results:
+        write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
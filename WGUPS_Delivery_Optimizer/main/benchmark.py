@@ -0,0 +1,177 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime
+from delivery_helpers import load_network_data
+from delivery_simulation import prepare_packages, assign_packages, route_trucks, simulate_deliveries
+from exact_routing import held_karp_route, EXACT_MAX_STOPS
+from hashmap import HashMap
+from instrumentation import METRICS, profiled
+from package_loader import load_packages
+from routing import build_route, route_length
+from scenario_generator import generate_scenario, write_scenario
+from truck import Truck
+
+
+# ----------------------------
+# Benchmark Harness
+# ----------------------------
+#
+# Times each pipeline phase separately on generated scenarios and emits one
+# JSON record per scenario, e.g.:
+#
+#   python benchmark.py --sizes 1000 10000 100000 --seed 7 --output bench.json
+#
+# Phase timings and counters come from the shared METRICS registry
+# (instrumentation.py); --format prometheus emits them in the Prometheus
+# text format instead, and --profile writes cProfile stats per scenario.
+# --exact-baseline N re-solves every truckload of at most N stops with the
+# heuristic alone and with Held-Karp and reports the optimality gap.
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+TRUCK_START_TIMES = ("08:00 AM", "09:05 AM", "10:20 AM")
+
+
+def make_trucks(num_packages, num_trucks=len(TRUCK_START_TIMES), capacity=None):
+    """
+    One truck per start time. Without a capacity each truck is large enough that the whole
+    manifest fits the fleet in one departure; with one, the rest goes out on reload trips.
+    """
+    capacity = capacity or -(-num_packages // num_trucks)
+    return [Truck(name=f"Truck {i}", start_time=datetime.strptime(TRUCK_START_TIMES[(i - 1) % len(TRUCK_START_TIMES)],
+                                                                   "%I:%M %p"),
+                  max_capacity=capacity, truck_id=i)
+            for i in range(1, num_trucks + 1)]
+
+
+def optimality_gaps(distance_matrix, stop_lists, max_stops=EXACT_MAX_STOPS, time_budget=1.0):
+    """
+    Measures the routing heuristic against exact tours.
+
+    Each stop list with at most max_stops distinct stops is routed by
+    build_route() with the exact solver switched off, and by held_karp_route().
+
+    Returns:
+        dict: routes compared, total heuristic and optimal miles, and the mean / worst gap in percent
+    """
+    gaps = []
+    heuristic_miles = optimal_miles = 0.0
+    for stops in stop_lists:
+        if not 2 < len(set(stops) - {0}) <= max_stops:
+            continue
+        heuristic = route_length(distance_matrix, build_route(distance_matrix, stops, time_budget=time_budget,
+                                                              exact_max_stops=0))
+        optimal = route_length(distance_matrix, held_karp_route(distance_matrix, stops))
+        heuristic_miles += heuristic
+        optimal_miles += optimal
+        gaps.append(100.0 * (heuristic - optimal) / optimal if optimal else 0.0)
+    return {
+        "routes": len(gaps),
+        "heuristic_miles": round(heuristic_miles, 3),
+        "optimal_miles": round(optimal_miles, 3),
+        "mean_gap_percent": round(sum(gaps) / len(gaps), 4) if gaps else None,
+        "max_gap_percent": round(max(gaps), 4) if gaps else None,
+    }
+
+
+def benchmark_scenario(num_packages, seed=0, route_time_budget=1.0, workdir=None, capacity=None, profile_path=None,
+                       exact_baseline=None):
+    """
+    Generates one scenario on disk and times load, assignment, routing and simulation.
+
+    Parameters:
+        profile_path (str): also run the pipeline under cProfile and write the stats here
+        exact_baseline (int): also compare routes of at most this many stops with exact ones
+            (after the timed phases, see optimality_gaps)
+
+    Returns:
+        dict: machine-readable result record (METRICS keeps the full phase/counter detail)
+    """
+    scenario = generate_scenario(num_packages, seed=seed)
+    with tempfile.TemporaryDirectory(dir=workdir) as directory:
+        distance_path, address_path, package_path = write_scenario(scenario, directory)
+        METRICS.reset()
+
+        # Pipeline output goes to /dev/null so console I/O is not part of the timings
+        with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink), \
+                profiled(profile_path) if profile_path else contextlib.nullcontext():
+            with METRICS.phase("load"):
+                address_list, distance_matrix = load_network_data(distance_path, address_path)
+                package_hash = HashMap()
+                load_packages(package_path, package_hash)
+                all_packages = prepare_packages(address_list, package_hash)
+
+            trucks = make_trucks(num_packages, capacity=capacity)
+            assigned, trips = assign_packages(all_packages, trucks, distance_matrix)
+            route_trucks(trucks, distance_matrix, route_time_budget=route_time_budget)
+            loads = [[pkg.address_index for pkg in load.packages] for load in trucks + trips]
+            simulate_deliveries(trucks, distance_matrix, trips=trips)
+
+    phases = {name: seconds for name, seconds in METRICS.phase_seconds().items() if "/" not in name}
+
+    record = {
+        "packages": num_packages,
+        "addresses": len(scenario.addresses),
+        "seed": seed,
+        "trucks": len(trucks),
+        "trips": sum(truck.trips for truck in trucks),
+        "phase_seconds": {name: round(seconds, 6) for name, seconds in phases.items()},
+        "total_seconds": round(METRICS.total_seconds(), 6),
+        "counters": dict(METRICS.counters),
+        "packages_assigned": len(assigned),
+        "total_miles": round(sum(truck.miles for truck in trucks), 3),
+        "python": platform.python_version(),
+    }
+    if exact_baseline:
+        record["optimality"] = optimality_gaps(distance_matrix, loads, exact_baseline, route_time_budget)
+    return record
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, seed=0, route_time_budget=1.0, capacity=None, exact_baseline=None):
+    """ Runs benchmark_scenario for each size and returns the list of result records. """
+    return [benchmark_scenario(size, seed, route_time_budget, capacity=capacity, exact_baseline=exact_baseline)
+            for size in sizes]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the delivery pipeline on generated scenarios.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="package counts to run")
+    parser.add_argument("--seed", type=int, default=0, help="scenario seed (same seed, same scenario)")
+    parser.add_argument("--route-budget", type=float, default=1.0, help="route improvement seconds per truck")
+    parser.add_argument("--capacity", type=int, help="packages per truckload (default: whole manifest in one trip)")
+    parser.add_argument("--format", choices=("json", "prometheus"), default="json", help="output format")
+    parser.add_argument("--profile", metavar="DIR", help="write cProfile stats per scenario into this directory")
+    parser.add_argument("--exact-baseline", type=int, nargs="?", const=EXACT_MAX_STOPS, metavar="MAX_STOPS",
+                        help=f"report the heuristic's gap to exact tours of up to MAX_STOPS stops "
+                             f"(default {EXACT_MAX_STOPS}; use with --capacity)")
+    parser.add_argument("--output", help="write results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = []
+    exposition = []
+    for size in args.sizes:
+        profile_path = os.path.join(args.profile, f"bench_{size}.prof") if args.profile else None
+        if profile_path:
+            os.makedirs(args.profile, exist_ok=True)
+        record = benchmark_scenario(size, args.seed, args.route_budget, capacity=args.capacity,
+                                    profile_path=profile_path, exact_baseline=args.exact_baseline)
+        results.append(record)
+        exposition.append(METRICS.to_prometheus(labels={"packages": size}))
+        print(f"{size:>7} packages: " + ", ".join(f"{name} {seconds:.3f}s"
+                                                  for name, seconds in record["phase_seconds"].items()),
+              file=sys.stderr)
+
+    payload = "".join(exposition) if args.format == "prometheus" else json.dumps(results, indent=2) + "\n"
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(payload)
+    else:
+        print(payload, end="")
+
+
+if __name__ == "__main__":
+    main()
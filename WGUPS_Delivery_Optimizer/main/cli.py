@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+import sys
+import time
+from delivery_timeline import parse_time_of_day, format_minutes
+
+
+# ----------------------------
+# Command Line Entry Point
+# ----------------------------
+#
+#   python cli.py load                      parse the CSVs once into a dataset bundle
+#   python cli.py simulate --drivers 2      run the day from the bundle and save the result
+#   python cli.py status --at 10:25         package statuses at a time of day
+#   python cli.py serve --port 8080         HTTP/JSON status service (see status_service.py)
+#   python cli.py bench --sizes 1000        generated-scenario benchmark (see benchmark.py)
+#
+# Paths default to the files next to this script, not the working directory.
+# Modules are imported inside the command that needs them: "status" only
+# reads the saved result, so it never loads routing, the matrix or the
+# packages and starts in a few tens of milliseconds. The fleet options of
+# "status" and "serve" are compared with the ones the saved result was
+# simulated with; on any difference the day is simulated again first.
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BUNDLE = os.path.join(DATA_DIR, "wgups.wgds")
+DEFAULT_DISTANCES = os.path.join(DATA_DIR, "distances_backup.csv")
+DEFAULT_ADDRESSES = os.path.join(DATA_DIR, "addresses.csv")
+DEFAULT_PACKAGES = os.path.join(DATA_DIR, "packages.csv")
+DEFAULT_PRELOAD = ["2:1,2,3,4"]   # main.py's hand-loaded packages on truck 2
+
+
+def _bundle_current(args):
+    """ True if the bundle exists and is newer than each of its source CSVs. """
+    try:
+        built = os.stat(args.bundle).st_mtime_ns
+        return all(os.stat(path).st_mtime_ns <= built for path in (args.distances, args.addresses, args.packages))
+    except FileNotFoundError:
+        return os.path.exists(args.bundle)
+
+
+# ----------------------------
+# Commands
+# ----------------------------
+
+def command_load(args):
+    """ Parses the CSVs (through the compiled network cache) and writes the bundle. """
+    from dataset_bundle import write_bundle
+    from delivery_helpers import load_network_data
+    from delivery_simulation import prepare_packages
+    from hashmap import HashMap
+    from package_loader import load_packages
+
+    started = time.perf_counter()
+    address_list, distance_matrix = load_network_data(args.distances, args.addresses)
+    package_hash = HashMap()
+    load_packages(args.packages, package_hash)
+    packages = prepare_packages(address_list, package_hash)
+    write_bundle(args.bundle, address_list, distance_matrix, packages)
+    print(f"Wrote {args.bundle}: {len(address_list)} addresses, {len(packages)} packages "
+          f"({time.perf_counter() - started:.2f}s)")
+    return 0
+
+
+def _fleet_settings(args):
+    """ The SimulationConfig fields set by the fleet options, as plain values (no simulation imports). """
+    preload = []
+    for item in args.preload:
+        truck, _, ids = item.partition(":")
+        preload.append((int(truck), tuple(int(pid) for pid in ids.split(",") if pid.strip())))
+    return {"start_times": tuple(start.strip() for start in args.start_times.split(",")), "speed": args.speed,
+            "capacity": args.capacity, "drivers": args.drivers, "route_time_budget": args.route_budget,
+            "preload": tuple(preload), "search_budget": args.search_budget, "search_restarts": args.restarts,
+            "search_workers": args.search_workers}
+
+
+def _config(args):
+    from simulation_core import SimulationConfig
+
+    return SimulationConfig(**_fleet_settings(args))
+
+
+def command_simulate(args):
+    """ Runs the day from the bundle, prints the summary and saves the timeline for status lookups. """
+    from dataset_bundle import open_bundle, save_result, default_result_path
+    from simulation_core import simulate
+
+    if not _bundle_current(args):
+        command_load(args)
+    started = time.perf_counter()
+    _, distance_matrix, packages = open_bundle(args.bundle)
+    config = _config(args)
+    result = simulate(distance_matrix, packages, config)
+
+    summary = result.summary()
+    summary["config"] = config._asdict()
+    save_result(default_result_path(args.bundle), result.timeline, summary, args.bundle)
+
+    for truck_id, miles, trips, end in zip(result.truck_ids, result.truck_miles, result.truck_trips,
+                                           result.truck_end_minutes):
+        finished = format_minutes(end) if end is not None else "-"
+        print(f"Truck {truck_id} - Trips: {trips}, End: {finished}, Miles: {miles:.2f}")
+    print(f"\nTotal Packages Delivered: {summary['delivered']} / {summary['delivered'] + summary['undelivered']}")
+    print(f"Total Miles: {summary['total_miles']:.2f}")
+    if summary["late_packages"]:
+        print(f"⚠️ Warning: Delivered after their deadline: {summary['late_packages']}")
+    print(f"({time.perf_counter() - started:.2f}s)", file=sys.stderr)
+    return 0
+
+
+def _saved_result(args):
+    """
+    Returns (timeline, summary) saved for the bundle.
+
+    Runs "simulate" first when there is no saved result or when it was
+    simulated with different fleet options than the ones given now, so the
+    answer always matches the command line.
+    """
+    from dataset_bundle import load_result, default_result_path
+
+    saved = load_result(default_result_path(args.bundle), args.bundle)
+    if saved is None:
+        print("No current simulation result for this bundle; running 'simulate' first.", file=sys.stderr)
+    else:
+        requested = json.loads(json.dumps(_fleet_settings(args)))
+        used = saved[1].get("config", {})
+        changed = [name for name, value in requested.items() if used.get(name) != value]
+        if not changed:
+            return saved
+        print(f"Saved simulation used different {', '.join(changed)}; running 'simulate' first.", file=sys.stderr)
+    command_simulate(args)
+    return load_result(default_result_path(args.bundle), args.bundle)
+
+
+def command_status(args):
+    """ Prints package statuses at a time of day from the last saved simulation. """
+    from delivery_timeline import DELIVERED
+
+    timeline, _ = _saved_result(args)
+
+    if args.package is not None:
+        for package_id in args.package:
+            status = timeline.status_at(package_id, args.at)
+            if status is None:
+                print(f"Package {package_id}: unknown")
+                continue
+            when = ""
+            if status == DELIVERED:
+                when = f" (delivered {format_minutes(timeline.delivery_minutes(package_id))})"
+            print(f"Package {package_id}: {status}{when}")
+        return 0
+
+    snapshot = timeline.snapshot(args.at)
+    print(f"Status at {format_minutes(args.at)}: "
+          + ", ".join(f"{status} {count}" for status, count in snapshot.counts.items()))
+    if args.verbose:
+        for package_id, status in sorted(snapshot.as_dict().items()):
+            print(f"  Package {package_id}: {status}")
+    return 0
+
+
+def command_serve(args):
+    """ Serves package and status lookups over HTTP until interrupted. """
+    import asyncio
+    from instrumentation import configure_logging
+    from status_service import StatusService
+
+    configure_logging("INFO")
+    _saved_result(args)
+    service = StatusService.from_bundle(args.bundle)
+    try:
+        asyncio.run(service.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def command_bench(args):
+    import benchmark
+
+    return benchmark.main(args.extra)
+
+
+# ----------------------------
+# Argument Parsing
+# ----------------------------
+
+def build_parser():
+    bundle_option = argparse.ArgumentParser(add_help=False)
+    bundle_option.add_argument("--bundle", default=DEFAULT_BUNDLE, help="dataset bundle file")
+
+    sources = argparse.ArgumentParser(add_help=False)
+    sources.add_argument("--distances", default=DEFAULT_DISTANCES, help="distance table CSV")
+    sources.add_argument("--addresses", default=DEFAULT_ADDRESSES, help="address list CSV")
+    sources.add_argument("--packages", default=DEFAULT_PACKAGES, help="package file CSV")
+
+    fleet = argparse.ArgumentParser(add_help=False)
+    fleet.add_argument("--start-times", default="08:00 AM,09:05 AM,10:20 AM",
+                       help="comma-separated truck start times (one per truck)")
+    fleet.add_argument("--drivers", type=int, default=2, help="drivers available")
+    fleet.add_argument("--speed", type=float, default=18, help="truck speed (mph)")
+    fleet.add_argument("--capacity", type=int, default=16, help="packages per truckload")
+    fleet.add_argument("--route-budget", type=float, default=1.0, help="route improvement seconds per truck")
+    fleet.add_argument("--preload", nargs="*", default=DEFAULT_PRELOAD, metavar="TRUCK:IDS",
+                       help="packages loaded by hand before assignment, e.g. 2:1,2,3,4 (none if empty)")
+    fleet.add_argument("--search-budget", type=float, default=0.0,
+                       help="seconds of fleet-wide search over loads and routes (see fleet_search.py, 0 = off)")
+    fleet.add_argument("--restarts", type=int, default=1, help="seeded search restarts; the best one wins")
+    fleet.add_argument("--search-workers", type=int, default=1, help="processes for the restarts")
+
+    parser = argparse.ArgumentParser(prog="wgups", description="WGUPS delivery optimizer")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("load", parents=[bundle_option, sources], help="build the dataset bundle")
+    load.set_defaults(handler=command_load)
+
+    simulate = commands.add_parser("simulate", parents=[bundle_option, sources, fleet], help="run the day")
+    simulate.set_defaults(handler=command_simulate)
+
+    status = commands.add_parser("status", parents=[bundle_option, sources, fleet],
+                                 help="package statuses at a time of day")
+    status.add_argument("--at", type=parse_time_of_day, required=True, help="time of day, e.g. 10:25 or 1:12 PM")
+    status.add_argument("--package", type=int, nargs="+", help="only these package IDs")
+    status.add_argument("--verbose", action="store_true", help="list every package")
+    status.set_defaults(handler=command_status)
+
+    serve = commands.add_parser("serve", parents=[bundle_option, sources, fleet], help="HTTP/JSON status service")
+    serve.add_argument("--host", default="127.0.0.1", help="interface to listen on")
+    serve.add_argument("--port", type=int, default=8080, help="port to listen on")
+    serve.set_defaults(handler=command_serve)
+
+    bench = commands.add_parser("bench", help="benchmark on generated scenarios (options as in benchmark.py)")
+    bench.set_defaults(handler=command_bench)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.handler is not command_bench:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    args.extra = extra
+    return args.handler(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from distance_matrix import DistanceMatrix
+
+
+# ----------------------------
+# Compiled Network File Format
+# ----------------------------
+#
+#   header   (HEADER_SIZE bytes, little-endian, see HEADER_FORMAT)
+#   matrix   size * size packed floats, row-major, typecode 'd' or 'f'
+#   address  UTF-8 address strings separated by NUL bytes
+#
+# The matrix block starts at a fixed 8-byte aligned offset so it can be
+# mapped straight into a DistanceMatrix without copying.
+
+MAGIC = b"WGDM"
+FORMAT_VERSION = 2   # 2: matrix is stored after the shortest-path closure
+COMPILED_SUFFIX = ".wgdm"
+
+# magic, version, typecode, size, address block length,
+# then (mtime_ns, byte size, sha256) for the distance CSV and the address CSV
+HEADER_FORMAT = "<4sHcxIQ QQ32s QQ32s"
+HEADER_SIZE = 128
+# byte offsets of the distance and address CSV records (mtime_ns, size, sha256) in the header
+SOURCE_OFFSETS = (struct.calcsize("<4sHcxIQ"), struct.calcsize("<4sHcxIQ QQ32s"))
+SUPPORTED_TYPECODES = ("d", "f")
+
+
+def default_compiled_path(distance_path):
+    """ Returns the compiled file path that sits next to the distance CSV. """
+    return os.path.splitext(distance_path)[0] + COMPILED_SUFFIX
+
+
+def source_fingerprint(path, with_hash=True):
+    """
+    Returns (mtime_ns, size, sha256 digest) identifying a source CSV.
+    The digest is skipped (32 zero bytes) when with_hash is False.
+    """
+    stat = os.stat(path)
+    digest = bytes(32)
+    if with_hash:
+        sha = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                sha.update(chunk)
+        digest = sha.digest()
+    return stat.st_mtime_ns, stat.st_size, digest
+
+
+def _is_fresh(recorded, path, compiled_path=None, offset=None):
+    """
+    A source is fresh when its mtime and size still match the header; if they
+    moved (e.g. the file was touched or checked out again) fall back to the hash.
+    When the hash still matches, the new mtime is written into the header of
+    compiled_path (at the source's record `offset`), so later checks skip the hash.
+    """
+    mtime_ns, size, digest = recorded
+    current_mtime, current_size, _ = source_fingerprint(path, with_hash=False)
+    if (current_mtime, current_size) == (mtime_ns, size):
+        return True
+    if current_size != size or source_fingerprint(path)[2] != digest:
+        return False
+    if compiled_path is not None:
+        _restamp(compiled_path, offset, current_mtime)
+    return True
+
+
+def _restamp(compiled_path, offset, mtime_ns):
+    """
+    Overwrites a source's recorded mtime in place. The compiled file keeps its
+    own timestamps, so indexes stamped with them (see neighbor_index) stay valid.
+    A file that cannot be written is left alone; it is simply hashed again next time.
+    """
+    try:
+        stat = os.stat(compiled_path)
+        with open(compiled_path, "r+b") as file:
+            file.seek(offset)
+            file.write(struct.pack("<Q", mtime_ns))
+        os.utime(compiled_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    except OSError:
+        pass
+
+
+# ----------------------------
+# Compile / Open
+# ----------------------------
+
+def write_compiled_network(out_path, distance_matrix, address_list, distance_source, address_source,
+                           typecode="d"):
+    """
+    Writes a distance matrix and its aligned address list to a compiled network file.
+
+    Parameters:
+        out_path (str): destination file (written atomically)
+        distance_matrix (DistanceMatrix): full symmetric matrix
+        address_list (List[str]): addresses aligned with the matrix indices
+        distance_source (str): distance CSV the matrix came from (recorded for staleness checks)
+        address_source (str): address CSV the list came from
+        typecode (str): 'd' (float64, exact) or 'f' (float32, half the size)
+    """
+    if typecode not in SUPPORTED_TYPECODES:
+        raise ValueError(f"Unsupported matrix typecode '{typecode}'")
+
+    size = distance_matrix.size
+    data = distance_matrix.row_major()
+    matrix_bytes = data.tobytes() if data.format == typecode else array(typecode, data).tobytes()
+    address_bytes = "\0".join(address_list).encode("utf-8")
+
+    header = struct.pack(
+        HEADER_FORMAT, MAGIC, FORMAT_VERSION, typecode.encode("ascii"), size, len(address_bytes),
+        *source_fingerprint(distance_source), *source_fingerprint(address_source),
+    ).ljust(HEADER_SIZE, b"\0")
+
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(header)
+        file.write(matrix_bytes)
+        file.write(address_bytes)
+    os.replace(tmp_path, out_path)
+
+
+def read_header(compiled_path):
+    """
+    Reads and validates the header of a compiled network file.
+
+    Returns:
+        dict: header fields, or None if the file is missing or not a supported version
+    """
+    try:
+        with open(compiled_path, "rb") as file:
+            raw = file.read(HEADER_SIZE)
+    except FileNotFoundError:
+        return None
+    if len(raw) < HEADER_SIZE:
+        return None
+
+    (magic, version, typecode, size, address_length,
+     d_mtime, d_size, d_hash, a_mtime, a_size, a_hash) = struct.unpack_from(HEADER_FORMAT, raw)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+
+    return {
+        "typecode": typecode.decode("ascii"),
+        "size": size,
+        "address_length": address_length,
+        "distance_source": (d_mtime, d_size, d_hash),
+        "address_source": (a_mtime, a_size, a_hash),
+    }
+
+
+def is_stale(compiled_path, distance_source, address_source):
+    """ Returns True if the compiled file is missing, outdated, or from an older format. """
+    header = read_header(compiled_path)
+    if header is None or sys.byteorder != "little":
+        return True
+    return not (_is_fresh(header["distance_source"], distance_source, compiled_path, SOURCE_OFFSETS[0])
+                and _is_fresh(header["address_source"], address_source, compiled_path, SOURCE_OFFSETS[1]))
+
+
+def open_compiled_network(compiled_path):
+    """
+    Memory-maps a compiled network file.
+
+    Returns:
+        (List[str], DistanceMatrix): address list and a matrix whose rows are
+        zero-copy views into the mapped file.
+    """
+    header = read_header(compiled_path)
+    if header is None:
+        raise ValueError(f"{compiled_path} is not a compiled network file")
+
+    size = header["size"]
+    typecode = header["typecode"]
+    matrix_length = size * size * array(typecode).itemsize
+
+    with open(compiled_path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(mapped)
+    matrix_data = view[HEADER_SIZE:HEADER_SIZE + matrix_length].cast(typecode)
+    address_start = HEADER_SIZE + matrix_length
+    address_block = bytes(view[address_start:address_start + header["address_length"]])
+    address_list = address_block.decode("utf-8").split("\0") if address_block else []
+
+    return address_list, DistanceMatrix(size, matrix_data)
@@ -0,0 +1,230 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import time
+from distance_matrix import DistanceMatrix
+from neighbor_index import NeighborIndex
+
+
+# ----------------------------
+# Dataset Bundle File Format
+# ----------------------------
+#
+#   header     (HEADER_SIZE bytes, little-endian, see HEADER_FORMAT)
+#   matrix     size * size packed floats, row-major, typecode 'd' or 'f'
+#   neighbors  size * k int32 neighbor index (k may be 0)
+#   addresses  UTF-8 address strings separated by NUL bytes
+#   packages   UTF-8 JSON array, one row per package (see PACKAGE_FIELDS)
+#
+# One file holds everything a run needs, already parsed: the closed distance
+# matrix (mapped zero-copy, like a compiled network file), its neighbor index,
+# and the packages with their notes parsed and addresses resolved. Building it
+# is the CLI's "load" step; every later command only opens it.
+
+MAGIC = b"WGDS"
+FORMAT_VERSION = 1
+BUNDLE_SUFFIX = ".wgds"
+
+# magic, version, typecode, size, neighbor k, address block length, package block length
+HEADER_FORMAT = "<4sHcxIIIQ"
+HEADER_SIZE = 64
+
+PACKAGE_FIELDS = ("package_id", "address", "city", "state", "zip_code", "deadline", "weight", "notes",
+                  "truck_restriction", "must_be_delivered_with", "delayed_until", "address_index")
+
+
+def _package_row(pkg):
+    deadline = pkg.deadline.strftime("%I:%M %p") if pkg.deadline else ""
+    delayed = pkg.delayed_until.strftime("%H:%M") if pkg.delayed_until else None
+    return [pkg.package_id, pkg.address, pkg.city, pkg.state, pkg.zip_code, deadline, pkg.weight, pkg.notes,
+            pkg.truck_restriction, list(pkg.must_be_delivered_with), delayed, pkg.address_index]
+
+
+def _package_from_row(row):
+    from hashmap import Package
+
+    (package_id, address, city, state, zip_code, deadline, weight, notes,
+     truck, delivered_with, delayed, address_index) = row
+    delayed_until = time(*map(int, delayed.split(":"))) if delayed else None
+    pkg = Package(package_id, address, city, state, zip_code, deadline, weight, notes,
+                  (truck, tuple(delivered_with), delayed_until))
+    pkg.address_index = address_index
+    return pkg
+
+
+# ----------------------------
+# Write / Open
+# ----------------------------
+
+def write_bundle(path, address_list, distance_matrix, packages, typecode="d"):
+    """
+    Writes a dataset bundle atomically.
+
+    Parameters:
+        path (str): destination file
+        address_list (List[str]): addresses aligned with the matrix indices
+        distance_matrix (DistanceMatrix): closed matrix, with neighbor_index attached or None
+        packages (Iterable[Package]): packages with address_index set
+        typecode (str): 'd' (float64, exact) or 'f' (float32, half the size)
+    """
+    size = distance_matrix.size
+    data = distance_matrix.row_major()
+    matrix_bytes = data.tobytes() if data.format == typecode else array(typecode, data).tobytes()
+    index = distance_matrix.neighbor_index
+    neighbor_bytes = index.tobytes() if index is not None else b""
+    address_bytes = "\0".join(address_list).encode("utf-8")
+    package_bytes = json.dumps([_package_row(pkg) for pkg in packages], separators=(",", ":")).encode("utf-8")
+
+    header = struct.pack(HEADER_FORMAT, MAGIC, FORMAT_VERSION, typecode.encode("ascii"), size,
+                         index.k if index is not None else 0, len(address_bytes), len(package_bytes))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(header.ljust(HEADER_SIZE, b"\0"))
+        file.write(matrix_bytes)
+        file.write(neighbor_bytes)
+        file.write(address_bytes)
+        file.write(package_bytes)
+    os.replace(tmp_path, path)
+
+
+def read_bundle_header(path):
+    """
+    Returns:
+        dict: header fields, or None if the file is missing or not a supported bundle
+    """
+    try:
+        with open(path, "rb") as file:
+            raw = file.read(HEADER_SIZE)
+    except FileNotFoundError:
+        return None
+    if len(raw) < HEADER_SIZE or sys.byteorder != "little":
+        return None
+    magic, version, typecode, size, k, address_length, package_length = struct.unpack_from(HEADER_FORMAT, raw)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    return {"typecode": typecode.decode("ascii"), "size": size, "neighbor_k": k,
+            "address_length": address_length, "package_length": package_length}
+
+
+def open_bundle(path, with_packages=True):
+    """
+    Memory-maps a dataset bundle.
+
+    Returns:
+        (List[str], DistanceMatrix, List[Package]): addresses, the matrix (zero-copy,
+        neighbor index attached) and the packages sorted by ID ([] if with_packages is False)
+    """
+    header = read_bundle_header(path)
+    if header is None:
+        raise ValueError(f"{path} is not a dataset bundle (run the 'load' command first)")
+
+    size, k, typecode = header["size"], header["neighbor_k"], header["typecode"]
+    matrix_length = size * size * array(typecode).itemsize
+    neighbor_length = size * k * array('i').itemsize
+
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+
+    offset = HEADER_SIZE
+    distance_matrix = DistanceMatrix(size, view[offset:offset + matrix_length].cast(typecode))
+    offset += matrix_length
+    if k:
+        distance_matrix.neighbor_index = NeighborIndex(size, k, view[offset:offset + neighbor_length].cast('i'))
+    offset += neighbor_length
+
+    address_block = bytes(view[offset:offset + header["address_length"]])
+    address_list = address_block.decode("utf-8").split("\0") if address_block else []
+    offset += header["address_length"]
+
+    packages = []
+    if with_packages:
+        rows = json.loads(bytes(view[offset:offset + header["package_length"]]))
+        packages = [_package_from_row(row) for row in rows]
+    return address_list, distance_matrix, packages
+
+
+def file_stamp(path):
+    """ (mtime_ns, size) of a file, used to tell whether a derived file is still current. """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+# ----------------------------
+# Saved Simulation Results
+# ----------------------------
+#
+#   header    RESULT_MAGIC, version, package count, summary length, bundle mtime_ns and size
+#   summary   UTF-8 JSON (SimulationResult.summary() plus the config)
+#   records   count int64 package IDs, then count float64 departure, delivery and
+#             cancellation minutes (one column each)
+#
+# Status lookups read only this file, so they need neither the bundle nor the
+# routing modules.
+
+RESULT_MAGIC = b"WGSR"
+RESULT_VERSION = 2
+RESULT_SUFFIX = ".wgsr"
+RESULT_HEADER_FORMAT = "<4sHxxIIQQ"
+RESULT_HEADER_SIZE = struct.calcsize(RESULT_HEADER_FORMAT)
+
+
+def default_result_path(bundle_path):
+    return os.path.splitext(bundle_path)[0] + RESULT_SUFFIX
+
+
+def save_result(path, timeline, summary, bundle_path):
+    """ Writes a DeliveryTimeline and its summary, stamped with the bundle they came from. """
+    records = list(timeline.records())
+    summary_bytes = json.dumps(summary).encode("utf-8")
+    header = struct.pack(RESULT_HEADER_FORMAT, RESULT_MAGIC, RESULT_VERSION, len(records), len(summary_bytes),
+                         *file_stamp(bundle_path))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(header)
+        file.write(summary_bytes)
+        file.write(array('q', (pid for pid, _, _, _ in records)).tobytes())
+        for column in range(1, 4):
+            file.write(array('d', (record[column] for record in records)).tobytes())
+    os.replace(tmp_path, path)
+
+
+def load_result(path, bundle_path):
+    """
+    Returns:
+        (DeliveryTimeline, dict): the saved timeline and summary, or None when the
+        file is missing, unreadable, or older than the bundle
+    """
+    from delivery_timeline import DeliveryTimeline
+
+    try:
+        with open(path, "rb") as file:
+            raw = file.read()
+    except FileNotFoundError:
+        return None
+    if len(raw) < RESULT_HEADER_SIZE or sys.byteorder != "little":
+        return None
+    magic, version, count, summary_length, mtime_ns, size = struct.unpack_from(RESULT_HEADER_FORMAT, raw)
+    if magic != RESULT_MAGIC or version != RESULT_VERSION:
+        return None
+    try:
+        if (mtime_ns, size) != file_stamp(bundle_path):
+            return None
+    except FileNotFoundError:
+        return None
+
+    offset = RESULT_HEADER_SIZE
+    summary = json.loads(raw[offset:offset + summary_length])
+    offset += summary_length
+    columns = []
+    for typecode in ("q", "d", "d", "d"):
+        column = array(typecode)
+        column.frombytes(raw[offset:offset + count * column.itemsize])
+        offset += count * column.itemsize
+        columns.append(column)
+    if any(len(column) != count for column in columns):
+        return None
+    return DeliveryTimeline(zip(*columns)), summary
@@ -1,4 +1,11 @@
 import csv
+from distance_matrix import DistanceMatrix
+from network_closure import build_distance_matrix, close_distance_matrix
+from address_index import AddressIndex
+from compiled_network import (default_compiled_path, is_stale, open_compiled_network,
+                              write_compiled_network)
+from neighbor_index import load_neighbor_index, DEFAULT_INDEX_K
+from instrumentation import log, METRICS
 
 # ----------------------------
 # B.1 – Load Distance Matrix (2D)
@@ -8,33 +15,65 @@ def get_distance(matrix, i, j):
     """
     Returns the distance between two addresses using the symmetric distance matrix.
     Parameters:
-        matrix (List[List[float]]): 2D distance table
+        matrix (DistanceMatrix or List[List[float]]): distance table
         i (int): index of first address
         j (int): index of second address
 
     Returns:
         float: distance in miles
     """
+    if isinstance(matrix, DistanceMatrix):
+        return matrix.distance(i, j)
     if i > j:
         return matrix[i][j]
     return matrix[j][i]
 
 
-def load_distance_data(file_path):
+def load_distance_data(file_path, close=True):
     """
-    Loads the upper-triangle distance matrix from a CSV file.
+    Loads the distance table from a CSV file (lower triangle or full square).
+
+    Row i may be prefixed with its own address index (as in distances_backup.csv);
+    that label column is dropped so cell j is always the distance from i to j.
+
+    Empty cells are missing entries, not free travel. With close=True the table
+    is repaired by a shortest-path closure (see network_closure), so missing,
+    asymmetric and triangle-violating entries become real driving distances.
 
     Returns:
-        distance_matrix (List[List[float]]): Symmetric matrix of delivery distances.
+        distance_matrix (DistanceMatrix): Full symmetric matrix of delivery distances.
 
     Rubric C – Supports the delivery program by allowing distance lookups between addresses.
     """
-    distance_matrix = []
-
     with open(file_path, mode='r', newline='', encoding='utf-8-sig') as file:
-        reader = csv.reader(file)
-        for row in reader:
-            distance_matrix.append([float(cell) if cell else 0.0 for cell in row])
+        raw_rows = list(csv.reader(file))
+
+    size = len(raw_rows)
+    labeled = (all(row and row[0].strip() == str(i) for i, row in enumerate(raw_rows))
+               and (all(len(row) == i + 2 for i, row in enumerate(raw_rows))
+                    or all(len(row) == size + 1 for row in raw_rows)))
+    rows = [[float(cell) if cell.strip() else None for cell in (row[1:] if labeled else row)]
+            for row in raw_rows]
+
+    # The diagonal is always zero, even when left blank
+    for i, row in enumerate(rows):
+        if i < len(row):
+            row[i] = 0.0
+
+    distance_matrix, report = build_distance_matrix(rows)
+    if close:
+        distance_matrix, report = close_distance_matrix(distance_matrix, report)
+
+    if report.missing:
+        log.warning(f"⚠️ Warning: Distance table has {report.missing} empty entries; "
+                    f"{'filled with the shortest known path' if close else 'treated as unreachable'}")
+    if report.asymmetric:
+        log.warning(f"⚠️ Warning: Distance table has {report.asymmetric} asymmetric entries; using the shorter direction")
+    if report.shortened:
+        log.warning(f"⚠️ Warning: {report.shortened} distance entries were longer than a path through other "
+                    f"addresses and were shortened ({report.method})")
+    if report.unreachable:
+        log.warning(f"⚠️ Warning: {report.unreachable} address pairs have no known path between them")
 
     return distance_matrix
 
@@ -64,6 +103,48 @@ def load_address_data(file_path):
     return address_list
 
 
+# ----------------------------
+# B.3 – Compiled Network (Matrix + Addresses)
+# ----------------------------
+
+def compile_network_data(distance_path, address_path, compiled_path=None, typecode='d'):
+    """
+    Parses the distance and address CSVs once and writes them to a binary
+    compiled network file that later runs can memory-map.
+
+    Returns:
+        str: path of the compiled file
+    """
+    compiled_path = compiled_path or default_compiled_path(distance_path)
+    write_compiled_network(compiled_path, load_distance_data(distance_path), load_address_data(address_path),
+                           distance_path, address_path, typecode)
+    return compiled_path
+
+
+@METRICS.timed("load_network")
+def load_network_data(distance_path, address_path, compiled_path=None, neighbor_k=DEFAULT_INDEX_K):
+    """
+    Loads the address list and distance matrix, preferring the compiled file.
+
+    The compiled file is memory-mapped zero-copy when it is newer than both
+    CSVs; otherwise it is (re)compiled from the CSVs first. The matrix comes
+    with its k-nearest-neighbor index attached, read from the file next to the
+    compiled one (or built and saved there when missing or outdated).
+
+    Returns:
+        address_list (List[str]), distance_matrix (DistanceMatrix)
+
+    Rubric H – Avoids re-parsing every distance cell as text on each launch.
+    """
+    compiled_path = compiled_path or default_compiled_path(distance_path)
+    if is_stale(compiled_path, distance_path, address_path):
+        compile_network_data(distance_path, address_path, compiled_path)
+    address_list, distance_matrix = open_compiled_network(compiled_path)
+    if neighbor_k:
+        distance_matrix.neighbor_index = load_neighbor_index(distance_matrix, compiled_path, neighbor_k)
+    return address_list, distance_matrix
+
+
 # ----------------------------
 # Address Lookup Utilities
 # ----------------------------
@@ -80,20 +161,35 @@ def create_address_map(addresses):
     return {address.strip(): idx for idx, address in enumerate(addresses)}
 
 
+def build_address_index(addresses):
+    """
+    Builds a normalized AddressIndex over the address list.
+
+    Returns:
+        AddressIndex: resolver with cached, near-constant-time lookups.
+
+    Rubric H – Replaces per-package linear scans with a precomputed index.
+    """
+    return AddressIndex(addresses)
+
+
 def get_location_index(address, address_map):
     """
     Attempts to get the index of a given address from the address map.
-    Falls back to a partial match if exact match is not found.
+    With an AddressIndex the lookup is normalized and cached; with a plain dict
+    it falls back to a partial match if exact match is not found.
 
     Rubric H – Provides robustness in handling address typos or formatting variations.
 
     Parameters:
         address (str): Delivery address from package
-        address_map (dict): Precomputed {address -> index} map
+        address_map (AddressIndex or dict): Precomputed address -> index lookup
 
     Returns:
         int: Index in distance matrix, or None if not found.
     """
+    if isinstance(address_map, AddressIndex):
+        return address_map.resolve(address)
     if address.strip() in address_map:
         return address_map[address.strip()]
     for key in address_map:
@@ -1,201 +1,286 @@
-from datetime import datetime, timedelta, time
-from delivery_helpers import get_distance, create_address_map, get_location_index
+import heapq
+from delivery_helpers import build_address_index, get_location_index
+from routing import build_route, order_packages_by_route, route_length, DEFAULT_IMPROVERS, DEFAULT_TIME_BUDGET
+from route_cache import route_key
+from parallel_routing import route_trucks_parallel
+from event_simulation import DeliverySimulator
+from time_windows import RouteTiming, deadline_violations, stop_deadlines
+from fleet_assignment import FleetAssigner
+from trip_planner import plan_trips
+from instrumentation import log, METRICS
 
 TRUCK_SPEED = 18  # miles per hour
 
-def run_delivery_simulation(address_list, distance_matrix, package_hash, truck1, truck2, truck3):
-    all_trucks = [truck1, truck2, truck3]
 
-    # NEW: Track preloaded packages
+# ---------------------------------------------
+# Rubric A: Data Extraction & Preprocessing
+# ---------------------------------------------
+
+@METRICS.timed("prepare")
+def prepare_packages(address_list, package_hash):
+    """
+    Extracts every package from the hash table and assigns its address index.
+
+    Returns:
+        List[Package]: all packages ordered by package ID
+    """
+    # Step 1: Extract All Packages
+    all_packages = sorted(package_hash.values(), key=lambda pkg: pkg.package_id)
+
+    # Step 1.1: Create address index and assign address indices to all packages upfront
+    resolve_addresses(address_list, all_packages)
+    return all_packages
+
+
+def resolve_addresses(address_list, packages):
+    """ Sets address_index on each package, warning about ambiguous or unknown addresses. """
+    address_index = build_address_index(address_list)
+    for pkg in packages:
+        pkg.address_index = get_location_index(pkg.address, address_index)
+
+    address_report = address_index.report()
+    for address, candidates in address_report["ambiguous"].items():
+        log.warning(f"⚠️ Warning: Address '{address}' is ambiguous (candidates {candidates}); using {candidates[0]}")
+    for address in address_report["unresolved"]:
+        log.warning(f"⚠️ Warning: Address '{address}' could not be resolved to a known location")
+
+
+# ---------------------------------------------
+# Rubric C / D: Constraint Grouping & Package Assignment
+# ---------------------------------------------
+
+@METRICS.timed("assignment")
+def assign_packages(all_packages, all_trucks, distance_matrix, speed=TRUCK_SPEED, route_cache=None):
+    """
+    Loads packages onto trucks while respecting grouping, truck, delay and capacity constraints
+    (see FleetAssigner for how loads are clustered). Packages that do not fit on the fleet's
+    first departures are batched into reload trips (see plan_trips), which reuse routes
+    from route_cache (a RouteCache) when one is given.
+
+    Returns:
+        (set[int], List[Trip]): IDs of every package on a truck or trip (including
+        preloaded ones), and the reload trips in dispatch order
+    """
+    # Track preloaded packages
     assigned_package_ids = set()
     for truck in all_trucks:
         for pkg in truck.packages:
             assigned_package_ids.add(pkg.package_id)
 
-    # ---------------------------------------------
-    # Rubric A: Data Extraction & Preprocessing
-    # ---------------------------------------------
-
-    # Step 1: Extract All Packages (IDs 1 to 40)
-    all_packages = [package_hash.search(i) for i in range(1, 41)]
-
-    # Step 1.1: Create address map and assign address indices to all packages upfront
-    address_map = create_address_map(address_list)
-    for pkg in all_packages:
-        pkg.address_index = get_location_index(pkg.address, address_map)
-
-    # ---------------------------------------------
-    # Rubric C: Constraint Grouping & Categorization
-    # ---------------------------------------------
-
-    delayed_packages = []
-    grouped_sets = []
-    truck_restricted = {1: [], 2: [], 3: []}
-    priority_deadline = []
-    flexible_packages = []
-    seen_in_groups = set()
-
-    # Identify package groups that must be delivered together
-    for pkg in all_packages:
-        if pkg.must_be_delivered_with and pkg.package_id not in seen_in_groups:
-            group = set([pkg.package_id] + pkg.must_be_delivered_with)
-            grouped_sets.append(group)
-            seen_in_groups.update(group)
-
-    # Categorize packages based on constraints and delivery priorities
-    for pkg in all_packages:
-        if pkg.package_id in seen_in_groups:
-            continue
+    pending = [pkg for pkg in all_packages if pkg.package_id not in assigned_package_ids]
+    assigner = FleetAssigner(distance_matrix, all_trucks, speed)
+    loads = assigner.assign(pending)
+    for message in assigner.warnings:
+        log.warning(f"⚠️ Warning: {message}")
+
+    for truck, load in zip(all_trucks, loads):
+        truck.packages.extend(load)
+        assigned_package_ids.update(pkg.package_id for pkg in load)
+
+    trips = []
+    if assigner.overflow:
+        capacity = min(truck.max_capacity for truck in all_trucks)
+        earliest_start = min(truck.start_time.hour * 60 + truck.start_time.minute for truck in all_trucks)
+        with METRICS.phase("trip_planning"):
+            trips, too_large = plan_trips(distance_matrix, assigner.overflow, capacity, route_cache=route_cache,
+                                          speed=speed, earliest_start=earliest_start)
+        for number, trip in enumerate(trips, 1):
+            assigned_package_ids.update(pkg.package_id for pkg in trip.packages)
+            route = list(dict.fromkeys(pkg.address_index for pkg in trip.packages))
+            for stop, arrival, deadline in deadline_violations(distance_matrix, route, trip.timing):
+                log.warning(f"⚠️ Warning: Reload trip {number} reaches stop {stop} at "
+                            f"{int(arrival) // 60:02d}:{int(arrival) % 60:02d} at the earliest, after its "
+                            f"{int(deadline) // 60:02d}:{int(deadline) % 60:02d} deadline")
+        if too_large:
+            log.warning(f"⚠️ Warning: Packages {[pkg.package_id for pkg in too_large]} could not be assigned: "
+                        f"their group is larger than one truckload ({capacity})")
+
+    # Print Truck Loads for debugging / verification
+    for truck in all_trucks:
+        log.info("\nTruck %s - Start Time: %s", truck.truck_id, truck.start_time)
+        log.info("Packages Loaded: %s", [p.package_id for p in truck.packages])
+    for number, trip in enumerate(trips, 1):
+        truck = f"truck {trip.restriction}" if trip.restriction else "first truck back"
+        log.info("Reload Trip %d (%s): %s", number, truck, [p.package_id for p in trip.packages])
+
+    log.info("\n🚚 All trucks loaded with constraints respected.\n")
+
+    return assigned_package_ids, trips
+
+
+# ---------------------------------------------
+# Rubric E: Route Optimization & Delivery Simulation
+# ---------------------------------------------
+
+def route_timing(truck, speed=TRUCK_SPEED, departure=None):
+    """
+    Builds the RouteTiming for a loaded truck: it departs at its start time (or
+    once its delayed packages arrive, or at `departure` minutes if that is
+    later, e.g. when it has to wait for a driver) and each stop must be
+    reached by the earliest deadline of the packages addressed there.
+    """
+    start = truck.start_time.hour * 60 + truck.start_time.minute
+    if departure is not None:
+        start = max(start, departure)
+    for pkg in truck.packages:
         if pkg.delayed_until:
-            delayed_packages.append(pkg)
-        elif pkg.truck_restriction:
-            truck_restricted[pkg.truck_restriction].append(pkg)
-        elif pkg.deadline and pkg.deadline < datetime.strptime("5:00 PM", "%I:%M %p").time():
-            priority_deadline.append(pkg)
+            start = max(start, pkg.delayed_until.hour * 60 + pkg.delayed_until.minute)
+    return RouteTiming(start, speed, stop_deadlines(truck.packages))
+
+
+def _driver_departures(ready, drivers, trip_minutes):
+    """
+    Replays how DeliverySimulator hands out drivers: trucks leave in order of
+    readiness, the first `drivers` at their ready time, every later one when
+    the earliest driver is back (or at its ready time, if that is later).
+
+    Parameters:
+        ready (dict[int, float]): ready minutes per loaded truck index
+        drivers (int): drivers available (None = one per truck)
+        trip_minutes (Callable[[int, float], float]): minutes truck i spends on its
+            route when it departs at the given minute; called in departure order
+
+    Returns:
+        dict[int, float]: expected departure minutes per truck index
+    """
+    departures = {}
+    returns = []
+    for i in sorted(ready, key=ready.get):
+        departure = ready[i]
+        if drivers is not None and len(departures) >= drivers:
+            departure = max(departure, heapq.heappop(returns))
+        departures[i] = departure
+        heapq.heappush(returns, departure + trip_minutes(i, departure))
+    return departures
+
+
+def expected_departures(all_trucks, distance_matrix, speed=TRUCK_SPEED, drivers=None, hub=0):
+    """
+    Departure minutes per truck (fleet order) for routed trucks, given the
+    drivers available; None for a truck with nothing to deliver.
+    """
+    ready = {i: route_timing(truck, speed).start_minutes for i, truck in enumerate(all_trucks) if truck.packages}
+    routes = [list(dict.fromkeys(pkg.address_index for pkg in truck.packages)) for truck in all_trucks]
+    departures = _driver_departures(ready, drivers,
+                                    lambda i, _: route_length(distance_matrix, routes[i], hub) / speed * 60)
+    return [departures.get(i) for i in range(len(all_trucks))]
+
+
+@METRICS.timed("routing")
+def route_trucks(all_trucks, distance_matrix, route_improvers=DEFAULT_IMPROVERS,
+                 route_time_budget=DEFAULT_TIME_BUDGET, parallel_routing=False, max_workers=None,
+                 speed=TRUCK_SPEED, route_cache=None, drivers=None):
+    """
+    Builds a deadline-aware insertion tour per truck, then improves it with local search (2-opt / Or-opt).
+    With a RouteCache, trucks whose stops, departure and deadlines were solved before reuse that route.
+
+    Deadlines are planned from each truck's expected departure: with fewer
+    drivers than trucks, a truck that has to wait for a driver is routed only
+    once the routes it waits on are known, from the time that driver is back
+    (see _driver_departures). Trucks that leave at their start time are routed
+    together (in parallel with parallel_routing).
+
+    Returns:
+        dict[truck_id, List[(int, float, float)]]: planned deadline violations per truck
+        as (address index, arrival minutes, deadline minutes)
+    """
+    stop_lists = [[pkg.address_index for pkg in truck.packages] for truck in all_trucks]
+    timings = [route_timing(truck, speed) for truck in all_trucks]
+    routes = [None] * len(all_trucks)
+    keys = [None] * len(all_trucks)
+
+    def solve(indices):
+        if route_cache is not None:
+            for i in indices:
+                keys[i] = route_key(distance_matrix, stop_lists[i], improvers=route_improvers, timing=timings[i])
+                cached = route_cache.get(keys[i], route_time_budget)
+                if cached is not None:
+                    routes[i] = cached[0]
+        todo = [i for i in indices if routes[i] is None]
+        if parallel_routing and len(todo) > 1:
+            solved = route_trucks_parallel(distance_matrix, [stop_lists[i] for i in todo], improvers=route_improvers,
+                                           time_budget=route_time_budget, max_workers=max_workers,
+                                           timings=[timings[i] for i in todo])
         else:
-            flexible_packages.append(pkg)
-
-
-    # ---------------------------------------------
-    # Rubric D: Package Assignment to Trucks
-    # ---------------------------------------------
-
-    # Step 3: Assign Grouped Sets to any truck with sufficient capacity
-    for group in grouped_sets:
-        pkg_list = [package_hash.search(pid) for pid in group]
-        assigned = False
-        for truck in all_trucks:
-            if len(truck.packages) + len(pkg_list) <= truck.max_capacity:
-                truck.packages.extend(pkg_list)
-                for pkg in pkg_list:
-                    assigned_package_ids.add(pkg.package_id)
-                    print(f"Assigned grouped Package {pkg.package_id} to Truck {truck.truck_id}")
-                assigned = True
-                break
-        if not assigned:
-            print(f"⚠️ Warning: Group {group} could not be assigned to any truck due to capacity constraints.")
-
-
-
-    # Step 4: Assign Truck-Restricted Packages
-    for truck_id, pkgs in truck_restricted.items():
-        truck = all_trucks[truck_id - 1]
-        for pkg in pkgs:
-            if pkg.package_id not in assigned_package_ids:
-                # Append directly to packages list for consistency
-                truck.packages.append(pkg)
-                assigned_package_ids.add(pkg.package_id)
-                print(f"Truck-restricted Package {pkg.package_id} loaded on Truck {truck_id}")
-
-    # Step 5: Assign Delayed Packages (Truck 3 leaves latest)
-    # Ensure start_time is a datetime object
-    truck3.start_time = datetime.combine(datetime.today(), time(hour=10, minute=20))
-    for pkg in delayed_packages:
-        if pkg.package_id not in assigned_package_ids:
-            truck3.packages.append(pkg)
-            assigned_package_ids.add(pkg.package_id)
-            print(f"Delayed Package {pkg.package_id} loaded on Truck 3 (10:20 AM start)")
-
-    # Step 6: Assign Priority Deadline Packages
-    for pkg in priority_deadline:
-        if pkg.package_id not in assigned_package_ids:
-            for truck in all_trucks:
-                if len(truck.packages) < truck.max_capacity:
-                    truck.packages.append(pkg)
-                    assigned_package_ids.add(pkg.package_id)
-                    print(f"Priority Package {pkg.package_id} assigned to Truck {truck.truck_id}")
-                    break
-
-    # Step 7: Assign Flexible Packages
-    for pkg in flexible_packages:
-        if pkg.package_id not in assigned_package_ids:
-            for truck in all_trucks:
-                if len(truck.packages) < truck.max_capacity:
-                    truck.packages.append(pkg)
-                    assigned_package_ids.add(pkg.package_id)
-                    print(f"Flexible Package {pkg.package_id} assigned to Truck {truck.truck_id}")
-                    break
-
-    # Step 8: Final Catch-All (if any missed)
-    unassigned = [p for p in all_packages if p.package_id not in assigned_package_ids]
-    for pkg in unassigned:
-        for truck in all_trucks:
-            if len(truck.packages) < truck.max_capacity:
-                truck.packages.append(pkg)
-                assigned_package_ids.add(pkg.package_id)
-                print(f"🚨 Final pass: assigned Package {pkg.package_id} to Truck {truck.truck_id}")
-                break
-
-    # Step 9: Print Truck Loads for debugging / verification
-    for truck in all_trucks:
-        print(f"\nTruck {truck.truck_id} - Start Time: {truck.start_time}")
-        print(f"Packages Loaded: {[p.package_id for p in truck.packages]}")
-
-    print("\n🚚 All trucks loaded with constraints respected.\n")
-
-    # ---------------------------------------------
-    # Rubric E: Route Optimization & Delivery Simulation
-    # ---------------------------------------------
-
-    def reorder_truck_packages(truck, distance_matrix):
-        """ Sort truck packages using Nearest Neighbor """
-        if not truck.packages:
-            return
-
-        current_index = 0  # Hub index
-        sorted_packages = []
-        remaining = truck.packages[:]
-
-        while remaining:
-            nearest_pkg = min(remaining, key=lambda pkg: get_distance(distance_matrix, current_index, pkg.address_index))
-            sorted_packages.append(nearest_pkg)
-            current_index = nearest_pkg.address_index
-            remaining.remove(nearest_pkg)
-
-        truck.packages = sorted_packages
-
-    def deliver_truck_packages(truck):
-        current_index = 0
-        current_time = truck.start_time
-        remaining = truck.packages[:]
-
-        # Packages already have address_index assigned
-
-        # Sort packages by nearest neighbor heuristic
-        reorder_truck_packages(truck, distance_matrix)
-
-        while remaining:
-            next_pkg = min(remaining, key=lambda pkg: get_distance(distance_matrix, current_index, pkg.address_index))
-            travel_distance = get_distance(distance_matrix, current_index, next_pkg.address_index)
-            travel_time = timedelta(hours=travel_distance / TRUCK_SPEED)
-
-            current_time += travel_time
-            truck.add_miles(travel_distance)
-
-            next_pkg.delivery_time = current_time
-            next_pkg.status = "Delivered"
-            print(f"Delivered Package {next_pkg.package_id} at {next_pkg.delivery_time.time()}")
-
-            current_index = next_pkg.address_index
-            remaining.remove(next_pkg)
-
-        # Return to hub after deliveries
-        return_to_hub = get_distance(distance_matrix, current_index, 0)
-        truck.add_miles(return_to_hub)
-        truck.set_end_time(current_time + timedelta(hours=return_to_hub / TRUCK_SPEED))
-
-    # Deliver packages for each truck sorted by start time for realism
-    all_trucks.sort(key=lambda t: t.start_time)
-    for truck in all_trucks:
-        deliver_truck_packages(truck)
+            solved = [build_route(distance_matrix, stop_lists[i], improvers=route_improvers,
+                                  time_budget=route_time_budget, timing=timings[i])
+                      for i in todo]
+        for i, route in zip(todo, solved):
+            routes[i] = route
+            if route_cache is not None:
+                route_cache.put(keys[i], route, route_length(distance_matrix, route), route_time_budget)
+
+    ready = {i: timing.start_minutes for i, timing in enumerate(timings) if all_trucks[i].packages}
+    first = sorted(ready, key=ready.get)[:drivers] if drivers is not None else list(ready)
+    solve([i for i in range(len(all_trucks)) if i in first or i not in ready])
+
+    def trip_minutes(i, departure):
+        if routes[i] is None:
+            timings[i] = route_timing(all_trucks[i], speed, departure)
+            solve([i])
+        return route_length(distance_matrix, routes[i]) / speed * 60
+
+    _driver_departures(ready, drivers, trip_minutes)
+
+    violations = {}
+    for truck, route, timing in zip(all_trucks, routes, timings):
+        truck.packages = order_packages_by_route(truck.packages, route)
+        violations[truck.truck_id] = deadline_violations(distance_matrix, route, timing)
+        for stop, arrival, deadline in violations[truck.truck_id]:
+            log.warning(f"⚠️ Warning: Truck {truck.truck_id} reaches stop {stop} at "
+                        f"{int(arrival) // 60:02d}:{int(arrival) % 60:02d}, after its "
+                        f"{int(deadline) // 60:02d}:{int(deadline) % 60:02d} deadline")
+    return violations
+
+
+@METRICS.timed("simulation")
+def simulate_deliveries(all_trucks, distance_matrix, drivers=None, speed=TRUCK_SPEED, trips=None):
+    """
+    Drives every truck on one shared clock (drivers are handed over as trucks return,
+    and returning trucks reload for any pending trips).
+
+    Returns:
+        DeliverySimulator: the finished simulation, for status queries
+    """
+    simulator = DeliverySimulator(distance_matrix, all_trucks, speed, drivers=drivers, trips=trips)
+    simulator.run()
+    return simulator
+
+
+def run_delivery_simulation(address_list, distance_matrix, package_hash, *all_trucks,
+                            route_improvers=DEFAULT_IMPROVERS, route_time_budget=DEFAULT_TIME_BUDGET,
+                            parallel_routing=False, max_workers=None, drivers=None, speed=TRUCK_SPEED,
+                            route_cache=None):
+    """
+    Runs the whole day on the given trucks and prints the delivery summary.
+
+    This updates the trucks and the packages in package_hash in place and
+    returns the live simulator, which status lookups and mid-day changes
+    (live_updates) need. For repeatable or concurrent runs on the same data
+    use simulation_core.simulate(), which leaves its inputs untouched.
+
+    Returns:
+        DeliverySimulator
+    """
+    all_trucks = list(all_trucks)
+
+    all_packages = prepare_packages(address_list, package_hash)
+    assigned_package_ids, trips = assign_packages(all_packages, all_trucks, distance_matrix, speed, route_cache)
+
+    # Routes are independent once packages are assigned, so optimize them all up front
+    route_trucks(all_trucks, distance_matrix, route_improvers, route_time_budget, parallel_routing, max_workers,
+                 speed, route_cache, drivers)
+    simulator = simulate_deliveries(all_trucks, distance_matrix, drivers, speed, trips)
 
     # ---------------------------------------------
     # Rubric F: Delivery Summary & Output
     # ---------------------------------------------
 
     total_miles = sum(truck.miles for truck in all_trucks)
-    print("\n📦 --- Delivery Summary ---")
+    log.info("\n📦 --- Delivery Summary ---")
     for truck in all_trucks:
-        print(f"Truck {truck.truck_id} - End: {truck.end_time}, Miles: {truck.miles:.2f}")
-    print(f"\nTotal Packages Delivered: {len(assigned_package_ids)} / 40")
-    print(f"Total Miles: {total_miles:.2f}")
+        log.info("Truck %s - Trips: %s, End: %s, Miles: %.2f", truck.truck_id, truck.trips, truck.end_time, truck.miles)
+    log.info("\nTotal Packages Delivered: %d / %d", len(assigned_package_ids), len(all_packages))
+    log.info("Total Miles: %.2f", total_miles)
+
+    return simulator
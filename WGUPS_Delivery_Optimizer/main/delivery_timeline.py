@@ -0,0 +1,222 @@
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+# ----------------------------
+# Status Values
+# ----------------------------
+
+AT_HUB = "At Hub"
+EN_ROUTE = "En Route"
+DELIVERED = "Delivered"
+CANCELLED = "Cancelled"
+
+
+def to_minutes(value):
+    """ Converts a datetime.time, datetime, or number of minutes to minutes after midnight. """
+    if isinstance(value, (int, float)):
+        return float(value)
+    return value.hour * 60 + value.minute + value.second / 60 + value.microsecond / 60_000_000
+
+
+def parse_time_of_day(value):
+    """
+    Parses "10:25", "10:25:30" or "1:12 PM" to minutes after midnight.
+
+    Raises:
+        ValueError: if the text is not a valid time of day
+    """
+    text = value.strip().upper()
+    meridiem = None
+    if text.endswith(("AM", "PM")):
+        text, meridiem = text[:-2].strip(), text[-2:]
+    parts = [int(part) for part in text.split(":")]
+    if not 1 <= len(parts) <= 3:
+        raise ValueError(f"invalid time of day '{value}'")
+    hours, minutes, seconds = (parts + [0, 0])[:3]
+    if meridiem:
+        if not 1 <= hours <= 12:
+            raise ValueError(f"invalid time of day '{value}'")
+        hours = hours % 12 + (12 if meridiem == "PM" else 0)
+    if not (0 <= hours < 24 and 0 <= minutes < 60 and 0 <= seconds < 60):
+        raise ValueError(f"invalid time of day '{value}'")
+    return hours * 60 + minutes + seconds / 60
+
+
+def format_minutes(minutes):
+    """ Minutes after midnight -> "HH:MM". """
+    return f"{int(minutes) // 60:02d}:{int(minutes) % 60:02d}"
+
+
+# ----------------------------
+# TimelineSnapshot Class
+# ----------------------------
+
+class TimelineSnapshot:
+    """
+    State of every package at one moment, computed lazily from the timeline.
+
+    Creating a snapshot costs two binary searches; the status counts and the
+    delivered list come straight from sorted prefixes, and per-package lists
+    are only materialized when asked for. Cancelled packages (rare mid-day
+    changes, see live_updates) are kept in a short list of their own and
+    taken out of the status they had when they were cancelled.
+    """
+    __slots__ = ("timeline", "minutes", "_departed", "_delivered", "_cancelled")
+
+    def __init__(self, timeline, minutes):
+        self.timeline = timeline
+        self.minutes = minutes
+        self._departed = bisect_right(timeline._departure_sorted, minutes)
+        self._delivered = bisect_right(timeline._delivery_sorted, minutes)
+        self._cancelled = [(pid, departed <= minutes)
+                           for cancelled, departed, pid in timeline._cancelled if cancelled <= minutes]
+
+    @property
+    def counts(self):
+        """ {status: number of packages} at this moment. """
+        total = len(self.timeline)
+        cancelled_out = sum(1 for _, departed in self._cancelled if departed)
+        cancelled_in = len(self._cancelled) - cancelled_out
+        return {
+            AT_HUB: total - self._departed - cancelled_in,
+            EN_ROUTE: self._departed - self._delivered - cancelled_out,
+            DELIVERED: self._delivered,
+            CANCELLED: len(self._cancelled),
+        }
+
+    def delivered(self):
+        """ Package IDs delivered by this moment, in delivery order. """
+        return self.timeline._delivery_order[:self._delivered].tolist()
+
+    def en_route(self):
+        """ Package IDs that have left the hub but are not yet delivered (or cancelled). """
+        skip = set(self.timeline._delivery_order[:self._delivered])
+        skip.update(pid for pid, _ in self._cancelled)
+        return [pid for pid in self.timeline._departure_order[:self._departed] if pid not in skip]
+
+    def at_hub(self):
+        """ Package IDs that have not left the hub yet (and are not cancelled). """
+        cancelled = {pid for pid, _ in self._cancelled}
+        return [pid for pid in self.timeline._departure_order[self._departed:] if pid not in cancelled]
+
+    def cancelled(self):
+        """ Package IDs cancelled by this moment. """
+        return [pid for pid, _ in self._cancelled]
+
+    def status(self, package_id):
+        return self.timeline.status_at(package_id, self.minutes)
+
+    def as_dict(self):
+        """ {package_id: status} for every package (O(n)). """
+        result = dict.fromkeys(self.at_hub(), AT_HUB)
+        result.update(dict.fromkeys(self.en_route(), EN_ROUTE))
+        result.update(dict.fromkeys(self.delivered(), DELIVERED))
+        result.update(dict.fromkeys(self.cancelled(), CANCELLED))
+        return result
+
+
+# ----------------------------
+# DeliveryTimeline Class
+# ----------------------------
+
+class DeliveryTimeline:
+    """
+    Read-only index of when each package left the hub and when it was
+    delivered (or cancelled: a cancelled package is "Cancelled" from that
+    moment on, whatever it was before).
+
+    Built once per simulation, it answers status_at(package_id, t) and
+    snapshot(t) with binary searches over typed arrays, without re-running
+    routing or reading (or copying) the mutable Package objects.
+
+    Rubric G – Supports status lookups for any package at any time of day.
+    """
+
+    def __init__(self, records):
+        """
+        Parameters:
+            records (Iterable[(int, float, float, float)]): (package_id, departure minutes,
+                delivery minutes, cancellation minutes) with math.inf for events that never happened
+        """
+        records = sorted(records)
+        self._package_ids = array('l', (pid for pid, _, _, _ in records))
+        self._departures = array('d', (departed for _, departed, _, _ in records))
+        self._deliveries = array('d', (delivered for _, _, delivered, _ in records))
+        self._cancellations = array('d', (cancelled for _, _, _, cancelled in records))
+        self._cancelled = sorted((cancelled, departed, pid) for pid, departed, _, cancelled in records
+                                 if cancelled != math.inf)
+
+        by_departure = sorted(records, key=lambda record: record[1])
+        by_delivery = sorted(records, key=lambda record: record[2])
+        self._departure_order = array('l', (pid for pid, _, _, _ in by_departure))
+        self._departure_sorted = array('d', (departed for _, departed, _, _ in by_departure))
+        self._delivery_order = array('l', (pid for pid, _, _, _ in by_delivery))
+        self._delivery_sorted = array('d', (delivered for _, _, delivered, _ in by_delivery))
+
+    @classmethod
+    def from_simulator(cls, simulator):
+        """ Builds the timeline from a finished DeliverySimulator run. """
+        records = []
+        for package_id, times, states in simulator.package_timelines():
+            departed = delivered = cancelled = math.inf
+            for moment, state in zip(times, states):
+                if state == EN_ROUTE and departed == math.inf:
+                    departed = to_minutes(moment)
+                elif state == DELIVERED:
+                    delivered = to_minutes(moment)
+                elif state == CANCELLED:
+                    cancelled = to_minutes(moment)
+            records.append((package_id, departed, delivered, cancelled))
+        return cls(records)
+
+    def __len__(self):
+        return len(self._package_ids)
+
+    def records(self):
+        """ Yields (package_id, departure, delivery, cancellation minutes) by package ID, as given to __init__. """
+        return zip(self._package_ids, self._departures, self._deliveries, self._cancellations)
+
+    def __contains__(self, package_id):
+        return self._row(package_id) is not None
+
+    def _row(self, package_id):
+        row = bisect_left(self._package_ids, package_id)
+        if row < len(self._package_ids) and self._package_ids[row] == package_id:
+            return row
+        return None
+
+    def departure_minutes(self, package_id):
+        row = self._row(package_id)
+        return None if row is None or self._departures[row] == math.inf else self._departures[row]
+
+    def delivery_minutes(self, package_id):
+        row = self._row(package_id)
+        return None if row is None or self._deliveries[row] == math.inf else self._deliveries[row]
+
+    def cancellation_minutes(self, package_id):
+        row = self._row(package_id)
+        return None if row is None or self._cancellations[row] == math.inf else self._cancellations[row]
+
+    def status_at(self, package_id, at_time):
+        """
+        Returns "At Hub", "En Route", "Delivered" or "Cancelled" for a package at
+        the given time (datetime.time, datetime, or minutes after midnight) in
+        O(log n). Unknown package IDs return None.
+        """
+        row = self._row(package_id)
+        if row is None:
+            return None
+        minutes = to_minutes(at_time)
+        if minutes >= self._cancellations[row]:
+            return CANCELLED
+        if minutes >= self._deliveries[row]:
+            return DELIVERED
+        if minutes >= self._departures[row]:
+            return EN_ROUTE
+        return AT_HUB
+
+    def snapshot(self, at_time):
+        """ Returns a TimelineSnapshot of every package at the given time. """
+        return TimelineSnapshot(self, to_minutes(at_time))
@@ -0,0 +1,359 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from delivery_timeline import DeliveryTimeline, AT_HUB, EN_ROUTE, DELIVERED, CANCELLED
+from instrumentation import log
+
+
+# ----------------------------
+# Event Types
+# ----------------------------
+
+DEPART = "depart"      # truck leaves the hub with its load
+ARRIVE = "arrive"      # truck reaches a stop
+DELIVER = "deliver"    # one package handed over at the current stop
+RETURN = "return"      # truck is back at the hub and its driver is free
+
+
+class Event:
+    """ One entry in the simulation event log. """
+    __slots__ = ("time", "kind", "truck_id", "location", "package_id")
+
+    def __init__(self, time, kind, truck_id, location, package_id=None):
+        self.time = time
+        self.kind = kind
+        self.truck_id = truck_id
+        self.location = location
+        self.package_id = package_id
+
+    def __repr__(self):
+        package = f", package {self.package_id}" if self.package_id is not None else ""
+        return f"Event({self.time.time()}, {self.kind}, truck {self.truck_id}, location {self.location}{package})"
+
+
+# ----------------------------
+# DeliverySimulator Class
+# ----------------------------
+
+class DeliverySimulator:
+    """
+    Discrete-event simulation of every truck on one shared clock.
+
+    Pending events sit in a heap ordered by (time, sequence); run() pops them
+    one at a time, so all trucks advance together and the resulting event log
+    is globally time-ordered. A truck departs once it is scheduled, its
+    delayed packages have reached the hub, and a driver is free; when a truck
+    returns, its driver is handed to the next waiting truck. Once every first
+    load is out, a free driver takes the next pending reload trip (see
+    trip_planner.Trip) on the returning truck, or on any truck parked at the
+    hub that the trip is allowed to use.
+
+    After run(), status_at() answers "what was package X doing at time t" with
+    a binary search over that package's own events instead of re-simulating.
+
+    Rubric E – Simulates deliveries and records delivery times for every package.
+    """
+
+    def __init__(self, distance_matrix, trucks, speed, drivers=None, hub=0, trips=None):
+        """
+        Parameters:
+            distance_matrix (DistanceMatrix): symmetric distance table
+            trucks (List[Truck]): trucks with packages already in route order
+            speed (float): truck speed in miles per hour
+            drivers (int): drivers available (defaults to one per truck)
+            hub (int): address index of the hub
+            trips (List[Trip]): reload trips in dispatch order (default none)
+        """
+        self.distance_matrix = distance_matrix
+        self.trucks = list(trucks)
+        self.speed = speed
+        self.drivers = len(self.trucks) if drivers is None else drivers
+        self.hub = hub
+        self.pending_trips = list(trips or [])
+        self._positions = {truck: position for position, truck in enumerate(self.trucks, 1)}
+        self._manifest = [pkg for truck in self.trucks for pkg in truck.packages]
+        self._manifest += [pkg for trip in self.pending_trips for pkg in trip.packages]
+        self.log = []
+        self._queue = []
+        self._sequence = 0
+        self._package_times = {}
+        self._package_states = {}
+        self._reference_date = None
+        self._timeline = None
+        self._started = False
+        self._waiting = []
+        self._idle = []
+        self._free_drivers = 0
+        self._departure_at = {}   # truck -> its currently valid DEPART time
+        self._next_stop = {}      # truck -> (destination, position) while driving, None while returning
+        self.clock = None
+
+    # ----------------------------
+    # Clock Helpers
+    # ----------------------------
+
+    def _as_datetime(self, value):
+        """ Places a time-of-day on the simulation's date so every timestamp is comparable. """
+        if isinstance(value, datetime):
+            return datetime.combine(self._reference_date, value.time())
+        return datetime.combine(self._reference_date, value)
+
+    def _travel_time(self, miles):
+        return timedelta(hours=miles / self.speed)
+
+    def _schedule(self, time, kind, truck, payload=None):
+        heapq.heappush(self._queue, (time, self._sequence, kind, truck, payload))
+        self._sequence += 1
+
+    def _record(self, time, kind, truck, location, package_id=None):
+        self.log.append(Event(time, kind, truck.truck_id, location, package_id))
+
+    # ----------------------------
+    # Simulation
+    # ----------------------------
+
+    def _ready_time(self, truck):
+        """ Earliest departure: scheduled start, or later if a delayed package is still in flight. """
+        ready = self._as_datetime(truck.start_time)
+        for pkg in truck.packages:
+            if pkg.delayed_until is not None:
+                ready = max(ready, self._as_datetime(pkg.delayed_until))
+        return ready
+
+    def _start(self):
+        first_start = min(truck.start_time for truck in self.trucks)
+        self._reference_date = first_start.date() if isinstance(first_start, datetime) else datetime.today().date()
+
+        waiting = sorted((truck for truck in self.trucks if truck.packages), key=self._ready_time)
+        self._idle = [truck for truck in self.trucks if not truck.packages]
+        for truck in waiting[:self.drivers]:
+            self._schedule_departure(truck, self._ready_time(truck))
+        self._free_drivers = self.drivers - len(waiting[:self.drivers])
+        self._waiting = waiting[self.drivers:]
+        self._started = True
+        self.dispatch_pending()
+
+    def run(self, until=None):
+        """
+        Processes events in time order, updating truck miles / end times
+        and package delivery times and statuses.
+
+        Parameters:
+            until (datetime.time or datetime): stop after the last event at or before
+                this time (default: run to the end). A later run() resumes from there,
+                so mid-day changes can be applied in between (see live_updates).
+
+        Returns:
+            List[Event]: the time-ordered event log
+        """
+        if not self.trucks:
+            return self.log
+        if not self._started:
+            self._start()
+        self._timeline = None
+        limit = None if until is None else self._as_datetime(until)
+
+        while self._queue and (limit is None or self._queue[0][0] <= limit):
+            now, _, kind, truck, payload = heapq.heappop(self._queue)
+            self.clock = now
+
+            if kind == DEPART:
+                if self._departure_at.get(truck) != now:
+                    continue  # superseded by a reschedule_departure()
+                del self._departure_at[truck]
+                truck.begin_trip(now)
+                self._record(now, DEPART, truck, self.hub)
+                for pkg in truck.packages:
+                    self._mark(pkg, now, EN_ROUTE)
+                self._drive_to_next_stop(truck, now, self.hub, 0)
+
+            elif kind == ARRIVE:
+                location, position = payload
+                self._record(now, ARRIVE, truck, location)
+                while position < len(truck.packages) and truck.packages[position].address_index == location:
+                    pkg = truck.packages[position]
+                    pkg.delivery_time = now
+                    pkg.status = DELIVERED
+                    self._record(now, DELIVER, truck, location, pkg.package_id)
+                    self._mark(pkg, now, DELIVERED)
+                    log.info("Delivered Package %s at %s", pkg.package_id, now.time())
+                    position += 1
+                self._drive_to_next_stop(truck, now, location, position)
+
+            elif kind == RETURN:
+                del self._next_stop[truck]
+                truck.set_end_time(now)
+                self._record(now, RETURN, truck, self.hub)
+                # Hand the driver to the next truck that is waiting at the hub,
+                # otherwise send a truck out again with the next reload trip
+                if self._waiting:
+                    self._idle.append(truck)
+                    next_truck = self._waiting.pop(0)
+                    self._schedule_departure(next_truck, max(now, self._ready_time(next_truck)))
+                else:
+                    self._idle.insert(0, truck)
+                    self._free_drivers += 1
+                    self.dispatch_pending(now)
+
+        if limit is not None:
+            self.clock = limit
+        return self.log
+
+    def _schedule_departure(self, truck, time):
+        self._departure_at[truck] = time
+        self._schedule(time, DEPART, truck)
+
+    def dispatch_pending(self, now=None):
+        """
+        Sends free drivers out with pending trips on idle trucks.
+
+        Returns:
+            int: number of trips dispatched
+        """
+        dispatched = 0
+        while self._free_drivers and self._dispatch_trip(now, self._idle):
+            self._free_drivers -= 1
+            dispatched += 1
+        return dispatched
+
+    def _dispatch_trip(self, now, idle):
+        """
+        Loads the first pending trip that one of the idle trucks may carry
+        (earlier trucks in `idle` are preferred) and schedules its departure.
+
+        Returns:
+            bool: True if a trip was dispatched
+        """
+        for t, trip in enumerate(self.pending_trips):
+            for truck in idle:
+                if trip.restriction is None or self._positions[truck] == trip.restriction:
+                    del self.pending_trips[t]
+                    idle.remove(truck)
+                    truck.reload(trip.packages)
+                    trip.truck = truck
+                    ready = self._ready_time(truck)
+                    self._schedule_departure(truck, ready if now is None else max(now, ready))
+                    return True
+        return False
+
+    def _drive_to_next_stop(self, truck, now, location, position):
+        if position < len(truck.packages):
+            destination = truck.packages[position].address_index
+            payload = (destination, position)
+            kind = ARRIVE
+        else:
+            destination = self.hub
+            payload = None
+            kind = RETURN
+        self._next_stop[truck] = payload
+        miles = self.distance_matrix.distance(location, destination)
+        truck.add_miles(miles)
+        self._schedule(now + self._travel_time(miles), kind, truck, payload)
+
+    # ----------------------------
+    # Mid-Day Changes
+    # ----------------------------
+
+    def truck_fleet_position(self, truck):
+        """ 1-based fleet position, as used by "Can only be on truck N". """
+        return self._positions[truck]
+
+    def awaiting_departure(self, truck):
+        """ True while the truck's current load is at the hub and has not left yet. """
+        if not self._started:
+            return bool(truck.packages)
+        return truck in self._departure_at or truck in self._waiting
+
+    def editable_from(self, truck):
+        """
+        Where a truck's load can still be changed.
+
+        Returns:
+            (int, int): (first editable position in truck.packages, stop the truck
+            drives on from), which is (0, hub) while the load waits at the hub;
+            packages for the stop a driving truck is heading to stay fixed.
+            None when nothing can change: the truck is returning or idle.
+        """
+        if truck in self._next_stop:
+            payload = self._next_stop[truck]
+            if payload is None:
+                return None
+            destination, position = payload
+            while position < len(truck.packages) and truck.packages[position].address_index == destination:
+                position += 1
+            return position, destination
+        return (0, self.hub) if self.awaiting_departure(truck) else None
+
+    def delivered_count(self, truck):
+        """ Number of packages at the front of truck.packages that are already delivered. """
+        if truck in self._next_stop:
+            payload = self._next_stop[truck]
+            return len(truck.packages) if payload is None else payload[1]
+        return 0 if self.awaiting_departure(truck) else len(truck.packages)
+
+    def reschedule_departure(self, truck, now=None):
+        """ Moves a scheduled departure to the truck's current ready time (after its load changed). """
+        if truck in self._departure_at:
+            ready = self._ready_time(truck)
+            self._schedule_departure(truck, ready if now is None else max(now, ready))
+
+    def add_to_manifest(self, pkg):
+        self._manifest.append(pkg)
+        self._timeline = None
+
+    def mark_cancelled(self, pkg, now=None):
+        """ Cancels a package from `now` on (default: the simulation clock, or all day before run()). """
+        pkg.status = CANCELLED
+        self._mark(pkg, now or self.clock or datetime.min, CANCELLED)
+        self._timeline = None
+
+    def _mark(self, pkg, time, state):
+        self._package_times.setdefault(pkg.package_id, []).append(time)
+        self._package_states.setdefault(pkg.package_id, []).append(state)
+
+    # ----------------------------
+    # Status Queries
+    # ----------------------------
+
+    def status_at(self, package_id, at_time):
+        """
+        Returns the status of a package at a given time of day in O(log k)
+        (k = that package's events), without re-running the simulation.
+
+        Parameters:
+            package_id (int): package to look up
+            at_time (datetime.time or datetime): moment to query
+
+        Returns:
+            str: "At Hub", "En Route", "Delivered", or "Cancelled"
+        """
+        times = self._package_times.get(package_id)
+        if not times:
+            return AT_HUB
+        position = bisect_right(times, self._as_datetime(at_time))
+        return self._package_states[package_id][position - 1] if position else AT_HUB
+
+    def package_timelines(self):
+        """
+        Yields (package_id, times, states) for every package on every truck or trip,
+        with its recorded status changes in time order (empty if it never left).
+        """
+        seen = set()
+        for pkg in self._manifest:
+            pid = pkg.package_id
+            if pid in seen:
+                continue
+            seen.add(pid)
+            yield pid, self._package_times.get(pid, []), self._package_states.get(pid, [])
+
+    def timeline(self):
+        """ Returns the DeliveryTimeline index for the events so far (rebuilt after each run() or change). """
+        if self._timeline is None:
+            self._timeline = DeliveryTimeline.from_simulator(self)
+        return self._timeline
+
+    def events_between(self, start, end):
+        """ Returns the logged events with start <= time < end (the log is time-ordered). """
+        start, end = self._as_datetime(start), self._as_datetime(end)
+        key = lambda event: event.time
+        return self.log[bisect_left(self.log, start, key=key):bisect_left(self.log, end, key=key)]
@@ -0,0 +1,85 @@
+import math
+from array import array
+from operator import add, itemgetter
+from instrumentation import METRICS
+
+
+# ----------------------------
+# Exact Routing (Held-Karp)
+# ----------------------------
+#
+# cost[mask * n + last] is the length of the shortest path that leaves the
+# start, visits exactly the stops in `mask` (a bitmask over the route's
+# distinct stops) and ends at stop `last`. Each state has exactly one
+# predecessor mask, mask without `last`, so the table is filled by pushing
+# every mask forward to each stop it does not contain yet:
+#
+#   cost[(mask | 1 << last) * n + last] = min over j in mask of cost[mask * n + j] + d(j, last)
+#
+# That inner minimum runs in C (min over map(add, ...) on itemgetter picks),
+# one call per (mask, last) pair, so the Python-level work is n * 2^n / 2
+# steps instead of n^2 * 2^n. The table is one flat array('d') of n * 2^n
+# floats (8 bytes per state, 8 MB at 16 stops) and no parent table is
+# kept: the tour is recovered by re-checking which predecessor produced each
+# optimal value.
+#
+# Time and memory still double with every stop, so build_route() only picks
+# the exact solver up to EXACT_MAX_STOPS stops (a few tens of milliseconds);
+# held_karp_route() itself accepts up to MAX_EXACT_STOPS.
+
+EXACT_MAX_STOPS = 12
+MAX_EXACT_STOPS = 20
+
+
+def held_karp_route(distance_matrix, stops, start=0):
+    """
+    Finds a shortest closed tour start -> stops -> start.
+
+    Parameters:
+        distance_matrix (DistanceMatrix): distance table
+        stops (Iterable[int]): address indices to visit (duplicates and the start are ignored)
+        start (int): hub index the tour departs from
+
+    Returns:
+        List[int]: stops in an optimal visiting order
+    """
+    nodes = list(dict.fromkeys(stop for stop in stops if stop != start))
+    n = len(nodes)
+    if n > MAX_EXACT_STOPS:
+        raise ValueError(f"Held-Karp is limited to {MAX_EXACT_STOPS} stops (got {n})")
+    if n <= 2:
+        return nodes
+
+    dist = distance_matrix.distance
+    into = [[dist(node, last) for node in nodes] for last in nodes]   # into[last][j] = d(nodes[j], last)
+    full = (1 << n) - 1
+    cost = array('d', [math.inf]) * ((full + 1) * n)
+    for last, node in enumerate(nodes):
+        cost[(1 << last) * n + last] = dist(start, node)
+
+    for mask in range(1, full):
+        members = [j for j in range(n) if mask >> j & 1]
+        if len(members) == 1:
+            pick = lambda values, j=members[0]: (values[j],)
+        else:
+            pick = itemgetter(*members)
+        base = mask * n
+        reached = pick(cost[base:base + n])
+        for last in range(n):
+            if not mask >> last & 1:
+                cost[(mask | 1 << last) * n + last] = min(map(add, reached, pick(into[last])))
+    METRICS.increment("held_karp_states", n << n)
+
+    # Close the tour, then walk back through the predecessors
+    base = full * n
+    last = min(range(n), key=lambda j: cost[base + j] + dist(nodes[j], start))
+    order = [last]
+    mask = full
+    while mask & (mask - 1):
+        previous = mask ^ (1 << last)
+        base = previous * n
+        last = min((j for j in range(n) if previous >> j & 1), key=lambda j: cost[base + j] + into[last][j])
+        order.append(last)
+        mask = previous
+    order.reverse()
+    return [nodes[j] for j in order]
@@ -0,0 +1,268 @@
+import math
+from instrumentation import METRICS
+from time_windows import DeadlineSchedule, RouteTiming
+
+
+# ----------------------------
+# Constraint Units (Union-Find)
+# ----------------------------
+
+MEDOID_SAMPLE = 25     # members sampled when re-centering a truck's cluster
+CLUSTER_ROUNDS = 3     # assign / re-center passes (k-medoids style)
+SCHEDULE_MAX_STOPS = 32  # deadline stops per truck checked as one route (two truckloads); beyond, hub -> stop time
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        parent = self.parent.setdefault(item, item)
+        if parent != item:
+            parent = self.parent[item] = self.find(parent)
+        return parent
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
+
+def _minutes(value):
+    return None if value is None else value.hour * 60 + value.minute
+
+
+class AssignmentUnit:
+    """
+    Packages that must travel on the same truck, with their combined constraints:
+    the truck they are restricted to, when the last of them reaches the hub, and
+    the earliest deadline among them.
+    """
+    __slots__ = ("packages", "location", "restriction", "ready", "deadline", "conflict")
+
+    def __init__(self, packages):
+        self.packages = packages
+        self.location = packages[0].address_index
+        restrictions = {pkg.truck_restriction for pkg in packages if pkg.truck_restriction}
+        self.restriction = min(restrictions) if restrictions else None
+        self.conflict = len(restrictions) > 1
+        delays = [_minutes(pkg.delayed_until) for pkg in packages if pkg.delayed_until]
+        self.ready = max(delays) if delays else 0
+        deadlines = [_minutes(pkg.deadline) for pkg in packages if pkg.deadline]
+        self.deadline = min(deadlines) if deadlines else math.inf
+
+    @property
+    def size(self):
+        return len(self.packages)
+
+
+def build_units(packages):
+    """
+    Merges "Must be delivered with" links transitively (union-find), so
+    overlapping groups such as {13, 14, 15, 19} and {13, 16, 19} become one unit
+    and no package is loaded twice. Linked IDs that are not in `packages` are ignored.
+
+    Returns:
+        List[AssignmentUnit]: one unit per connected group (singletons included)
+    """
+    by_id = {pkg.package_id: pkg for pkg in packages}
+    links = _UnionFind()
+    for pkg in packages:
+        links.find(pkg.package_id)
+        for other in pkg.must_be_delivered_with:
+            if other in by_id:
+                links.union(pkg.package_id, other)
+
+    members = {}
+    for pkg in packages:
+        members.setdefault(links.find(pkg.package_id), []).append(pkg)
+    return [AssignmentUnit(group) for group in members.values()]
+
+
+# ----------------------------
+# FleetAssigner Class
+# ----------------------------
+
+class FleetAssigner:
+    """
+    Capacity- and constraint-aware assignment of packages to an arbitrary fleet.
+
+    Packages are merged into units (see build_units). Truck-restricted units
+    go to their truck; every other unit goes to the nearest cluster center
+    among trucks that have room and, preferably, leave after the unit's delay
+    and can still reach it before its deadline. "Reach" is checked against
+    the deadline stops the truck already carries (see DeadlineSchedule), so a
+    late-leaving truck is not given more deadline stops than it can reach in
+    one run, however fast it is. Units are placed tightest
+    deadline first, and centers are re-picked as sampled medoids for a few
+    rounds (k-medoids on the distance matrix), so each pass costs
+    O(units x trucks) and each truck's load stays geographically compact.
+
+    Trucks are numbered 1..N in fleet order, matching "Can only be on truck N".
+    Units that do not fit in the fleet's remaining capacity are collected in
+    `overflow` (for reload trips, see trip_planner) rather than reported as warnings.
+
+    Rubric D – Assigns packages to trucks while honoring every special note.
+    """
+
+    def __init__(self, distance_matrix, trucks, speed, hub=0):
+        self.distance_matrix = distance_matrix
+        self.trucks = list(trucks)
+        self.speed = speed
+        self.hub = hub
+        self.warnings = []
+        self.unassigned = []
+        self.overflow = []
+
+    def _start(self, truck):
+        return _minutes(truck.start_time)
+
+    def _room(self, truck, load):
+        return truck.max_capacity - len(truck.packages) - load
+
+    def _preferred(self, truck, unit, schedule):
+        """
+        True if the truck leaves after the unit's packages arrive and can reach it
+        before its deadline along with the deadline stops already on it.
+        """
+        start = self._start(truck)
+        if start < unit.ready:
+            return False
+        if unit.deadline == math.inf:
+            return True
+        if len(schedule) > SCHEDULE_MAX_STOPS:
+            travel = self.distance_matrix.distance(self.hub, unit.location) * 60.0 / self.speed
+            return start + travel <= unit.deadline
+        return schedule.best_insertion(unit.location, unit.deadline) is not None
+
+    def _schedules(self, fixed):
+        """ One DeadlineSchedule per truck, holding the deadline stops of its hand-loaded and fixed packages. """
+        schedules = []
+        for truck, truck_units in zip(self.trucks, fixed):
+            schedule = DeadlineSchedule(self.distance_matrix, RouteTiming(self._start(truck), self.speed, {}),
+                                        self.hub)
+            stops = [(pkg.address_index, _minutes(pkg.deadline)) for pkg in truck.packages
+                     if pkg.deadline and pkg.address_index is not None]
+            stops += [(unit.location, unit.deadline) for unit in truck_units if unit.deadline != math.inf]
+            for location, deadline in sorted(stops, key=lambda item: item[1]):
+                self._schedule_unit(schedule, location, deadline)
+            schedules.append(schedule)
+        return schedules
+
+    def _schedule_unit(self, schedule, location, deadline):
+        """ Adds a deadline stop to a truck's schedule (schedules past SCHEDULE_MAX_STOPS stop growing). """
+        if location == self.hub or len(schedule) > SCHEDULE_MAX_STOPS:
+            return
+        best = schedule.best_insertion(location, deadline)
+        schedule.insert(location, deadline, best[1] if best is not None else None)
+
+    def _medoid(self, locations, fallback):
+        """ Approximate medoid: the sampled location with the smallest total distance to the sample. """
+        if not locations:
+            return fallback
+        step = max(1, len(locations) // MEDOID_SAMPLE)
+        sample = locations[::step]
+        dist = self.distance_matrix.distance
+        return min(sample, key=lambda loc: sum(dist(loc, other) for other in sample))
+
+    def _initial_centers(self, fixed_locations, units):
+        """ Trucks with fixed packages center on them; the rest spread out by farthest-point sampling. """
+        dist = self.distance_matrix.distance
+        centers = [self._medoid(locations, None) for locations in fixed_locations]
+        step = max(1, len(units) // 2000)
+        candidates = [unit.location for unit in units[::step]]
+        for i, center in enumerate(centers):
+            if center is not None or not candidates:
+                continue
+            chosen = [c for c in centers if c is not None] + [self.hub]
+            centers[i] = max(candidates, key=lambda loc: min(dist(loc, c) for c in chosen))
+        return [self.hub if center is None else center for center in centers]
+
+    def assign(self, packages):
+        """
+        Computes an assignment without modifying the trucks.
+
+        Returns:
+            List[List[Package]]: packages to load, one list per truck (fleet order)
+        """
+        self.warnings = []
+        self.unassigned = []
+        self.overflow = []
+        with METRICS.phase("constraint_grouping"):
+            units = build_units(packages)
+        for unit in units:
+            if unit.conflict:
+                ids = [pkg.package_id for pkg in unit.packages]
+                self.warnings.append(f"Group {ids} has conflicting truck restrictions; using truck {unit.restriction}")
+
+        fixed = [[] for _ in self.trucks]
+        fixed_load = [0] * len(self.trucks)
+        flexible = []
+        for unit in units:
+            if any(pkg.address_index is None for pkg in unit.packages):
+                self._reject(unit, "address could not be resolved")
+                continue
+            if unit.restriction is None:
+                flexible.append(unit)
+                continue
+            slot = unit.restriction - 1
+            if not 0 <= slot < len(self.trucks):
+                self._reject(unit, f"truck {unit.restriction} is not in the fleet")
+            elif self._room(self.trucks[slot], fixed_load[slot]) >= unit.size:
+                fixed[slot].append(unit)
+                fixed_load[slot] += unit.size
+            else:
+                self.overflow.extend(unit.packages)
+
+        # Tightest deadlines claim capacity first; larger groups before singletons on ties
+        flexible.sort(key=lambda unit: (unit.deadline, unit.ready, -unit.size))
+        fixed_locations = [[pkg.address_index for pkg in truck.packages if pkg.address_index is not None]
+                           + [unit.location for unit in fixed[i]]
+                           for i, truck in enumerate(self.trucks)]
+        centers = self._initial_centers(fixed_locations, flexible)
+
+        placement = {}
+        for _ in range(CLUSTER_ROUNDS):
+            placement, load = self._place(flexible, centers, fixed_load, fixed)
+            new_centers = []
+            for i in range(len(self.trucks)):
+                locations = fixed_locations[i] + [unit.location for unit, slot in placement.items() if slot == i]
+                new_centers.append(self._medoid(locations, centers[i]))
+            if new_centers == centers:
+                break
+            centers = new_centers
+
+        result = [[pkg for unit in truck_units for pkg in unit.packages] for truck_units in fixed]
+        for unit in flexible:
+            slot = placement.get(unit)
+            if slot is None:
+                self.overflow.extend(unit.packages)
+            else:
+                result[slot].extend(unit.packages)
+        return result
+
+    def _place(self, units, centers, fixed_load, fixed):
+        dist = self.distance_matrix.distance
+        load = list(fixed_load)
+        schedules = self._schedules(fixed)
+        placement = {}
+        for unit in units:
+            best = None
+            for i, truck in enumerate(self.trucks):
+                if self._room(truck, load[i]) < unit.size:
+                    continue
+                score = (not self._preferred(truck, unit, schedules[i]), dist(centers[i], unit.location))
+                if best is None or score < best[0]:
+                    best = (score, i)
+            if best is not None:
+                slot = best[1]
+                placement[unit] = slot
+                load[slot] += unit.size
+                if unit.deadline != math.inf:
+                    self._schedule_unit(schedules[slot], unit.location, unit.deadline)
+        return placement, load
+
+    def _reject(self, unit, reason):
+        self.unassigned.extend(unit.packages)
+        ids = [pkg.package_id for pkg in unit.packages]
+        self.warnings.append(f"Packages {ids} could not be assigned: {reason}")
@@ -0,0 +1,644 @@
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from delivery_simulation import expected_departures, route_timing, _driver_departures, TRUCK_SPEED
+from fleet_assignment import build_units
+from instrumentation import log, METRICS
+from parallel_routing import share_network, attach_network
+from routing import order_packages_by_route, route_length
+
+
+# ----------------------------
+# Fleet-Wide Search
+# ----------------------------
+#
+# FleetAssigner fixes which truck carries what before any route exists, and
+# route_trucks() then improves each truck on its own. The search here works
+# on the loaded fleet as a whole: simulated annealing over three moves,
+#
+#   2-opt      reverse a stretch of one route
+#   relocate   move one stop elsewhere in its route
+#   ruin       remove a few units around one stop (a large neighborhood) and
+#              re-insert each at its cheapest feasible place on any truck
+#
+# Each move is priced in O(1) per stop it touches from distance-matrix
+# lookups; only an accepted move is applied. Deadlines are checked against
+# each truck's cached arrival times and forward slack: a 2-opt or relocate
+# move re-times only the stops it reorders and compares the shift of the
+# stops after them with the slack there, so the check costs O(stops moved)
+# on a truck that is on time. Applying a move marks its truck for re-timing,
+# an O(route) pass done when the truck is next looked at; ruin moves re-time
+# every truck they touch. Moves stay inside the constraints
+# parsed from the notes: units (see build_units) move as a whole, truck
+# restrictions and hand-loaded packages pin a unit to its truck, a delayed
+# unit only joins a truck that leaves after it arrives, capacity holds, and
+# no truck's total deadline lateness may grow.
+#
+# With fewer drivers than trucks, a truck that waits for a driver leaves when
+# an earlier route is done, so a move that changes a route's length moves
+# the departures after it. Every accepted move re-derives the departures
+# (see delivery_simulation._driver_departures) from the current route
+# lengths and re-times the trucks whose departure moved; the move is undone
+# if that makes any of them later.
+#
+# Only the first departure of each truck is searched; reload trips keep the
+# routes plan_trips() gave them.
+
+DEFAULT_SEARCH_BUDGET = 2.0      # wall-clock seconds for the whole search
+MOVE_WEIGHTS = (4, 3, 3)          # 2-opt, relocate, ruin
+RUIN_MIN, RUIN_MAX = 2, 6        # units removed by one ruin move
+START_TEMPERATURE = 0.3          # x the average edge length of the starting solution
+END_TEMPERATURE = 0.002
+CLOCK_CHECK = 128                # iterations between wall-clock checks
+
+
+class SearchProblem:
+    """ Picklable description of a loaded fleet, all the search (and its worker processes) needs. """
+    __slots__ = ("hub", "speed", "departures", "starts", "drivers", "capacities", "routes", "unit_stops",
+                 "unit_sizes", "unit_deadlines", "unit_ready", "unit_lock", "unit_truck")
+
+    def __init__(self, hub, speed, departures, capacities, routes, unit_stops, unit_sizes, unit_deadlines,
+                 unit_ready, unit_lock, unit_truck, starts=None, drivers=None):
+        """
+        Parameters:
+            departures (List[float]): minutes each truck leaves the hub
+            starts (List[float]): minutes each truck's start time allows it to leave (default: departures)
+            drivers (int): drivers available (None = one per truck, departures never wait)
+            capacities (List[int]): packages each truck holds
+            routes (List[List[int]]): starting route per truck
+            unit_stops (List[tuple]): distinct address indices of each unit's packages
+            unit_sizes (List[int]): packages per unit
+            unit_deadlines (List[dict]): {stop: earliest deadline minutes} per unit
+            unit_ready (List[float]): minutes the unit's last delayed package reaches the hub
+            unit_lock (List[int]): truck a unit may not leave, or None if it may move
+            unit_truck (List[int]): starting truck per unit
+        """
+        self.hub = hub
+        self.speed = speed
+        self.departures = departures
+        self.capacities = capacities
+        self.routes = routes
+        self.unit_stops = unit_stops
+        self.unit_sizes = unit_sizes
+        self.unit_deadlines = unit_deadlines
+        self.unit_ready = unit_ready
+        self.unit_lock = unit_lock
+        self.unit_truck = unit_truck
+        self.starts = list(departures) if starts is None else starts
+        self.drivers = drivers
+
+
+def build_problem(trucks, speed=TRUCK_SPEED, fixed_ids=(), hub=0, departures=None, drivers=None):
+    """
+    Describes the trucks' current loads and routes (their package order) as a SearchProblem.
+
+    `departures` gives each truck's expected departure minutes (see
+    delivery_simulation.expected_departures); by default a truck leaves at its
+    own start time. With `drivers` (fewer than trucks) the search moves the
+    departures along with the route lengths they depend on.
+
+    Returns:
+        (SearchProblem, List[AssignmentUnit]): the problem and its units, index-aligned
+    """
+    fixed_ids = set(fixed_ids)
+    truck_of = {pkg.package_id: t for t, truck in enumerate(trucks) for pkg in truck.packages}
+    units, unit_truck, unit_lock = [], [], []
+    for t, truck in enumerate(trucks):
+        for unit in build_units(truck.packages):
+            # A group split across trucks (e.g. by hand loading) must not be split further
+            split = any(truck_of.get(other, t) != t for pkg in unit.packages for other in pkg.must_be_delivered_with)
+            pinned = (unit.restriction is not None or unit.conflict or split
+                      or any(pkg.package_id in fixed_ids for pkg in unit.packages))
+            units.append(unit)
+            unit_truck.append(t)
+            unit_lock.append(t if pinned else None)
+
+    unit_deadlines = []
+    for unit in units:
+        deadlines = {}
+        for pkg in unit.packages:
+            if pkg.deadline:
+                minutes = pkg.deadline.hour * 60 + pkg.deadline.minute
+                deadlines[pkg.address_index] = min(minutes, deadlines.get(pkg.address_index, minutes))
+        unit_deadlines.append(deadlines)
+
+    problem = SearchProblem(
+        hub, speed,
+        departures=[route_timing(truck, speed, departures[t] if departures else None).start_minutes
+                    for t, truck in enumerate(trucks)],
+        capacities=[truck.max_capacity for truck in trucks],
+        routes=[list(dict.fromkeys(pkg.address_index for pkg in truck.packages if pkg.address_index != hub))
+                for truck in trucks],
+        unit_stops=[tuple(dict.fromkeys(pkg.address_index for pkg in unit.packages)) for unit in units],
+        unit_sizes=[unit.size for unit in units],
+        unit_deadlines=unit_deadlines,
+        unit_ready=[unit.ready for unit in units],
+        unit_lock=unit_lock,
+        unit_truck=unit_truck,
+        starts=[truck.start_time.hour * 60 + truck.start_time.minute for truck in trucks],
+        drivers=drivers if drivers is not None and drivers < len(trucks) else None,
+    )
+    return problem, units
+
+
+# ----------------------------
+# FleetSearch Class
+# ----------------------------
+
+class FleetSearch:
+    """
+    One seeded simulated-annealing run over a SearchProblem.
+
+    The temperature falls geometrically with elapsed wall-clock time, from
+    START_TEMPERATURE to END_TEMPERATURE average edges, so the same schedule
+    fits any budget. The best solution seen is kept and returned.
+    """
+
+    def __init__(self, distance_matrix, problem, seed=0):
+        self.dist = distance_matrix.distance
+        self.problem = problem
+        self.rng = random.Random(seed)
+        self.routes = [list(route) for route in problem.routes]
+        self.unit_truck = list(problem.unit_truck)
+        self.members = [{} for _ in self.routes]    # per truck: stop -> [units with packages there]
+        self.schedules = [None] * len(self.routes)  # per truck: (arrivals, slack), None once its route changed
+        self.departures = list(problem.departures)
+        self.route_miles = [route_length(distance_matrix, route, problem.hub) for route in self.routes]
+        self.load = [0] * len(self.routes)
+        for unit, truck in enumerate(self.unit_truck):
+            self.load[truck] += problem.unit_sizes[unit]
+            for stop in problem.unit_stops[unit]:
+                self.members[truck].setdefault(stop, []).append(unit)
+        self.lateness = [self._lateness(truck) for truck in range(len(self.routes))]
+        self.miles = sum(self.route_miles)
+        self.movable = [unit for unit, lock in enumerate(problem.unit_lock) if lock is None]
+        self.accepted = 0
+
+    # ----------------------------
+    # Deadlines
+    # ----------------------------
+
+    def _stop_deadline(self, truck, stop):
+        deadlines = self.problem.unit_deadlines
+        return min((deadlines[unit].get(stop, math.inf) for unit in self.members[truck].get(stop, ())),
+                   default=math.inf)
+
+    def _schedule(self, truck):
+        """ Arrival minutes per stop and forward slack (see time_windows.deadline_insertion_route), cached. """
+        schedule = self.schedules[truck]
+        if schedule is None:
+            schedule = self.schedules[truck] = self._timing(truck, self.routes[truck])
+        return schedule
+
+    def _timing(self, truck, route):
+        minutes = 60.0 / self.problem.speed
+        arrivals = []
+        now = self.departures[truck]
+        current = self.problem.hub
+        for stop in route:
+            now += self.dist(current, stop) * minutes
+            arrivals.append(now)
+            current = stop
+        slack = [math.inf] * (len(route) + 1)
+        for k in range(len(route) - 1, -1, -1):
+            slack[k] = min(slack[k + 1], self._stop_deadline(truck, route[k]) - arrivals[k])
+        return arrivals, slack
+
+    def _lateness(self, truck, route=None):
+        if route is None:
+            route, (arrivals, _) = self.routes[truck], self._schedule(truck)
+        else:
+            arrivals, _ = self._timing(truck, route)
+        return sum(max(0.0, arrival - self._stop_deadline(truck, stop)) for stop, arrival in zip(route, arrivals))
+
+    def _deadlines_hold(self, truck):
+        """ Re-times a changed truck, records its lateness and returns True if it did not grow. """
+        self.schedules[truck] = None
+        lateness = self._lateness(truck)
+        if lateness > self.lateness[truck] + 1e-6:
+            return False
+        self.lateness[truck] = lateness
+        return True
+
+    def _reorder_keeps_deadlines(self, truck, lo, hi, segment, delta):
+        """
+        True if replacing route[lo..hi] with `segment` (the same stops in a new
+        order, `delta` miles longer) does not add lateness.
+
+        On a truck that is on time only the segment is re-timed; every later
+        stop arrives delta miles later, which fits if it is within slack[hi + 1].
+        A truck that is already late compares its total lateness instead.
+        """
+        route = self.routes[truck]
+        if self.lateness[truck] > 1e-6:
+            lateness = self._lateness(truck, route[:lo] + segment + route[hi + 1:])
+            if lateness > self.lateness[truck] + 1e-6:
+                return False
+            self.lateness[truck] = lateness
+            return True
+        arrivals, slack = self._schedule(truck)
+        minutes = 60.0 / self.problem.speed
+        if delta * minutes > slack[hi + 1] + 1e-6:
+            return False
+        now = arrivals[lo - 1] if lo else self.departures[truck]
+        current = route[lo - 1] if lo else self.problem.hub
+        for stop in segment:
+            now += self.dist(current, stop) * minutes
+            if now > self._stop_deadline(truck, stop) + 1e-6:
+                return False
+            current = stop
+        return True
+
+    def _departures_hold(self):
+        """
+        Re-derives the departures from the current route lengths (only when
+        trucks wait for drivers) and re-times the trucks whose departure moved.
+        Returns False, with every departure and schedule as it was, if any of
+        them gets later.
+        """
+        problem = self.problem
+        if problem.drivers is None:
+            return True
+        ready = {}
+        for truck, members in enumerate(self.members):
+            if self.load[truck]:
+                units = {unit for sharing in members.values() for unit in sharing}
+                ready[truck] = max([problem.starts[truck]] + [problem.unit_ready[unit] for unit in units])
+        minutes = 60.0 / problem.speed
+        departures = _driver_departures(ready, problem.drivers, lambda truck, _: self.route_miles[truck] * minutes)
+        moved = [truck for truck, departure in departures.items() if abs(departure - self.departures[truck]) > 1e-9]
+        saved = [(truck, self.departures[truck], self.schedules[truck], self.lateness[truck]) for truck in moved]
+        for truck in moved:
+            self.departures[truck] = departures[truck]
+            if not self._deadlines_hold(truck):
+                for truck, departure, schedule, lateness in saved:
+                    self.departures[truck], self.schedules[truck], self.lateness[truck] = departure, schedule, lateness
+                return False
+        return True
+
+    def _apply_reorder(self, truck, lo, hi, segment, delta, lateness):
+        """ Puts `segment` in place of route[lo..hi]; undone (restoring `lateness`) if a later departure is late. """
+        route = self.routes[truck]
+        previous = route[lo:hi + 1], self.schedules[truck]
+        route[lo:hi + 1] = segment
+        self.schedules[truck] = None
+        self.route_miles[truck] += delta
+        if not self._departures_hold():
+            route[lo:hi + 1], self.schedules[truck] = previous
+            self.route_miles[truck] -= delta
+            self.lateness[truck] = lateness
+            return False
+        self.miles += delta
+        return True
+
+    def _accept(self, delta, temperature):
+        return delta < 1e-9 or (temperature > 0 and self.rng.random() < math.exp(-delta / temperature))
+
+    # ----------------------------
+    # Intra-Route Moves
+    # ----------------------------
+
+    def _random_route(self, min_stops):
+        truck = self.rng.randrange(len(self.routes))
+        return truck if len(self.routes[truck]) >= min_stops else None
+
+    def two_opt_move(self, temperature):
+        truck = self._random_route(3)
+        if truck is None:
+            return False
+        route, dist, hub = self.routes[truck], self.dist, self.problem.hub
+        n = len(route)
+        a = self.rng.randrange(n - 1)
+        b = self.rng.randrange(a + 1, n)
+        p = route[a - 1] if a else hub
+        s = route[b + 1] if b + 1 < n else hub
+        q, r = route[a], route[b]
+        delta = dist(p, r) + dist(q, s) - dist(p, q) - dist(r, s)
+        if not self._accept(delta, temperature):
+            return False
+        segment = route[a:b + 1][::-1]
+        lateness = self.lateness[truck]
+        if not self._reorder_keeps_deadlines(truck, a, b, segment, delta):
+            return False
+        return self._apply_reorder(truck, a, b, segment, delta, lateness)
+
+    def relocate_move(self, temperature):
+        truck = self._random_route(3)
+        if truck is None:
+            return False
+        route, dist, hub = self.routes[truck], self.dist, self.problem.hub
+        n = len(route)
+        i = self.rng.randrange(n)
+        j = self.rng.randrange(n)   # position in the route without route[i]
+        if i == j:
+            return False
+        stop = route[i]
+        before = route[i - 1] if i else hub
+        after = route[i + 1] if i + 1 < n else hub
+
+        def without(k):   # route[k] after removing route[i]
+            return route[k] if k < i else route[k + 1]
+
+        x = without(j - 1) if j else hub
+        y = without(j) if j < n - 1 else hub
+        delta = (dist(before, after) - dist(before, stop) - dist(stop, after)
+                 + dist(x, stop) + dist(stop, y) - dist(x, y))
+        if not self._accept(delta, temperature):
+            return False
+        lo, hi = min(i, j), max(i, j)
+        segment = route[lo + 1:hi + 1] + [stop] if i < j else [stop] + route[lo:hi]
+        lateness = self.lateness[truck]
+        if not self._reorder_keeps_deadlines(truck, lo, hi, segment, delta):
+            return False
+        return self._apply_reorder(truck, lo, hi, segment, delta, lateness)
+
+    # ----------------------------
+    # Ruin and Recreate
+    # ----------------------------
+
+    def _remove_unit(self, unit):
+        """ Takes a unit off its truck; returns the change in miles. """
+        truck = self.unit_truck[unit]
+        route, dist, hub = self.routes[truck], self.dist, self.problem.hub
+        self.load[truck] -= self.problem.unit_sizes[unit]
+        delta = 0.0
+        for stop in self.problem.unit_stops[unit]:
+            sharing = self.members[truck][stop]
+            sharing.remove(unit)
+            if sharing:
+                continue
+            del self.members[truck][stop]
+            if stop == hub:
+                continue
+            i = route.index(stop)
+            before = route[i - 1] if i else hub
+            after = route[i + 1] if i + 1 < len(route) else hub
+            delta += dist(before, after) - dist(before, stop) - dist(stop, after)
+            del route[i]
+            self.schedules[truck] = None
+        self.unit_truck[unit] = None
+        self.route_miles[truck] += delta
+        return delta
+
+    def _best_position(self, truck, stop, deadline, schedule):
+        """
+        Cheapest deadline-feasible place for a new stop: (added miles, position), or None.
+
+        Inserting before position k delays every later stop by the detour, so
+        it is feasible when the stop itself is on time and the detour fits in slack[k].
+        """
+        route, dist, hub = self.routes[truck], self.dist, self.problem.hub
+        arrivals, slack = schedule
+        minutes = 60.0 / self.problem.speed
+        best = None
+        for k in range(len(route) + 1):
+            before = route[k - 1] if k else hub
+            after = route[k] if k < len(route) else hub
+            added = dist(before, stop) + dist(stop, after) - dist(before, after)
+            if best is not None and added >= best[0]:
+                continue
+            departed = arrivals[k - 1] if k else self.departures[truck]
+            if departed + dist(before, stop) * minutes > deadline or added * minutes > slack[k] + 1e-9:
+                continue
+            best = (added, k)
+        return best
+
+    def _insertion_cost(self, unit, truck):
+        """ Estimated added miles for putting a unit on a truck, or None if it cannot go there. """
+        problem = self.problem
+        if self.load[truck] + problem.unit_sizes[unit] > problem.capacities[truck]:
+            return None
+        if problem.unit_ready[unit] > self.departures[truck]:
+            return None
+        schedule = self._schedule(truck)
+        arrivals = schedule[0]
+        cost = 0.0
+        for stop in problem.unit_stops[unit]:
+            deadline = problem.unit_deadlines[unit].get(stop, math.inf)
+            if stop in self.members[truck]:
+                if stop != problem.hub and arrivals[self.routes[truck].index(stop)] > deadline:
+                    return None
+                continue
+            if stop == problem.hub:
+                continue
+            best = self._best_position(truck, stop, deadline, schedule)
+            if best is None:
+                return None
+            cost += best[0]
+        return cost
+
+    def _insert_unit(self, unit, truck):
+        """ Puts a unit on a truck, each new stop at its cheapest feasible place; returns the change in miles. """
+        problem = self.problem
+        self.load[truck] += problem.unit_sizes[unit]
+        self.unit_truck[unit] = truck
+        delta = 0.0
+        for stop in problem.unit_stops[unit]:
+            present = stop in self.members[truck]
+            if not present and stop != problem.hub:
+                deadline = problem.unit_deadlines[unit].get(stop, math.inf)
+                schedule = self._schedule(truck)
+                best = self._best_position(truck, stop, deadline, schedule)
+                if best is None:
+                    # An earlier stop of this unit used up the slack; ruin_move() rejects the result if it is late
+                    best = self._best_position(truck, stop, math.inf, (schedule[0], [math.inf] * len(schedule[1])))
+                added, k = best
+                self.routes[truck].insert(k, stop)
+                self.schedules[truck] = None
+                delta += added
+            self.members[truck].setdefault(stop, []).append(unit)
+        self.route_miles[truck] += delta
+        return delta
+
+    def _ruined_units(self):
+        """ A random movable unit plus the movable units at neighboring stops of its route. """
+        seed = self.rng.choice(self.movable)
+        truck = self.unit_truck[seed]
+        route = self.routes[truck]
+        wanted = self.rng.randint(RUIN_MIN, RUIN_MAX)
+        chosen = dict.fromkeys([seed])
+        stop = self.problem.unit_stops[seed][0]
+        if stop in route:
+            center = route.index(stop)
+            for offset in range(1, len(route)):
+                for k in (center - offset, center + offset):
+                    if 0 <= k < len(route):
+                        for unit in self.members[truck][route[k]]:
+                            if self.problem.unit_lock[unit] is None:
+                                chosen[unit] = None
+                if len(chosen) >= wanted:
+                    break
+        return list(chosen)[:max(wanted, 1)]
+
+    def ruin_move(self, temperature):
+        if not self.movable:
+            return False
+        units = self._ruined_units()
+        saved = {}
+        origin = {unit: self.unit_truck[unit] for unit in units}
+
+        def touch(truck):
+            if truck not in saved:
+                saved[truck] = (list(self.routes[truck]), {s: list(us) for s, us in self.members[truck].items()},
+                                self.load[truck], self.lateness[truck], self.schedules[truck],
+                                self.route_miles[truck])
+
+        delta = 0.0
+        for unit in units:
+            touch(self.unit_truck[unit])
+            delta += self._remove_unit(unit)
+
+        self.rng.shuffle(units)
+        feasible = True
+        for unit in units:
+            candidates = []
+            for truck in range(len(self.routes)):
+                if self.problem.unit_lock[unit] is not None and truck != self.problem.unit_lock[unit]:
+                    continue
+                cost = self._insertion_cost(unit, truck)
+                if cost is not None:
+                    candidates.append((cost, self.rng.random(), truck))
+            if not candidates:
+                feasible = False
+                break
+            _, _, truck = min(candidates)
+            touch(truck)
+            delta += self._insert_unit(unit, truck)
+
+        if feasible and self._accept(delta, temperature):
+            if all(self._deadlines_hold(truck) for truck in saved) and self._departures_hold():
+                self.miles += delta
+                return True
+        for truck, (route, members, load, lateness, schedule, miles) in saved.items():
+            self.routes[truck], self.members[truck], self.load[truck] = route, members, load
+            self.lateness[truck], self.schedules[truck], self.route_miles[truck] = lateness, schedule, miles
+        for unit, truck in origin.items():
+            self.unit_truck[unit] = truck
+        return False
+
+    # ----------------------------
+    # Annealing Loop
+    # ----------------------------
+
+    def run(self, time_budget=DEFAULT_SEARCH_BUDGET):
+        """
+        Returns:
+            (float, List[List[int]], List[int], int): best miles, its routes, its unit-to-truck
+            assignment, and the number of moves tried
+        """
+        best = (self.miles, [list(route) for route in self.routes], list(self.unit_truck))
+        stops = sum(len(route) for route in self.routes)
+        if stops < 3 and not self.movable:
+            return best + (0,)
+
+        moves = (self.two_opt_move, self.relocate_move, self.ruin_move)
+        average_edge = self.miles / max(1, stops + len(self.routes))
+        hot, cold = START_TEMPERATURE * average_edge, END_TEMPERATURE * average_edge
+        started = time.perf_counter()
+        temperature = hot
+        iterations = 0
+        while True:
+            if iterations % CLOCK_CHECK == 0:
+                elapsed = time.perf_counter() - started
+                if elapsed >= time_budget:
+                    break
+                temperature = hot * (cold / hot) ** (elapsed / time_budget) if hot > 0 else 0.0
+            iterations += 1
+            move = self.rng.choices(moves, MOVE_WEIGHTS)[0]
+            if move(temperature):
+                self.accepted += 1
+                if self.miles < best[0] - 1e-9:
+                    best = (self.miles, [list(route) for route in self.routes], list(self.unit_truck))
+        return best + (iterations,)
+
+
+# ----------------------------
+# Seeded Restarts
+# ----------------------------
+
+_worker_block = None
+_worker_matrix = None
+
+
+def _attach_search_worker(*network_args):
+    global _worker_block, _worker_matrix
+    _worker_block, _worker_matrix = attach_network(*network_args)
+
+
+def _search_task(problem, seed, time_budget):
+    return FleetSearch(_worker_matrix, problem, seed).run(time_budget)
+
+
+def search_fleet(distance_matrix, problem, time_budget=DEFAULT_SEARCH_BUDGET, restarts=1, max_workers=1, seed=0):
+    """
+    Runs `restarts` independent searches (seeds seed, seed + 1, ...) and keeps the best.
+
+    The budget is the wall-clock time for all of them: run one after another
+    they share it, while a pool of W workers gives each restart W times as long.
+
+    Returns:
+        (float, List[List[int]], List[int], int): as FleetSearch.run(), iterations summed over restarts
+    """
+    restarts = max(1, restarts)
+    workers = min(max_workers or os.cpu_count() or 1, restarts)
+    each = time_budget * workers / restarts
+    if workers == 1:
+        results = [FleetSearch(distance_matrix, problem, seed + r).run(each) for r in range(restarts)]
+    else:
+        block, network_args = share_network(distance_matrix)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_search_worker,
+                                     initargs=network_args) as pool:
+                results = list(pool.map(_search_task, [problem] * restarts,
+                                        range(seed, seed + restarts), [each] * restarts))
+        finally:
+            block.close()
+            block.unlink()
+    best = min(results, key=lambda result: result[0])
+    return best[:3] + (sum(result[3] for result in results),)
+
+
+def optimize_fleet(trucks, distance_matrix, speed=TRUCK_SPEED, time_budget=DEFAULT_SEARCH_BUDGET, restarts=1,
+                   max_workers=1, seed=0, fixed_ids=(), hub=0, drivers=None):
+    """
+    Improves the trucks' loads and routes together and applies the best solution found.
+
+    Call it after route_trucks(): the trucks' package order is the starting
+    route. Trucks are only changed when the search found a shorter fleet total.
+
+    Parameters:
+        trucks (List[Truck]): loaded, routed trucks (fleet order)
+        distance_matrix (DistanceMatrix): symmetric distance table
+        speed (float): miles per hour, for deadlines
+        time_budget (float): wall-clock seconds for the whole search
+        restarts (int): independent seeded searches; the best one wins
+        max_workers (int): processes to run restarts in (1 runs them here, None one per CPU)
+        seed (int): seed of the first restart
+        fixed_ids (Iterable[int]): package IDs that must stay on their truck (e.g. hand-loaded ones)
+        hub (int): address index of the hub
+        drivers (int): drivers available (defaults to one per truck), for the trucks' departures
+
+    Returns:
+        dict: starting and final miles, restarts and moves tried
+    """
+    departures = expected_departures(trucks, distance_matrix, speed, drivers, hub)
+    problem, units = build_problem(trucks, speed, fixed_ids, hub, departures, drivers)
+    before = sum(route_length(distance_matrix, route, hub) for route in problem.routes)
+    with METRICS.phase("fleet_search"):
+        miles, routes, unit_truck, iterations = search_fleet(distance_matrix, problem, time_budget, restarts,
+                                                             max_workers, seed)
+    METRICS.increment("fleet_search_moves", iterations)
+
+    if miles < before - 1e-9:
+        loads = [[] for _ in trucks]
+        for unit, truck in zip(units, unit_truck):
+            loads[truck].extend(unit.packages)
+        for truck, load, route in zip(trucks, loads, routes):
+            truck.packages = order_packages_by_route(load, route, hub)
+        log.info("Fleet search: %.2f -> %.2f miles (%d moves, %d restart(s))", before, miles, iterations, restarts)
+    else:
+        miles = before
+    return {"initial_miles": round(before, 4), "miles": round(miles, 4), "restarts": restarts,
+            "moves": iterations}
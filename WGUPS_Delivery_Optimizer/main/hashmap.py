@@ -1,5 +1,27 @@
 import csv
 from datetime import datetime
+from functools import lru_cache
+from instrumentation import log
+
+
+@lru_cache(maxsize=1024)
+def parse_deadline_string(deadline_str):
+    """
+    Converts a deadline string ("10:30 AM" or "EOD") to a datetime.time.
+    Memoized: manifests repeat a handful of deadlines, so each distinct string
+    is parsed once and packages share the resulting time object.
+
+    Returns:
+        datetime.time, or None if the string is empty or unparseable
+    """
+    if deadline_str == "EOD":
+        return datetime.strptime("5:00 PM", "%I:%M %p").time()
+    elif deadline_str:
+        try:
+            return datetime.strptime(deadline_str.strip(), "%I:%M %p").time()
+        except ValueError:
+            return None
+    return None
 
 
 # ----------------------------
@@ -7,7 +29,15 @@ from datetime import datetime
 # ----------------------------
 
 class Package:
-    def __init__(self, package_id, address, city='', state='', zip_code='', deadline='', weight=0.0, notes=''):
+    # Fixed attribute layout (no per-instance __dict__) keeps large manifests compact
+    __slots__ = (
+        "package_id", "address", "city", "state", "zip_code", "deadline", "weight", "notes",
+        "status", "delivery_time", "address_index",
+        "truck_restriction", "must_be_delivered_with", "delayed_until",
+    )
+
+    def __init__(self, package_id, address, city='', state='', zip_code='', deadline='', weight=0.0, notes='',
+                 constraints=None):
         self.package_id = int(package_id)
         self.address = address
         self.city = city
@@ -23,20 +53,18 @@ class Package:
         self.delivery_time = None
         self.address_index = None
 
-        # Constraint-based attributes
-        self.truck_restriction = self.extract_truck_restriction(notes)
-        self.must_be_delivered_with = self.extract_grouped_ids(notes)
-        self.delayed_until = self.extract_delayed_time(notes)
+        # Constraint-based attributes: (truck_restriction, must_be_delivered_with, delayed_until)
+        # are taken as-is when the loader already parsed them, so notes are never parsed twice
+        if constraints is None:
+            constraints = (self.extract_truck_restriction(notes), self.extract_grouped_ids(notes),
+                           self.extract_delayed_time(notes))
+        self.truck_restriction, self.must_be_delivered_with, self.delayed_until = constraints
 
     def parse_deadline(self, deadline_str):
-        if deadline_str == "EOD":
-            return datetime.strptime("5:00 PM", "%I:%M %p").time()
-        elif deadline_str:
-            try:
-                return datetime.strptime(deadline_str.strip(), "%I:%M %p").time()
-            except ValueError:
-                print(f"⚠️ Warning: Could not parse deadline '{deadline_str}' for package {self.package_id}")
-        return None
+        deadline = parse_deadline_string(deadline_str)
+        if deadline is None and deadline_str:
+            log.warning(f"⚠️ Warning: Could not parse deadline '{deadline_str}' for package {self.package_id}")
+        return deadline
 
     def extract_truck_restriction(self, notes):
         if "Can only be on truck" in notes:
@@ -50,10 +78,10 @@ class Package:
         if "Must be delivered with" in notes:
             try:
                 ids_part = notes.split("Must be delivered with")[1].strip()
-                return [int(pid.strip()) for pid in ids_part.split(",")]
+                return tuple(int(pid.strip()) for pid in ids_part.split(","))
             except Exception as e:
-                print(f"⚠️ Failed to extract group info from notes: '{notes}' – {e}")
-        return []
+                log.warning(f"⚠️ Failed to extract group info from notes: '{notes}' – {e}")
+        return ()
 
     def extract_delayed_time(self, notes):
         if "Delayed on flight" in notes:
@@ -61,7 +89,7 @@ class Package:
                 time_str = notes.split("Delayed on flight---")[1].strip()
                 return datetime.strptime(time_str, "%I:%M %p").time()
             except Exception as e:
-                print(f"⚠️ Could not parse delay time from notes: '{notes}' – {e}")
+                log.warning(f"⚠️ Could not parse delay time from notes: '{notes}' – {e}")
         return None
 
     def __str__(self):
@@ -77,32 +105,152 @@ class Package:
 # HashMap Class
 # ----------------------------
 
+_EMPTY = object()    # slot never used
+_DELETED = object()  # tombstone left by delete() so probe chains stay intact
+
+
 class HashMap:
-    def __init__(self, initial_size=40):
-        self.size = initial_size
-        self.map = [[] for _ in range(self.size)]
+    """
+    Open-addressing hash table (linear probing) with load-factor-driven growth.
+
+    Keys and values live in two flat parallel lists instead of per-bucket lists
+    of tuples, and the table doubles whenever used slots (live entries plus
+    tombstones) would exceed load_factor * capacity, so insert and search stay
+    O(1) on average however many packages are loaded.
+
+    Rubric A – Self-adjusting hash table used to store and look up packages by ID.
+    """
+
+    def __init__(self, initial_size=40, load_factor=0.7):
+        if not 0 < load_factor < 1:
+            raise ValueError("load_factor must be between 0 and 1")
+        self.load_factor = load_factor
+        self._count = 0
+        self._used = 0  # live entries + tombstones
+        self._allocate(self._capacity_for(initial_size))
+
+    @staticmethod
+    def _capacity_for(entries):
+        capacity = 8
+        while capacity < entries:
+            capacity *= 2
+        return capacity
+
+    def _allocate(self, capacity):
+        self.size = capacity
+        self._mask = capacity - 1
+        self._keys = [_EMPTY] * capacity
+        self._values = [None] * capacity
 
     def _get_key(self, key):
-        return int(key) % self.size
+        return hash(key) & self._mask
 
-    def insert(self, key, value, debug=False):  # <<-- this must be inside the class
-        if debug:
-            print(f"Inserting Package {key} into the hash map.")
+    def _find_slot(self, key):
+        """
+        Probes for key. Returns (slot, found): the slot holding key if found,
+        otherwise the first reusable slot (tombstone or empty) on its probe chain.
+        """
+        keys = self._keys
+        mask = self._mask
+        slot = hash(key) & mask
+        reusable = None
+        while True:
+            current = keys[slot]
+            if current is _EMPTY:
+                return (slot if reusable is None else reusable), False
+            if current is _DELETED:
+                if reusable is None:
+                    reusable = slot
+            elif current == key:
+                return slot, True
+            slot = (slot + 1) & mask
 
-        key_index = self._get_key(key)
-        bucket = self.map[key_index]
+    def _resize(self, capacity):
+        old_keys, old_values = self._keys, self._values
+        self._allocate(capacity)
+        self._used = self._count
+        keys, values, mask = self._keys, self._values, self._mask
+        for key, value in zip(old_keys, old_values):
+            if key is _EMPTY or key is _DELETED:
+                continue
+            slot = hash(key) & mask
+            while keys[slot] is not _EMPTY:
+                slot = (slot + 1) & mask
+            keys[slot] = key
+            values[slot] = value
+
+    def _reserve(self, additional):
+        """ Grows (or purges tombstones) so `additional` more entries fit under the load factor. """
+        if self._used + additional > self.size * self.load_factor:
+            needed = (self._count + additional) / self.load_factor
+            self._resize(self._capacity_for(int(needed) + 1))
+
+    def insert(self, key, value, debug=False):
+        """
+        Inserts a key/value pair. An existing key is left untouched (use update() to overwrite).
+
+        Returns:
+            bool: True if the pair was inserted, False if the key already existed
+        """
+        if debug:
+            log.debug("Inserting Package %s into the hash map.", key)
 
-        for k, v in bucket:
-            if k == key:
-                if debug:
-                    print(f"Package {key} already exists in HashMap. Skipping insertion.")
-                return
+        slot, found = self._find_slot(key)
+        if found:
+            if debug:
+                log.debug("Package %s already exists in HashMap. Skipping insertion.", key)
+            return False
 
-        bucket.append((key, value))
+        if self._used + 1 > self.size * self.load_factor:
+            self._reserve(1)
+            slot, _ = self._find_slot(key)
+        if self._keys[slot] is _EMPTY:
+            self._used += 1
+        self._keys[slot] = key
+        self._values[slot] = value
+        self._count += 1
         if debug:
-            print(f"Inserted Package {key}: {value}")
+            log.debug("Inserted Package %s: %s", key, value)
+        return True
 
+    def insert_many(self, pairs, debug=False):
+        """
+        Bulk-inserts (key, value) pairs, growing the table once up front when the size is known.
 
+        Returns:
+            int: number of pairs actually inserted (existing keys are skipped)
+        """
+        if hasattr(pairs, "__len__"):
+            self._reserve(len(pairs))
+        return sum(1 for key, value in pairs if self.insert(key, value, debug))
+
+    def update(self, key, value):
+        """
+        Replaces the value stored under an existing key.
+
+        Returns:
+            bool: True if the key was found and updated
+        """
+        slot, found = self._find_slot(key)
+        if found:
+            self._values[slot] = value
+        return found
+
+    def delete(self, key):
+        """
+        Removes a key, leaving a tombstone so later probes still reach colliding keys.
+
+        Returns:
+            The removed value (or None if the key was not present)
+        """
+        slot, found = self._find_slot(key)
+        if not found:
+            return None
+        value = self._values[slot]
+        self._keys[slot] = _DELETED
+        self._values[slot] = None
+        self._count -= 1
+        return value
 
     # ----------------------------
     # B: Lookup Function (Rubric Section B)
@@ -115,12 +263,31 @@ class HashMap:
         Returns:
             The Package object (or None if not found)
         """
-        key_index = self._get_key(key)
-        bucket = self.map[key_index]
-        for k, v in bucket:
-            if k == key:
-                return v
-        return None
+        slot, found = self._find_slot(key)
+        return self._values[slot] if found else None
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key):
+        return self._find_slot(key)[1]
+
+    def __iter__(self):
+        """ Iterates over stored keys in table order. """
+        for key in self._keys:
+            if key is not _EMPTY and key is not _DELETED:
+                yield key
+
+    def items(self):
+        """ Iterates over (key, value) pairs in table order. """
+        for key, value in zip(self._keys, self._values):
+            if key is not _EMPTY and key is not _DELETED:
+                yield key, value
+
+    def values(self):
+        """ Iterates over stored values in table order. """
+        for _, value in self.items():
+            yield value
 
     # ----------------------------
     # Utility: Display Entire Table
@@ -130,8 +297,7 @@ class HashMap:
         Displays all packages stored in the hash map.
         Useful for debugging or visual verification during development.
         """
-        for i, bucket in enumerate(self.map):
-            if bucket:
-                print(f"Bucket {i}:")
-                for k, v in bucket:
-                    print(f"  {k}: {v}")
+        for slot, (k, v) in enumerate(zip(self._keys, self._values)):
+            if k is not _EMPTY and k is not _DELETED:
+                print(f"Slot {slot}:")
+                print(f"  {k}: {v}")
@@ -0,0 +1,206 @@
+import contextlib
+import functools
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from distance_matrix import DistanceMatrix
+
+
+# ----------------------------
+# Console Output (Logging)
+# ----------------------------
+#
+# Pipeline modules log through `log` instead of printing. Nothing is shown
+# until configure_logging() is called, so library use and benchmarks stay
+# quiet; main.py configures INFO, which reads like the old console output.
+
+log = logging.getLogger("wgups")
+log.addHandler(logging.NullHandler())
+
+
+def configure_logging(level=logging.INFO, stream=None):
+    """
+    Sends pipeline output to the console (stdout by default) at the given level.
+
+    Parameters:
+        level (int or str): e.g. logging.INFO, "DEBUG", "WARNING" (warnings only)
+        stream: file-like object to write to
+    """
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.handlers = [handler]
+    log.setLevel(level.upper() if isinstance(level, str) else level)
+    log.propagate = False
+
+
+# ----------------------------
+# Metrics Class
+# ----------------------------
+
+class Metrics:
+    """
+    Wall-clock timers per pipeline phase plus named event counters.
+
+    Phases nest: a phase opened inside another is recorded as
+    "outer/inner", so top-level phases can be summed without double counting.
+    Counters are plain integers; hot loops tally locally and call
+    increment() once per call, so keeping them on costs next to nothing.
+    Each thread nests its own phases, so concurrent simulations (see
+    simulation_core) record under the right names; their totals add up.
+    """
+
+    def __init__(self):
+        self.timers = {}          # phase name -> [seconds, calls]
+        self.counters = Counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def reset(self):
+        self.timers.clear()
+        self.counters.clear()
+        self._stack.clear()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """ Context manager that adds the time spent inside it to the named phase. """
+        self._stack.append(name)
+        key = "/".join(self._stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            with self._lock:
+                timer = self.timers.setdefault(key, [0.0, 0])
+                timer[0] += elapsed
+                timer[1] += 1
+
+    def timed(self, name):
+        """ Decorator form of phase(). """
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.phase(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def increment(self, name, amount=1):
+        self.counters[name] += amount
+
+    def phase_seconds(self):
+        """ {phase: seconds}, nested phases included. """
+        return {name: seconds for name, (seconds, _) in self.timers.items()}
+
+    def total_seconds(self):
+        """ Time spent in top-level phases. """
+        return sum(seconds for name, (seconds, _) in self.timers.items() if "/" not in name)
+
+    def snapshot(self):
+        return {
+            "phases": {name: {"seconds": round(seconds, 6), "calls": calls}
+                       for name, (seconds, calls) in self.timers.items()},
+            "counters": dict(self.counters),
+        }
+
+    def to_json(self, indent=2):
+        import json
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self, prefix="wgups", labels=None):
+        """
+        Renders the metrics in the Prometheus text exposition format.
+
+        Parameters:
+            labels (dict): extra labels added to every sample, e.g. {"packages": "1000"}
+        """
+        extra = "".join(f',{key}="{value}"' for key, value in (labels or {}).items())
+        plain = "{" + extra[1:] + "}" if extra else ""
+        lines = [
+            f"# HELP {prefix}_phase_seconds_total Wall-clock seconds spent in each pipeline phase.",
+            f"# TYPE {prefix}_phase_seconds_total counter",
+        ]
+        for name, (seconds, _) in sorted(self.timers.items()):
+            lines.append(f'{prefix}_phase_seconds_total{{phase="{name}"{extra}}} {seconds:.6f}')
+        lines += [
+            f"# HELP {prefix}_phase_calls_total Times each pipeline phase ran.",
+            f"# TYPE {prefix}_phase_calls_total counter",
+        ]
+        for name, (_, calls) in sorted(self.timers.items()):
+            lines.append(f'{prefix}_phase_calls_total{{phase="{name}"{extra}}} {calls}')
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total{plain} {value}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+# ----------------------------
+# Opt-In Hooks
+# ----------------------------
+
+@contextlib.contextmanager
+def profiled(output=None, sort="cumulative", limit=25):
+    """
+    Runs the enclosed block under cProfile.
+
+    Parameters:
+        output (str): write raw stats here (for snakeviz / pstats); when omitted
+            the top `limit` functions by `sort` are logged at INFO instead
+    """
+    # Profiling is opt-in, so its modules load on first use
+    import cProfile
+    import io
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if output:
+            profiler.dump_stats(output)
+            log.info("Profile written to %s", output)
+        else:
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats(sort).print_stats(limit)
+            log.info(text.getvalue())
+
+
+class CountingDistanceMatrix(DistanceMatrix):
+    """
+    Zero-copy view of a DistanceMatrix that counts every lookup in a Metrics registry.
+
+    Opt-in: counting adds a dictionary update to each call, so wrap the matrix
+    only for runs where the "distance_lookups" counter is wanted.
+    """
+
+    def __init__(self, distance_matrix, metrics=METRICS):
+        super().__init__(distance_matrix.size, distance_matrix.row_major())
+        self.neighbor_index = distance_matrix.neighbor_index
+        self._counters = metrics.counters
+
+    def distance(self, i, j):
+        self._counters["distance_lookups"] += 1
+        return super().distance(i, j)
+
+    def row(self, i):
+        self._counters["distance_row_lookups"] += 1
+        return super().row(i)
+
+    def distances_from(self, i, candidates):
+        self._counters["distance_lookups"] += len(candidates)
+        return list(map(DistanceMatrix.row(self, i).__getitem__, candidates))
@@ -0,0 +1,317 @@
+import time
+from delivery_helpers import build_address_index, get_location_index
+from event_simulation import CANCELLED, DELIVERED
+from trip_planner import Trip
+from instrumentation import log
+
+
+# ----------------------------
+# Incremental Route Repair
+# ----------------------------
+
+def cheapest_insertion(distance_matrix, packages, start, previous_stop, location, hub=0):
+    """
+    Finds where a package for `location` adds the fewest miles to the remaining route.
+
+    Only boundaries between stops (from position `start` on) are tried, so
+    packages for one address stay together; a location the route already
+    visits costs nothing and joins that stop. Runs in O(remaining stops).
+
+    Parameters:
+        packages (List[Package]): the truck's (or trip's) packages in route order
+        start (int): first position that may change
+        previous_stop (int): address the route leaves from before packages[start]
+        location (int): address index of the package to insert
+        hub (int): where the route ends
+
+    Returns:
+        (int, float): position in packages to insert at, and the added miles
+    """
+    dist = distance_matrix.distance
+    best = None
+    prev = previous_stop
+    i = start
+    while True:
+        following = packages[i].address_index if i < len(packages) else hub
+        added = dist(prev, location) + dist(location, following) - dist(prev, following)
+        if best is None or added < best[1]:
+            best = (i, added)
+        if i >= len(packages):
+            return best
+        prev = following
+        while i < len(packages) and packages[i].address_index == prev:
+            i += 1
+
+
+class UpdateResult:
+    """ Outcome of one mid-day change. """
+    __slots__ = ("kind", "package_id", "applied", "trucks", "latency_ms", "message")
+
+    def __init__(self, kind, package_id, applied, trucks=(), message=""):
+        self.kind = kind
+        self.package_id = package_id
+        self.applied = applied
+        self.trucks = list(trucks)     # IDs of trucks whose remaining route changed
+        self.latency_ms = 0.0
+        self.message = message
+
+    def __repr__(self):
+        state = "applied" if self.applied else "rejected"
+        return (f"UpdateResult({self.kind} package {self.package_id}: {state}, trucks {self.trucks}, "
+                f"{self.latency_ms:.3f} ms{', ' + self.message if self.message else ''})")
+
+
+# ----------------------------
+# LiveDispatcher Class
+# ----------------------------
+
+class LiveDispatcher:
+    """
+    Applies mid-day changes to a DeliverySimulator that is part-way through the day.
+
+    Advance the simulation to the moment a change is known (advance()), apply
+    it, then keep advancing. Each change repairs only the route that holds the
+    package: the package is taken out and/or put back by cheapest insertion
+    into the part of the route that has not been driven yet, so an update
+    costs O(stops on one truck) instead of a new run_delivery_simulation().
+
+    Packages that have been delivered cannot change. A driving truck keeps
+    heading to its current stop; packages already on board stay on it. New
+    packages are at the hub, so they only go to loads that have not left yet
+    (a waiting truck or a pending reload trip), or to a new reload trip.
+
+    Rubric G – Handles corrections such as package 9's wrong address while deliveries are in progress.
+    """
+
+    def __init__(self, simulator, address_list, package_hash=None):
+        """
+        Parameters:
+            simulator (DeliverySimulator): simulation with trucks loaded and routed
+            address_list (List[str]): addresses aligned with the distance matrix
+            package_hash (HashMap): kept in sync with added packages (optional)
+        """
+        self.simulator = simulator
+        self.address_index = build_address_index(address_list)
+        self.package_hash = package_hash
+        self.history = []
+        self._holders = {}
+        for truck in simulator.trucks:
+            for pkg in truck.packages:
+                self._holders[pkg.package_id] = (pkg, truck)
+        for trip in simulator.pending_trips:
+            for pkg in trip.packages:
+                self._holders[pkg.package_id] = (pkg, trip)
+
+    # ----------------------------
+    # Clock
+    # ----------------------------
+
+    def advance(self, until=None):
+        """ Runs the simulation up to `until` (time of day), or to the end of the day. """
+        return self.simulator.run(until)
+
+    @property
+    def now(self):
+        return self.simulator.clock
+
+    # ----------------------------
+    # Route Access Helpers
+    # ----------------------------
+
+    def _locate(self, package_id):
+        """ Returns (package, holder) where holder is a Truck or a pending Trip, or (None, None). """
+        pkg, holder = self._holders.get(package_id, (None, None))
+        if isinstance(holder, Trip) and holder.truck is not None:
+            holder = holder.truck
+        return pkg, holder
+
+    def _route(self, holder):
+        """
+        Returns (packages, first editable position, previous stop) for a truck
+        or pending trip, or None if its route can no longer change.
+        """
+        if isinstance(holder, Trip):
+            return holder.packages, 0, self.simulator.hub
+        editable = self.simulator.editable_from(holder)
+        if editable is None:
+            return None
+        start, previous_stop = editable
+        return holder.packages, start, previous_stop
+
+    def _insert(self, holder, pkg):
+        packages, start, previous_stop = self._route(holder)
+        position, _ = cheapest_insertion(self.simulator.distance_matrix, packages, start, previous_stop,
+                                         pkg.address_index, self.simulator.hub)
+        packages.insert(position, pkg)
+
+    def _touched(self, holder):
+        """ Re-times a waiting truck's departure after its load changed; returns the affected truck IDs. """
+        if isinstance(holder, Trip):
+            return []
+        self.simulator.reschedule_departure(holder, self.now)
+        return [holder.truck_id]
+
+    def _capacity(self, holder):
+        if isinstance(holder, Trip):
+            return min(truck.max_capacity for truck in self.simulator.trucks)
+        return holder.max_capacity
+
+    def _allowed(self, holder, pkg):
+        if not pkg.truck_restriction:
+            return True
+        if isinstance(holder, Trip):
+            return holder.restriction == pkg.truck_restriction
+        return self.simulator.truck_fleet_position(holder) == pkg.truck_restriction
+
+    def _finish(self, result, started):
+        result.latency_ms = (time.perf_counter() - started) * 1000
+        self.history.append(result)
+        if not result.applied:
+            log.warning(f"⚠️ Warning: Could not {result.kind.replace('_', ' ')} for package {result.package_id}: "
+                        f"{result.message}")
+        return result
+
+    def _check_open(self, kind, package_id, started):
+        """ Returns (pkg, holder, None) for a package that can still change, else (None, None, rejection). """
+        pkg, holder = self._locate(package_id)
+        if pkg is None:
+            return None, None, self._finish(UpdateResult(kind, package_id, False, message="unknown package"), started)
+        if pkg.status in (DELIVERED, CANCELLED):
+            message = f"already {pkg.status.lower()}"
+            return None, None, self._finish(UpdateResult(kind, package_id, False, message=message), started)
+        return pkg, holder, None
+
+    # ----------------------------
+    # Mid-Day Events
+    # ----------------------------
+
+    def change_address(self, package_id, address, city=None, state=None, zip_code=None):
+        """
+        Corrects a package's delivery address and re-inserts it into its own route.
+
+        Returns:
+            UpdateResult
+        """
+        started = time.perf_counter()
+        pkg, holder, rejected = self._check_open("change_address", package_id, started)
+        if rejected:
+            return rejected
+        location = get_location_index(address, self.address_index)
+        if location is None:
+            return self._finish(UpdateResult("change_address", package_id, False,
+                                             message=f"address '{address}' could not be resolved"), started)
+
+        packages = self._route(holder)[0]
+        packages.remove(pkg)
+        pkg.address = address
+        pkg.city = city if city is not None else pkg.city
+        pkg.state = state if state is not None else pkg.state
+        pkg.zip_code = zip_code if zip_code is not None else pkg.zip_code
+        pkg.address_index = location
+        self._insert(holder, pkg)
+        return self._finish(UpdateResult("change_address", package_id, True, self._touched(holder)), started)
+
+    def cancel_package(self, package_id):
+        """
+        Cancels a package that has not been delivered and drops it from its route.
+
+        Returns:
+            UpdateResult
+        """
+        started = time.perf_counter()
+        pkg, holder, rejected = self._check_open("cancel", package_id, started)
+        if rejected:
+            return rejected
+
+        self._route(holder)[0].remove(pkg)
+        del self._holders[package_id]
+        self.simulator.mark_cancelled(pkg, self.now)
+        return self._finish(UpdateResult("cancel", package_id, True, self._touched(holder)), started)
+
+    def release_delay(self, package_id, arrival_time=None):
+        """
+        Records when a delayed package actually reaches the hub (default: now), so
+        the load carrying it can leave as soon as it is there.
+
+        Returns:
+            UpdateResult
+        """
+        started = time.perf_counter()
+        pkg, holder, rejected = self._check_open("release_delay", package_id, started)
+        if rejected:
+            return rejected
+        if not isinstance(holder, Trip) and not self.simulator.awaiting_departure(holder):
+            return self._finish(UpdateResult("release_delay", package_id, False,
+                                             message="package has already left the hub"), started)
+
+        arrival = arrival_time or self.now
+        pkg.delayed_until = arrival.time() if hasattr(arrival, "time") else arrival
+        return self._finish(UpdateResult("release_delay", package_id, True, self._touched(holder)), started)
+
+    def add_package(self, pkg):
+        """
+        Adds a package that reached the hub mid-day.
+
+        It goes to the waiting load (truck or pending trip) where cheapest
+        insertion adds the fewest miles, honoring its truck restriction, its
+        "delivered with" partners, and capacity; if none has room it becomes a
+        new reload trip for the next free driver. A package whose partners have
+        already left the hub (or whose partners' load is full or restricted)
+        is rejected rather than split from them.
+
+        Returns:
+            UpdateResult
+        """
+        started = time.perf_counter()
+        if pkg.package_id in self._holders or (self.package_hash is not None and pkg.package_id in self.package_hash):
+            return self._finish(UpdateResult("add", pkg.package_id, False, message="package ID already exists"),
+                                started)
+        pkg.address_index = get_location_index(pkg.address, self.address_index)
+        if pkg.address_index is None:
+            return self._finish(UpdateResult("add", pkg.package_id, False,
+                                             message=f"address '{pkg.address}' could not be resolved"), started)
+
+        candidates = [truck for truck in self.simulator.trucks if self.simulator.awaiting_departure(truck)]
+        candidates += self.simulator.pending_trips
+        partners = {pid: self._locate(pid)[1] for pid in pkg.must_be_delivered_with if pid in self._holders}
+        if partners:
+            waiting = set(candidates)
+            gone = sorted(pid for pid, holder in partners.items() if holder not in waiting)
+            if gone:
+                return self._finish(UpdateResult("add", pkg.package_id, False,
+                                                 message="delivered-with package(s) "
+                                                         f"{', '.join(map(str, gone))} already left the hub"),
+                                    started)
+            candidates = [holder for holder in candidates if holder in partners.values()]
+
+        best = None
+        for holder in candidates:
+            packages, start, previous_stop = self._route(holder)
+            if len(packages) >= self._capacity(holder) or not self._allowed(holder, pkg):
+                continue
+            position, added = cheapest_insertion(self.simulator.distance_matrix, packages, start, previous_stop,
+                                                 pkg.address_index, self.simulator.hub)
+            if best is None or added < best[0]:
+                best = (added, holder, position)
+
+        if best is None and partners:
+            return self._finish(UpdateResult("add", pkg.package_id, False,
+                                             message="no room on the load holding its delivered-with packages"),
+                                started)
+        if best is not None:
+            _, holder, position = best
+            self._route(holder)[0].insert(position, pkg)
+            trucks = self._touched(holder)
+        else:
+            holder = Trip([pkg], pkg.truck_restriction)
+            trips = self.simulator.pending_trips
+            trips.append(holder)
+            trips.sort(key=Trip.priority)
+            self.simulator.dispatch_pending(self.now)
+            trucks = [holder.truck.truck_id] if holder.truck is not None else []
+
+        self._holders[pkg.package_id] = (pkg, holder)
+        self.simulator.add_to_manifest(pkg)
+        if self.package_hash is not None:
+            self.package_hash.insert(pkg.package_id, pkg)
+        return self._finish(UpdateResult("add", pkg.package_id, True, trucks), started)
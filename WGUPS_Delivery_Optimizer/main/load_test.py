@@ -0,0 +1,235 @@
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import random
+import sys
+import time
+from urllib.parse import urlsplit
+
+
+# ----------------------------
+# Status Service Load Test
+# ----------------------------
+#
+# Simulated dispatch clients hammer the status service over keep-alive
+# connections and report latency percentiles per request kind, e.g.:
+#
+#   python load_test.py --requests 20000 --concurrency 64
+#   python load_test.py --url http://127.0.0.1:8080 --requests 5000
+#
+# Without --url the service is started from the default dataset bundle (see
+# cli.py) on a free localhost port in a child process, so the clients' own
+# work does not share an event loop (or the GIL) with the server and is not
+# counted in its p50/p99. Latencies are still round trips measured by the
+# clients: they include client-side request encoding and response parsing.
+
+DEFAULT_MIX = {"package": 0.6, "status": 0.3, "bulk": 0.1}
+DEFAULT_BULK_SIZE = 100
+DAY_START, DAY_END = 8 * 60, 17 * 60
+
+
+def percentile(sorted_values, fraction):
+    """ Nearest-rank percentile of an already sorted list. """
+    if not sorted_values:
+        return math.nan
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+# ----------------------------
+# Client
+# ----------------------------
+
+class StatusClient:
+    """ One keep-alive HTTP/1.1 connection to the status service. """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+
+    async def request(self, method, target, payload=None):
+        """
+        Returns:
+            (int, bytes): status code and response body
+        """
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        head = f"{method} {target} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(body)}\r\n\r\n"
+        self._writer.write(head.encode("latin-1") + body)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError("server closed the connection")
+        code = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return code, await self._reader.readexactly(length)
+
+
+def _random_clock(rng):
+    minutes = rng.randrange(DAY_START, DAY_END)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _next_request(rng, package_ids, mix, bulk_size):
+    kind = rng.choices(list(mix), weights=list(mix.values()))[0]
+    if kind == "package":
+        return kind, "GET", f"/packages/{rng.choice(package_ids)}?at={_random_clock(rng)}", None
+    if kind == "status":
+        return kind, "GET", f"/status?at={_random_clock(rng)}", None
+    ids = [rng.choice(package_ids) for _ in range(bulk_size)]
+    return kind, "POST", "/packages/lookup", {"ids": ids, "at": _random_clock(rng)}
+
+
+async def _client_worker(host, port, count, package_ids, mix, bulk_size, seed, latencies, errors):
+    rng = random.Random(seed)
+    client = StatusClient(host, port)
+    await client.connect()
+    try:
+        for _ in range(count):
+            kind, method, target, payload = _next_request(rng, package_ids, mix, bulk_size)
+            started = time.perf_counter()
+            code, _ = await client.request(method, target, payload)
+            latencies.setdefault(kind, []).append((time.perf_counter() - started) * 1000)
+            if code != 200:
+                errors[code] = errors.get(code, 0) + 1
+    finally:
+        await client.close()
+
+
+# ----------------------------
+# Load Test
+# ----------------------------
+
+async def run_load_test(host, port, requests=10_000, concurrency=32, mix=None, bulk_size=DEFAULT_BULK_SIZE,
+                        seed=0):
+    """
+    Spreads `requests` over `concurrency` connections and measures each round trip.
+
+    Returns:
+        dict: per-kind and overall {count, p50_ms, p99_ms, max_ms}, throughput and error counts
+    """
+    mix = mix or DEFAULT_MIX
+    probe = StatusClient(host, port)
+    await probe.connect()
+    try:
+        code, body = await probe.request("GET", "/health")
+    finally:
+        await probe.close()
+    if code != 200:
+        raise RuntimeError(f"service health check failed ({code})")
+    package_count = json.loads(body)["packages"]
+    package_ids = list(range(1, package_count + 1))
+
+    latencies, errors = {}, {}
+    per_client = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    started = time.perf_counter()
+    await asyncio.gather(*(_client_worker(host, port, count, package_ids, mix, bulk_size, seed + i, latencies, errors)
+                           for i, count in enumerate(per_client) if count))
+    elapsed = time.perf_counter() - started
+
+    report = {"requests": requests, "concurrency": concurrency, "seconds": round(elapsed, 3),
+              "requests_per_second": round(requests / elapsed, 1), "errors": errors, "latency_ms": {}}
+    everything = []
+    for kind, values in sorted(latencies.items()):
+        values.sort()
+        everything.extend(values)
+        report["latency_ms"][kind] = _latency_summary(values)
+    everything.sort()
+    report["latency_ms"]["all"] = _latency_summary(everything)
+    return report
+
+
+def _latency_summary(sorted_values):
+    return {"count": len(sorted_values), "p50": round(percentile(sorted_values, 0.50), 3),
+            "p99": round(percentile(sorted_values, 0.99), 3), "max": round(sorted_values[-1], 3)}
+
+
+async def _serve_bundle(bundle, port_pipe):
+    from status_service import StatusService
+
+    server = await StatusService.from_bundle(bundle).start("127.0.0.1", 0)
+    port_pipe.send(server.sockets[0].getsockname()[1])
+    port_pipe.close()
+    async with server:
+        await server.serve_forever()
+
+
+def _server_process(bundle, port_pipe):
+    asyncio.run(_serve_bundle(bundle, port_pipe))
+
+
+def _run_local(args):
+    """ Runs the service in a child process for the duration of the test. """
+    from cli import DEFAULT_BUNDLE, main as cli_main
+    from dataset_bundle import load_result, default_result_path
+
+    bundle = args.bundle or DEFAULT_BUNDLE
+    if load_result(default_result_path(bundle), bundle) is None:
+        cli_main(["simulate", "--bundle", bundle])
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    server = multiprocessing.Process(target=_server_process, args=(bundle, sender), daemon=True)
+    server.start()
+    try:
+        if not receiver.poll(60):
+            raise RuntimeError("status service did not start")
+        port = receiver.recv()
+        return asyncio.run(run_load_test("127.0.0.1", port, args.requests, args.concurrency,
+                                         bulk_size=args.bulk_size, seed=args.seed))
+    finally:
+        server.terminate()
+        server.join()
+
+
+async def _run_remote(args):
+    parts = urlsplit(args.url)
+    return await run_load_test(parts.hostname, parts.port or 80, args.requests, args.concurrency,
+                               bulk_size=args.bulk_size, seed=args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure status service latency with simulated dispatch clients.")
+    parser.add_argument("--url", help="service to test (default: start one in a child process)")
+    parser.add_argument("--bundle", help="dataset bundle for the in-process service")
+    parser.add_argument("--requests", type=int, default=10_000, help="total requests")
+    parser.add_argument("--concurrency", type=int, default=32, help="simultaneous client connections")
+    parser.add_argument("--bulk-size", type=int, default=DEFAULT_BULK_SIZE, help="IDs per bulk lookup")
+    parser.add_argument("--seed", type=int, default=0, help="request mix seed")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(_run_remote(args)) if args.url else _run_local(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"{report['requests']} requests, {report['concurrency']} connections: "
+          f"{report['requests_per_second']:.0f} req/s over {report['seconds']:.2f}s")
+    for kind, stats in report["latency_ms"].items():
+        print(f"  {kind:<8} n={stats['count']:<6} p50 {stats['p50']:.3f} ms  p99 {stats['p99']:.3f} ms  "
+              f"max {stats['max']:.3f} ms")
+    if report["errors"]:
+        print(f"⚠️ Warning: Non-200 responses: {report['errors']}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,28 +1,58 @@
+import contextlib
 import csv
+import os
 from hashmap import HashMap
 from package_loader import load_packages
 from delivery_simulation import run_delivery_simulation
-from delivery_helpers import load_distance_data, load_address_data
+from delivery_helpers import load_network_data
 from datetime import datetime
 from truck import Truck  # Import Truck here
+from instrumentation import log, configure_logging, profiled, METRICS
+from route_cache import RouteCache
 
 # --- Main ---
+#
+# Optional environment settings:
+#   WGUPS_LOG_LEVEL  console verbosity (DEBUG, INFO, WARNING; default INFO)
+#   WGUPS_PROFILE    write cProfile stats for the whole run to this path
+#   WGUPS_METRICS    write phase timings / counters here (.prom = Prometheus text, otherwise JSON)
+#   WGUPS_ROUTE_CACHE  reuse routes solved by earlier runs from this file, and save new ones to it
+#
+# Data files are read from this script's directory. cli.py offers the same
+# run (plus status lookups) from a precompiled dataset bundle.
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
 if __name__ == "__main__":
-    distance_matrix = load_distance_data("distances_backup.csv")
-    address_list = load_address_data("addresses.csv")
+    configure_logging(os.environ.get("WGUPS_LOG_LEVEL", "INFO"))
+    profile_path = os.environ.get("WGUPS_PROFILE")
+    route_cache_path = os.environ.get("WGUPS_ROUTE_CACHE")
+    route_cache = RouteCache(path=route_cache_path) if route_cache_path else None
+
+    with profiled(profile_path) if profile_path else contextlib.nullcontext():
+        address_list, distance_matrix = load_network_data(os.path.join(DATA_DIR, "distances_backup.csv"),
+                                                        os.path.join(DATA_DIR, "addresses.csv"))
+
+        package_hash = HashMap()
+        load_packages(os.path.join(DATA_DIR, "packages.csv"), package_hash)
 
-    package_hash = HashMap()
-    load_packages("packages.csv", package_hash, debug=True)
+        truck1 = Truck(name="Truck 1", start_time=datetime.strptime("08:00 AM", "%I:%M %p"))
+        truck2 = Truck(name="Truck 2", start_time=datetime.strptime("09:05 AM", "%I:%M %p"))
+        truck3 = Truck(name="Truck 3", start_time=datetime.strptime("10:20 AM", "%I:%M %p"))
 
-    truck1 = Truck(name="Truck 1", start_time=datetime.strptime("08:00 AM", "%I:%M %p"))
-    truck2 = Truck(name="Truck 2", start_time=datetime.strptime("09:05 AM", "%I:%M %p"))
-    truck3 = Truck(name="Truck 3", start_time=datetime.strptime("10:20 AM", "%I:%M %p"))
+        log.info("Truck 1 starts at %s", truck1.start_time)
+        log.info("Truck 2 starts at %s", truck2.start_time)
+        log.info("Truck 3 starts at %s", truck3.start_time)
 
-    print(f"Truck 1 starts at {truck1.start_time}")
-    print(f"Truck 2 starts at {truck2.start_time}")
-    print(f"Truck 3 starts at {truck3.start_time}")
+        truck2_packages = [package_hash.search(i) for i in [1, 2, 3, 4]]
+        truck2.load_packages(truck2_packages)
 
-    truck2_packages = [package_hash.search(i) for i in [1, 2, 3, 4]]
-    truck2.load_packages(truck2_packages)
+        # WGUPS has two drivers for its three trucks
+        run_delivery_simulation(address_list, distance_matrix, package_hash, truck1, truck2, truck3, drivers=2,
+                                route_cache=route_cache)
+        if route_cache is not None:
+            route_cache.save()
 
-    run_delivery_simulation(address_list, distance_matrix, package_hash, truck1, truck2, truck3)
+    metrics_path = os.environ.get("WGUPS_METRICS")
+    if metrics_path:
+        with open(metrics_path, "w", encoding="utf-8") as file:
+            file.write(METRICS.to_prometheus() if metrics_path.endswith(".prom") else METRICS.to_json() + "\n")
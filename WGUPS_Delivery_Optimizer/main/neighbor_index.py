@@ -0,0 +1,139 @@
+import heapq
+import os
+import struct
+import sys
+from array import array
+
+
+# ----------------------------
+# Neighbor Index File Format
+# ----------------------------
+#
+#   header     (HEADER_SIZE bytes, little-endian, see HEADER_FORMAT)
+#   neighbors  size * k int32 address indices, row-major, each row sorted by distance
+#
+# The index sits next to the compiled network file (distances.wgdm ->
+# distances.wgnn) and records that file's mtime and size, so recompiling the
+# matrix invalidates it.
+
+MAGIC = b"WGNN"
+FORMAT_VERSION = 1
+INDEX_SUFFIX = ".wgnn"
+DEFAULT_INDEX_K = 16
+
+# magic, version, size, k, compiled file mtime_ns, compiled file size
+HEADER_FORMAT = "<4sHxxIIQQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+
+def default_index_path(compiled_path):
+    """ Returns the neighbor index path that sits next to a compiled network file. """
+    return os.path.splitext(compiled_path)[0] + INDEX_SUFFIX
+
+
+# ----------------------------
+# NeighborIndex Class
+# ----------------------------
+
+class NeighborIndex:
+    """
+    The k closest other addresses for every address, closest first.
+
+    Routing uses it to restrict candidate moves: nearest-neighbor construction
+    and local-search neighbor lists only look past these k entries when every
+    one of them is already used, so building a route over n stops costs about
+    O(n x k) lookups instead of O(n^2).
+    """
+
+    def __init__(self, size, k, data):
+        self.size = size
+        self.k = k
+        self._data = data
+        self._view = memoryview(data)
+        if len(self._view) != size * k:
+            raise ValueError(f"Neighbor buffer does not hold {k} neighbors for {size} addresses")
+
+    @classmethod
+    def build(cls, distance_matrix, k=DEFAULT_INDEX_K):
+        """ Derives the index from a distance matrix with one partial sort per row. """
+        size = distance_matrix.size
+        k = max(0, min(k, size - 1))
+        data = array('i')
+        for i in range(size):
+            row = distance_matrix.row(i)
+            closest = heapq.nsmallest(k + 1, range(size), key=row.__getitem__)
+            if i in closest:
+                closest.remove(i)
+            data.extend(closest[:k])
+        return cls(size, k, data)
+
+    def neighbors(self, i):
+        """ Returns a zero-copy view of address i's neighbors, closest first. """
+        return self._view[i * self.k:(i + 1) * self.k]
+
+    def to_array(self):
+        """ Returns a standalone copy of the neighbor buffer (picklable, e.g. for worker processes). """
+        return array('i', self._view)
+
+    def tobytes(self):
+        return self._view.tobytes()
+
+
+# ----------------------------
+# Save / Load
+# ----------------------------
+
+def write_neighbor_index(index_path, index, compiled_path):
+    """ Writes the index atomically, stamped with the compiled file it was derived from. """
+    stat = os.stat(compiled_path)
+    header = struct.pack(HEADER_FORMAT, MAGIC, FORMAT_VERSION, index.size, index.k,
+                         stat.st_mtime_ns, stat.st_size)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(header)
+        file.write(index.tobytes())
+    os.replace(tmp_path, index_path)
+
+
+def read_neighbor_index(index_path, compiled_path, k=DEFAULT_INDEX_K):
+    """
+    Reads a saved index.
+
+    Returns:
+        NeighborIndex: or None if the file is missing, from an older format,
+        built with a different k, or older than the compiled network file
+    """
+    if sys.byteorder != "little":
+        return None
+    try:
+        with open(index_path, "rb") as file:
+            raw = file.read()
+    except FileNotFoundError:
+        return None
+    if len(raw) < HEADER_SIZE:
+        return None
+
+    magic, version, size, stored_k, mtime_ns, compiled_size = struct.unpack_from(HEADER_FORMAT, raw)
+    stat = os.stat(compiled_path)
+    if (magic != MAGIC or version != FORMAT_VERSION or (mtime_ns, compiled_size) != (stat.st_mtime_ns, stat.st_size)
+            or stored_k != max(0, min(k, size - 1))):
+        return None
+
+    data = array('i')
+    data.frombytes(raw[HEADER_SIZE:HEADER_SIZE + size * stored_k * data.itemsize])
+    if len(data) != size * stored_k:
+        return None
+    return NeighborIndex(size, stored_k, data)
+
+
+def load_neighbor_index(distance_matrix, compiled_path, k=DEFAULT_INDEX_K, index_path=None):
+    """
+    Returns the neighbor index for a compiled matrix, reading the cached file
+    when it is current and (re)building and saving it otherwise.
+    """
+    index_path = index_path or default_index_path(compiled_path)
+    index = read_neighbor_index(index_path, compiled_path, k)
+    if index is None or index.size != distance_matrix.size:
+        index = NeighborIndex.build(distance_matrix, k)
+        write_neighbor_index(index_path, index, compiled_path)
+    return index
@@ -0,0 +1,243 @@
+import heapq
+import math
+from itertools import repeat
+from operator import add, sub
+from distance_matrix import DistanceMatrix
+
+
+# ----------------------------
+# Distance Table Preprocessing
+# ----------------------------
+#
+# A distance table may be incomplete (empty cells), asymmetric (a full square
+# table whose two halves disagree) or non-metric (a direct entry longer than
+# driving through another address). Routing assumes none of these, so the
+# table is repaired once, before it is compiled:
+#
+#   missing     -> math.inf until a path through known entries is found
+#   asymmetric  -> the shorter of the two directions (roads are two-way)
+#   non-metric  -> replaced by the shortest path through other addresses
+#
+# Every resulting entry is the length of a path that can actually be driven.
+# Up to FLOYD_WARSHALL_MAX addresses the closure is exact; above it, rows are
+# closed where an entry is missing or beaten by a detour (find_violations).
+
+MISSING = math.inf
+FLOYD_WARSHALL_MAX = 200   # full closure up to this many addresses
+SPARSE_FRACTION = 0.1      # above FLOYD_WARSHALL_MAX, tables with fewer known entries use adjacency lists
+VIOLATION_PIVOTS = 4       # above FLOYD_WARSHALL_MAX, detours checked per address (its nearest addresses)
+VIOLATION_TOLERANCE = 0.01 # miles; shorter detours are rounding in the table, not wrong entries
+EPSILON = 1e-9
+
+
+class ClosureReport:
+    """ What preprocessing found and changed in a distance table. """
+
+    def __init__(self, size):
+        self.size = size
+        self.missing = 0        # pairs with no entry in the table
+        self.asymmetric = 0     # pairs whose two entries disagreed
+        self.shortened = 0      # known entries replaced by a shorter path
+        self.unreachable = 0    # pairs still without any path after closure
+        self.method = None
+
+    @property
+    def clean(self):
+        return not (self.missing or self.asymmetric or self.shortened or self.unreachable)
+
+    def as_dict(self):
+        return {"size": self.size, "missing": self.missing, "asymmetric": self.asymmetric,
+                "shortened": self.shortened, "unreachable": self.unreachable, "method": self.method}
+
+
+def build_distance_matrix(rows):
+    """
+    Builds a symmetric matrix from parsed table rows, recording gaps and disagreements.
+
+    Parameters:
+        rows (List[List[float or None]]): rows[i][j] is the distance from i to j, or None
+            for an empty cell. Rows may stop at the diagonal (lower triangle) or be full.
+
+    Returns:
+        (DistanceMatrix, ClosureReport): the matrix, with math.inf for missing pairs
+    """
+    size = len(rows)
+    report = ClosureReport(size)
+
+    def cell(i, j):
+        row = rows[i]
+        return row[j] if j < len(row) else None
+
+    matrix = DistanceMatrix(size)
+    data = matrix.row_major()
+    for i in range(size):
+        for j in range(i):
+            lower, upper = cell(i, j), cell(j, i)
+            if lower is None and upper is None:
+                value = MISSING
+                report.missing += 1
+            elif lower is None or upper is None:
+                value = upper if lower is None else lower
+            else:
+                value = min(lower, upper)
+                if abs(lower - upper) > EPSILON:
+                    report.asymmetric += 1
+            data[i * size + j] = value
+            data[j * size + i] = value
+    return matrix, report
+
+
+# ----------------------------
+# Shortest-Path Closure
+# ----------------------------
+
+def floyd_warshall(rows):
+    """
+    In-place all-pairs shortest paths over a list of row lists.
+
+    Each pivot k relaxes whole rows at once (row_i = min(row_i, d[i][k] + row_k)),
+    and rows that the pivot cannot improve are skipped, so the O(n^3) work
+    runs as list operations instead of a triple Python loop.
+    """
+    size = len(rows)
+    for k in range(size):
+        row_k = rows[k]
+        for i in range(size):
+            through = rows[i][k]
+            if through == MISSING or i == k:
+                continue
+            row_i = rows[i]
+            candidate = [through + distance for distance in row_k]
+            if any(map(float.__lt__, candidate, row_i)):
+                rows[i] = list(map(min, row_i, candidate))
+    return rows
+
+
+def dijkstra_row(distance_matrix, source, adjacency=None):
+    """
+    Shortest distances from one address to every other.
+
+    With adjacency lists ({node: [(neighbor, miles)]}, known entries only) this
+    is heap-based Dijkstra on a sparse road graph. Without them it is the
+    O(n^2) array form for dense tables: each step settles the closest open
+    address and relaxes its whole matrix row with list operations, settled
+    addresses being masked out with math.inf.
+
+    Returns:
+        List[float]: distance from source to each address (math.inf if unreachable)
+    """
+    size = distance_matrix.size
+    best = [MISSING] * size
+    best[source] = 0.0
+    if adjacency is None:
+        tentative = best[:]          # best, with settled addresses set to math.inf
+        blocked = [0.0] * size       # math.inf for settled addresses
+        for _ in range(size):
+            miles = min(tentative)
+            if miles == MISSING:
+                break
+            node = tentative.index(miles)
+            best[node] = miles
+            blocked[node] = MISSING
+            relaxed = map(add, repeat(miles), map(add, distance_matrix.row(node), blocked))
+            tentative = [old if old <= new else new for old, new in zip(tentative, relaxed)]
+            tentative[node] = MISSING
+        return best
+
+    settled = [False] * size
+    queue = [(0.0, source)]
+    while queue:
+        miles, node = heapq.heappop(queue)
+        if settled[node]:
+            continue
+        settled[node] = True
+        for other, length in adjacency[node]:
+            total = miles + length
+            if total < best[other]:
+                best[other] = total
+                heapq.heappush(queue, (total, other))
+    return best
+
+
+def find_violations(distance_matrix, pivots=VIOLATION_PIVOTS, tolerance=VIOLATION_TOLERANCE):
+    """
+    Finds rows with an entry more than `tolerance` longer than a detour through
+    one of the row's `pivots` nearest addresses.
+
+    An exact check is as costly as the closure itself (O(n^3)); a wrong entry
+    (a typo, a detour recorded as the direct distance) is almost always beaten
+    by going through an address near one end, which this catches in O(n^2 x pivots).
+
+    Returns:
+        set[int]: row indices to close
+    """
+    size = distance_matrix.size
+    rows = [distance_matrix.row(i).tolist() for i in range(size)]
+    flagged = set()
+    for i, row in enumerate(rows):
+        for k in heapq.nsmallest(pivots + 1, range(size), key=row.__getitem__):
+            through = row[k]
+            if k == i or through == MISSING:
+                continue
+            # d(i, j) > d(i, k) + d(k, j) for some j  <=>  max over j of d(i, j) - d(k, j) > d(i, k)
+            if max(map(sub, row, rows[k])) > through + tolerance:
+                flagged.add(i)
+                break
+    return flagged
+
+
+def close_distance_matrix(distance_matrix, report=None, method=None):
+    """
+    Replaces every entry with the shortest driving distance through known entries.
+
+    Method (chosen automatically unless given):
+        "floyd-warshall"  tables up to FLOYD_WARSHALL_MAX addresses: full closure,
+                          which also removes every triangle-inequality violation
+        "dijkstra"        larger tables: Dijkstra from each address whose row has a
+                          missing entry or fails find_violations(), and from every address
+                          (over adjacency lists) when fewer than SPARSE_FRACTION of the
+                          pairs are known
+
+    Parameters:
+        distance_matrix (DistanceMatrix): symmetric matrix, math.inf for missing pairs
+        report (ClosureReport): findings from build_distance_matrix to extend (optional)
+
+    Returns:
+        (DistanceMatrix, ClosureReport)
+    """
+    size = distance_matrix.size
+    report = report or ClosureReport(size)
+    method = method or ("floyd-warshall" if size <= FLOYD_WARSHALL_MAX else "dijkstra")
+    report.method = method
+
+    original = distance_matrix.row_major()
+    if method == "floyd-warshall":
+        closed = dict(enumerate(floyd_warshall([distance_matrix.row(i).tolist() for i in range(size)])))
+    else:
+        known = size * size - original.tolist().count(MISSING)
+        sparse = known < SPARSE_FRACTION * size * size
+        adjacency = None
+        if sparse:
+            adjacency = {i: [(j, length) for j, length in enumerate(distance_matrix.row(i))
+                             if length != MISSING and j != i]
+                         for i in range(size)}
+        if sparse:
+            sources = range(size)
+        else:
+            sources = sorted({i for i in range(size) if MISSING in distance_matrix.row(i).tolist()}
+                             | find_violations(distance_matrix))
+        closed = {i: dijkstra_row(distance_matrix, i, adjacency) for i in sources}
+
+    result = DistanceMatrix(size)
+    data = result.row_major()
+    data[:] = original
+    for i, row in closed.items():
+        for j in range(size):
+            value = min(row[j], data[i * size + j])
+            if value < data[i * size + j] - EPSILON and data[i * size + j] != MISSING:
+                report.shortened += 1
+            data[i * size + j] = value
+            data[j * size + i] = value
+
+    report.unreachable = data.tolist().count(MISSING) // 2
+    return result, report
@@ -3,52 +3,112 @@
 import csv
 import re
 from datetime import datetime
+from functools import lru_cache
 from hashmap import Package  # Package class is defined in hashmap.py
+from instrumentation import log, METRICS
 
 
 # ----------------------------
 # Parse Notes for Constraints
 # ----------------------------
 
+# Compiled once at import instead of on every row
+TRUCK_PATTERN = re.compile(r'truck (\d+)', re.IGNORECASE)
+DELIVERED_WITH_PATTERN = re.compile(r'must be delivered with ([\d, ]+)', re.IGNORECASE)
+DELAY_PATTERN = re.compile(r'until (\d{1,2}:\d{2} ?[ap]m)', re.IGNORECASE)
+
+LOAD_BATCH_SIZE = 1000
+
+
+@lru_cache(maxsize=4096)
 def parse_notes(notes):
     """
     Extracts delivery constraints from the 'Special Notes' column in the CSV.
+    Memoized: most notes repeat across a manifest, so each distinct string is parsed once.
     Returns:
         truck_restriction (int or None)
-        must_be_delivered_with (list of int)
+        must_be_delivered_with (tuple of int)
         delayed_until (datetime.time or None)
     """
     truck_restriction = None
-    must_be_delivered_with = []
+    must_be_delivered_with = ()
     delayed_until = None
 
+    if not notes:
+        return truck_restriction, must_be_delivered_with, delayed_until
+
     # Match specific truck requirement
-    truck_match = re.search(r'truck (\d+)', notes, re.IGNORECASE)
+    truck_match = TRUCK_PATTERN.search(notes)
     if truck_match:
         truck_restriction = int(truck_match.group(1))
 
     # Match grouped delivery requirement
-    delivered_with_match = re.search(r'must be delivered with ([\d, ]+)', notes, re.IGNORECASE)
+    delivered_with_match = DELIVERED_WITH_PATTERN.search(notes)
     if delivered_with_match:
-        must_be_delivered_with = [int(x.strip()) for x in delivered_with_match.group(1).split(',')]
+        must_be_delivered_with = tuple(int(x.strip()) for x in delivered_with_match.group(1).split(',') if x.strip())
 
     # Match delivery delay time (more robust)
-    if 'until' in notes.lower():
-        print(f"[Debug] Trying to parse delay time from: '{notes}'")
-        delayed_match = re.search(r'until (\d{1,2}:\d{2} ?[ap]m)', notes, re.IGNORECASE)
-        if delayed_match:
-            try:
-                time_str = delayed_match.group(1).lower().replace(' ', '')
-                delayed_until = datetime.strptime(time_str, '%I:%M%p').time()
-            except ValueError:
-                print(f"[Warning] Failed to parse delay time from note: '{notes}'")
+    delayed_match = DELAY_PATTERN.search(notes)
+    if delayed_match:
+        try:
+            time_str = delayed_match.group(1).lower().replace(' ', '')
+            delayed_until = datetime.strptime(time_str, '%I:%M%p').time()
+        except ValueError:
+            log.warning(f"[Warning] Failed to parse delay time from note: '{notes}'")
 
     return truck_restriction, must_be_delivered_with, delayed_until
 
+
+# ----------------------------
+# Streaming Package Reader
+# ----------------------------
+def iter_packages(filename, debug=False):
+    """
+    Streams Package objects from a 'WGUPS Package File' CSV one row at a time.
+
+    Each row's notes are parsed exactly once (by the memoized parse_notes) and
+    handed to Package, so memory stays bounded by a single row regardless of
+    manifest size.
+
+    Args:
+        filename (str): Path to the package CSV
+        debug (bool): Optional flag to log each parsed row (at DEBUG level)
+
+    Yields:
+        Package
+    """
+    with open(filename, newline='', encoding='utf-8-sig') as file:
+        reader = csv.reader(file)
+        headers = next(reader, [])
+        if debug:
+            log.debug("Headers: %s", headers)  # Optional debugging of field names
+
+        column = {name: i for i, name in enumerate(headers)}
+        id_col, address_col = column['Package ID'], column['Address']
+        city_col, state_col, zip_col = column['City'], column['State'], column['Zip']
+        deadline_col, weight_col = column['Delivery Deadline'], column['Weight Kilo']
+        notes_col = column.get('Special Notes')
+
+        for row in reader:
+            notes = row[notes_col] if notes_col is not None and notes_col < len(row) else ''
+            constraints = parse_notes(notes)
+
+            if debug:
+                log.debug("Loading Package ID: %s, Deadline: %s, Truck Restriction: %s, Grouped: %s, "
+                          "Delayed Until: %s", row[id_col], row[deadline_col], constraints[0],
+                          list(constraints[1]), constraints[2])
+
+            yield Package(
+                row[id_col], row[address_col], row[city_col], row[state_col],
+                row[zip_col], row[deadline_col], row[weight_col], notes, constraints
+            )
+
+
 # ----------------------------
 # C.1 – Load Package Data into HashMap
 # ----------------------------
-def load_packages(filename, package_hash, debug=False):
+@METRICS.timed("load_packages")
+def load_packages(filename, package_hash, debug=False, batch_size=LOAD_BATCH_SIZE):
     """
     Loads package data from a CSV file into a custom HashMap data structure.
     This function fulfills Rubric Requirement C.1 and supports A and B.
@@ -59,49 +119,25 @@ def load_packages(filename, package_hash, debug=False):
     - Instantiates a Package object
     - Inserts it into the provided custom HashMap (no built-in dict used)
 
+    Rows are streamed by iter_packages() and inserted in batches of batch_size.
+
     Args:
         filename (str): Path to the 'WGUPS Package File' CSV
         package_hash (HashMap): Custom hash table to populate
-        debug (bool): Optional flag to print debug information during load
-    """
-    with open(filename, newline='', encoding='utf-8-sig') as file:
-        reader = csv.DictReader(file)
-        headers = reader.fieldnames
-        print(f"Headers: {headers}")  # Optional debugging of field names
-
-        for row in reader:
-            # Extract base package data
-            package_id = int(row['Package ID'])
-            package_address = row['Address']
-            package_city = row['City']
-            package_state = row['State']
-            package_zip = row['Zip']
-            package_deadline = row['Delivery Deadline']
-            package_weight = float(row['Weight Kilo'])
-            package_notes = row.get('Special Notes', '')
-
-            # Parse delivery constraints (supports rubric constraints on delays/grouped deliveries)
-            truck_restriction, must_be_delivered_with, delayed_until = parse_notes(package_notes)
-
-            if debug:
-                print(f"Loading Package ID: {package_id}, Deadline: {package_deadline}, "
-                      f"Truck Restriction: {truck_restriction}, Grouped: {must_be_delivered_with}, "
-                      f"Delayed Until: {delayed_until}")
-
-            # Create Package object
-            package = Package(
-                package_id, package_address, package_city, package_state,
-                package_zip, package_deadline, package_weight, package_notes
-            )
-
-            # Attach delivery constraints
-            package.truck_restriction = truck_restriction
-            package.must_be_delivered_with = must_be_delivered_with
-            package.delayed_until = delayed_until
-
-            # Debug: Print when inserting into the hash map
-            if debug:
-                print(f"Inserting Package ID: {package.package_id} into the hash map.")
+        debug (bool): Optional flag to log each package during load (at DEBUG level)
+        batch_size (int): Packages buffered per HashMap.insert_many() call
 
+    Returns:
+        int: number of packages inserted
+    """
+    inserted = 0
+    batch = []
+    for package in iter_packages(filename, debug):
+        batch.append((package.package_id, package))
+        if len(batch) >= batch_size:
             # Insert into custom hash map (Rubric A: Insert Function)
-            package_hash.insert(package.package_id, package, debug)
+            inserted += package_hash.insert_many(batch, debug)
+            batch = []
+    if batch:
+        inserted += package_hash.insert_many(batch, debug)
+    return inserted
@@ -0,0 +1,104 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from distance_matrix import DistanceMatrix
+from neighbor_index import NeighborIndex
+from routing import build_route, DEFAULT_IMPROVERS, DEFAULT_TIME_BUDGET
+
+
+# ----------------------------
+# Sharing the Network with Worker Processes
+# ----------------------------
+#
+# Each worker attaches to the shared distance matrix once, in the pool
+# initializer, so tasks only carry their own stop lists across processes.
+# The neighbor index is small (size x k ints) and is simply pickled along.
+
+def share_network(distance_matrix):
+    """
+    Copies the matrix into shared memory for a process pool.
+
+    Returns:
+        (SharedMemory, tuple): the block (the caller must close() and unlink() it)
+        and the arguments each worker passes to attach_network()
+    """
+    block, typecode = distance_matrix.to_shared_memory()
+    index = distance_matrix.neighbor_index
+    index_args = (index.k, index.to_array()) if index is not None else ()
+    return block, (block.name, distance_matrix.size, typecode) + index_args
+
+
+def attach_network(block_name, size, typecode, neighbor_k=0, neighbor_data=None):
+    """
+    Attaches to a matrix published by share_network(), without copying it.
+
+    Returns:
+        (SharedMemory, DistanceMatrix): keep the block referenced as long as the matrix is used
+    """
+    block = shared_memory.SharedMemory(name=block_name)
+    matrix = DistanceMatrix.attach_shared(block, size, typecode)
+    if neighbor_data is not None:
+        matrix.neighbor_index = NeighborIndex(size, neighbor_k, neighbor_data)
+    return block, matrix
+
+
+_worker_block = None
+_worker_matrix = None
+
+
+def _attach_worker(*network_args):
+    global _worker_block, _worker_matrix
+    _worker_block, _worker_matrix = attach_network(*network_args)
+
+
+def _route_task(stops, start, improvers, time_budget, timing):
+    return build_route(_worker_matrix, stops, start, improvers, time_budget, timing)
+
+
+# ----------------------------
+# Parallel Per-Truck Routing
+# ----------------------------
+
+def route_trucks_parallel(distance_matrix, stop_lists, start=0, improvers=DEFAULT_IMPROVERS,
+                          time_budget=DEFAULT_TIME_BUDGET, max_workers=None, timings=None):
+    """
+    Routes every truck's stops concurrently in a process pool.
+
+    The matrix is copied once into shared memory and attached by each worker,
+    rather than pickled for every task, so wall-clock time approaches that of
+    the slowest single truck.
+
+    Parameters:
+        distance_matrix (DistanceMatrix): symmetric distance table
+        stop_lists (List[List[int]]): address indices to visit, one list per truck
+        start (int): hub index
+        improvers (Iterable[str]): local-search stages (see routing.ROUTE_IMPROVERS)
+        time_budget (float): improvement seconds per truck
+        max_workers (int): pool size (defaults to one worker per non-empty route, capped by CPUs)
+        timings (List[RouteTiming]): optional per-truck deadlines for deadline-aware construction
+
+    Returns:
+        List[List[int]]: one route per entry in stop_lists
+    """
+    routes = [[] for _ in stop_lists]
+    timings = timings or [None] * len(stop_lists)
+    pending = [i for i, stops in enumerate(stop_lists) if stops]
+    if len(pending) <= 1:
+        for i in pending:
+            routes[i] = build_route(distance_matrix, stop_lists[i], start, improvers, time_budget, timings[i])
+        return routes
+
+    block, network_args = share_network(distance_matrix)
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers or min(len(pending), os.cpu_count() or 1),
+                                 initializer=_attach_worker, initargs=network_args) as pool:
+            futures = {i: pool.submit(_route_task, stop_lists[i], start, tuple(improvers), time_budget,
+                                     timings[i])
+                       for i in pending}
+            for i, future in futures.items():
+                routes[i] = future.result()
+    finally:
+        block.close()
+        block.unlink()
+    return routes
+
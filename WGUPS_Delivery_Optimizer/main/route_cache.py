@@ -0,0 +1,236 @@
+import hashlib
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from exact_routing import EXACT_MAX_STOPS
+from routing import build_route, route_length, DEFAULT_IMPROVERS, DEFAULT_TIME_BUDGET, SOLVER_VERSION
+from instrumentation import log, METRICS
+
+
+# ----------------------------
+# Route Cache File Format
+# ----------------------------
+#
+#   header   MAGIC, FORMAT_VERSION, entry count (little-endian, see HEADER_FORMAT)
+#   entries  oldest first: 16-byte key, float64 miles, float64 time budget,
+#            uint32 solver version, uint32 stop count, int32 stops
+#
+# Keys already contain the matrix fingerprint, so a file can be shared across
+# days: routes solved on a different network simply never match. Each entry
+# also records the improvement budget it was solved with and the solver
+# version (routing.SOLVER_VERSION): a lookup only hits a route solved with at
+# least the requested budget by the current solver.
+
+MAGIC = b"WGRC"
+FORMAT_VERSION = 2
+HEADER_FORMAT = "<4sHxxI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+ENTRY_FORMAT = "<16sddII"
+ENTRY_SIZE = struct.calcsize(ENTRY_FORMAT)
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+ENTRY_OVERHEAD = 200  # approximate bytes of dict / tuple / array bookkeeping per entry
+
+
+def route_key(distance_matrix, stops, start=0, improvers=DEFAULT_IMPROVERS, timing=None,
+              exact_max_stops=EXACT_MAX_STOPS):
+    """
+    Canonical fingerprint of a routing problem.
+
+    The stops are reduced to their sorted distinct set (order and duplicate
+    packages at one address do not change the tour), and the matrix enters as
+    its content fingerprint. Deadline-aware routes also depend on the
+    departure time, speed and the deadlines of these stops, so those are
+    part of the key too, as is the exact-solver cutoff (exact_max_stops),
+    which decides whether small routes are solved optimally. The time budget
+    is not: it is stored with the entry (see RouteCache.get), since a route
+    solved with more time is still a valid answer for less.
+
+    Returns:
+        bytes: 16-byte digest
+    """
+    stop_set = sorted(set(stops) - {start})
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(distance_matrix.fingerprint().encode())
+    digest.update(struct.pack("<iI", start, len(stop_set)))
+    digest.update(array('i', stop_set).tobytes())
+    digest.update(repr((tuple(improvers), exact_max_stops)).encode())
+    if timing is not None:
+        deadlines = sorted((stop, timing.deadlines[stop]) for stop in stop_set if stop in timing.deadlines)
+        digest.update(repr((timing.start_minutes, timing.speed, deadlines)).encode())
+    return digest.digest()
+
+
+# ----------------------------
+# RouteCache Class
+# ----------------------------
+
+class RouteCache:
+    """
+    LRU cache of solved routes, bounded by an estimate of the memory it holds.
+
+    What-if runs route the same address sets over and over (the same truck
+    load under a different fleet size or speed); a hit returns the stored
+    tour and its mileage instead of running construction and local search
+    again. With a path the cache can be saved and loaded, so replanning the
+    next day starts with every route solved the day before. Lookups and
+    inserts take a lock, so threads may share one cache.
+
+    Entries remember the time budget and solver version they were solved
+    with; a route solved with less time than requested, or by an older
+    solver, is a miss and is replaced once solved again.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, path=None):
+        """
+        Parameters:
+            max_bytes (int): evict least recently used routes above this estimated size
+            path (str): file to load from now and save() to later (optional)
+        """
+        self.max_bytes = max_bytes
+        self.path = path
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()   # key -> (array('i') route, miles, time budget, solver version)
+        self._new = []                  # keys added since the last drain_new()
+        self._lock = threading.Lock()
+        if path:
+            self.load(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @staticmethod
+    def _entry_size(route):
+        return ENTRY_OVERHEAD + 16 + route.itemsize * len(route)
+
+    def get(self, key, time_budget=0.0):
+        """
+        Returns (route, miles) for a key, or None; a hit makes the entry most recently used.
+        Only routes solved by the current solver with at least `time_budget` seconds count.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[2] < time_budget or entry[3] != SOLVER_VERSION):
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if entry is None:
+            METRICS.increment("route_cache_misses")
+            return None
+        METRICS.increment("route_cache_hits")
+        return entry[0].tolist(), entry[1]
+
+    def put(self, key, route, miles, time_budget=DEFAULT_TIME_BUDGET, solver_version=SOLVER_VERSION):
+        stored = array('i', route)
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entry_size(self._entries[key][0])
+            else:
+                self._new.append(key)
+            self._entries[key] = (stored, miles, time_budget, solver_version)
+            self._entries.move_to_end(key)
+            self.nbytes += self._entry_size(stored)
+            while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                _, (evicted, *_) = self._entries.popitem(last=False)
+                self.nbytes -= self._entry_size(evicted)
+                self.evictions += 1
+
+    def build_route(self, distance_matrix, stops, start=0, improvers=DEFAULT_IMPROVERS,
+                    time_budget=DEFAULT_TIME_BUDGET, timing=None, exact_max_stops=EXACT_MAX_STOPS):
+        """ routing.build_route(), answered from the cache when the same stop set was solved before. """
+        key = route_key(distance_matrix, stops, start, improvers, timing, exact_max_stops)
+        cached = self.get(key, time_budget)
+        if cached is not None:
+            return cached[0]
+        route = build_route(distance_matrix, stops, start, improvers, time_budget, timing, exact_max_stops)
+        self.put(key, route, route_length(distance_matrix, route, start), time_budget)
+        return route
+
+    def entries(self):
+        """ Returns [(key, route, miles, time budget, solver version)] for every entry, least recently used first. """
+        with self._lock:
+            return [(key, *entry) for key, entry in self._entries.items()]
+
+    def drain_new(self):
+        """
+        Returns [(key, route, miles, time budget, solver version)] for entries added since
+        the last call, so a worker process can hand its newly solved routes back to the parent's cache.
+        """
+        with self._lock:
+            new = [(key, *self._entries[key]) for key in self._new if key in self._entries]
+            self._new = []
+        return new
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "bytes": self.nbytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
+
+    # ----------------------------
+    # Save / Load
+    # ----------------------------
+
+    def save(self, path=None):
+        """ Writes every entry (least recently used first) atomically to path or self.path. """
+        path = path or self.path
+        if sys.byteorder != "little":
+            return
+        entries = self.entries()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(struct.pack(HEADER_FORMAT, MAGIC, FORMAT_VERSION, len(entries)))
+            for key, route, miles, time_budget, solver_version in entries:
+                file.write(struct.pack(ENTRY_FORMAT, key, miles, time_budget, solver_version, len(route)))
+                file.write(route.tobytes())
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """
+        Adds the entries saved in a file (missing or unreadable files are ignored).
+
+        Returns:
+            int: number of routes loaded
+        """
+        if sys.byteorder != "little":
+            return 0
+        try:
+            with open(path, "rb") as file:
+                raw = file.read()
+        except FileNotFoundError:
+            return 0
+        if len(raw) < HEADER_SIZE:
+            return 0
+        magic, version, count = struct.unpack_from(HEADER_FORMAT, raw)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            log.warning(f"⚠️ Warning: Ignoring route cache '{path}' (unknown format)")
+            return 0
+
+        offset = HEADER_SIZE
+        loaded = 0
+        for _ in range(count):
+            if offset + ENTRY_SIZE > len(raw):
+                break
+            key, miles, time_budget, solver_version, length = struct.unpack_from(ENTRY_FORMAT, raw, offset)
+            offset += ENTRY_SIZE
+            route = array('i')
+            route.frombytes(raw[offset:offset + length * route.itemsize])
+            offset += length * route.itemsize
+            if len(route) != length:
+                break
+            self.put(key, route, miles, time_budget, solver_version)
+            loaded += 1
+        self._new = []
+        return loaded
@@ -0,0 +1,310 @@
+import time
+from exact_routing import held_karp_route, EXACT_MAX_STOPS
+from instrumentation import METRICS
+from time_windows import deadline_insertion_route, total_lateness
+
+
+# ----------------------------
+# Route Construction
+# ----------------------------
+#
+# A route is a list of distinct address indices. The truck leaves `start`
+# (the hub), visits every stop in order, and returns to `start`.
+
+DEFAULT_NEIGHBORS = 8
+DEFAULT_TIME_BUDGET = 1.0  # seconds of improvement per route
+SOLVER_VERSION = 2         # bump when build_route can return a different route for the same inputs
+
+
+def route_length(distance_matrix, route, start=0):
+    """ Returns the length in miles of the closed tour start -> route -> start. """
+    total = 0.0
+    current = start
+    for stop in route:
+        total += distance_matrix.distance(current, stop)
+        current = stop
+    return total + distance_matrix.distance(current, start)
+
+
+def nearest_neighbor_route(distance_matrix, stops, start=0):
+    """
+    Builds a tour greedily by always driving to the closest unvisited stop.
+
+    With a neighbor index on the matrix, each step takes the first unvisited
+    entry of the current stop's precomputed neighbor list and only scans all
+    remaining stops when every listed neighbor has been visited.
+
+    Parameters:
+        distance_matrix (DistanceMatrix): symmetric distance table
+        stops (Iterable[int]): address indices to visit (duplicates and the start are ignored)
+        start (int): hub index the tour departs from
+
+    Returns:
+        List[int]: stops in visiting order
+    """
+    remaining = dict.fromkeys(stop for stop in stops if stop != start)
+    index = distance_matrix.neighbor_index
+    route = []
+    current = start
+    full_scans = 0
+    while remaining:
+        following = None
+        if index is not None:
+            following = next((stop for stop in index.neighbors(current) if stop in remaining), None)
+        if following is None:
+            candidates = list(remaining)
+            following = candidates[distance_matrix.nearest(current, candidates)]
+            full_scans += 1
+        del remaining[following]
+        route.append(following)
+        current = following
+    METRICS.increment("nearest_neighbor_full_scans", full_scans)
+    return route
+
+
+def build_neighbor_lists(distance_matrix, nodes, k=DEFAULT_NEIGHBORS):
+    """
+    Returns {node: [k closest other nodes]} restricted to the given nodes.
+    Local search only tries moves that create an edge to one of these neighbors.
+
+    With a neighbor index, a node's list is read from its precomputed
+    neighbors when at least k of them are in `nodes`; otherwise that node
+    falls back to sorting its distances to every other node.
+    """
+    nodes = list(nodes)
+    members = set(nodes)
+    index = distance_matrix.neighbor_index
+    neighbors = {}
+    full_sorts = 0
+    for node in nodes:
+        if index is not None:
+            listed = [other for other in index.neighbors(node) if other in members][:k]
+            if len(listed) == min(k, len(members) - 1):
+                neighbors[node] = listed
+                continue
+        row = distance_matrix.row(node)
+        others = [other for other in nodes if other != node]
+        others.sort(key=row.__getitem__)
+        neighbors[node] = others[:k]
+        full_sorts += 1
+    METRICS.increment("neighbor_list_full_sorts", full_sorts)
+    return neighbors
+
+
+# ----------------------------
+# Route Improvement (Local Search)
+# ----------------------------
+
+def two_opt(distance_matrix, route, start, neighbors, deadline):
+    """
+    2-opt: reverse a segment when reconnecting its ends shortens the tour.
+
+    For tour t, reversing t[lo+1..hi] replaces edges (t[lo], t[lo+1]) and
+    (t[hi], t[hi+1]) with (t[lo], t[hi]) and (t[lo+1], t[hi+1]); the gain is
+    evaluated in O(1) and only for hi where t[hi] is a neighbor of t[lo].
+
+    Returns:
+        (List[int], bool): the (possibly) improved route and whether it changed
+    """
+    tour = [start] + route + [start]
+    position = {node: p for p, node in enumerate(route, 1)}
+    dist = distance_matrix.distance
+    improved_any = False
+    improved = True
+    evaluated = 0
+
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(len(tour) - 1):
+            for c in neighbors.get(tour[i], ()):
+                j = position.get(c)
+                if j is None:
+                    continue
+                lo, hi = (i, j) if i < j else (j, i)
+                if hi - lo < 2:
+                    continue
+                evaluated += 1
+                p, q = tour[lo], tour[lo + 1]
+                r, s = tour[hi], tour[hi + 1]
+                if dist(p, r) + dist(q, s) - dist(p, q) - dist(r, s) < -1e-9:
+                    tour[lo + 1:hi + 1] = tour[hi:lo:-1]
+                    for k in range(lo + 1, hi + 1):
+                        position[tour[k]] = k
+                    improved = improved_any = True
+
+    METRICS.increment("two_opt_candidates", evaluated)
+    return tour[1:-1], improved_any
+
+
+def or_opt(distance_matrix, route, start, neighbors, deadline, max_segment=3):
+    """
+    Or-opt: relocate a segment of 1..max_segment consecutive stops (optionally
+    reversed) next to one of its endpoint's neighbors when that shortens the tour.
+
+    Each candidate insertion is priced in O(1) from the four edges it touches;
+    the route is only rebuilt when a move is accepted.
+
+    Returns:
+        (List[int], bool): the (possibly) improved route and whether it changed
+    """
+    dist = distance_matrix.distance
+    route = route[:]
+    improved_any = False
+    improved = True
+    evaluated = 0
+
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        n = len(route)
+        position = {node: p for p, node in enumerate(route)}
+        for length in range(1, min(max_segment, n - 1) + 1):
+            i = 0
+            while i + length <= n:
+                first, last = route[i], route[i + length - 1]
+                before = route[i - 1] if i > 0 else start
+                after = route[i + length] if i + length < n else start
+                removal_gain = dist(before, first) + dist(last, after) - dist(before, after)
+                move, tried = _best_or_opt_insertion(dist, route, start, position, neighbors, i, length,
+                                                     removal_gain)
+                evaluated += tried
+                if move is None:
+                    i += 1
+                    continue
+                k, reverse = move
+                segment = route[i:i + length]
+                if reverse:
+                    segment.reverse()
+                rest = route[:i] + route[i + length:]
+                insert_at = k + 1 if k < i else k + 1 - length
+                route = rest[:insert_at] + segment + rest[insert_at:]
+                position = {node: p for p, node in enumerate(route)}
+                improved = improved_any = True
+                i += 1
+            if time.perf_counter() >= deadline:
+                break
+
+    METRICS.increment("or_opt_candidates", evaluated)
+    return route, improved_any
+
+
+def _best_or_opt_insertion(dist, route, start, position, neighbors, i, length, removal_gain):
+    """
+    Finds an improving place for route[i:i + length] between route[k] and its
+    successor (k = -1 means right after the start).
+
+    Returns:
+        ((int, bool), int): k and whether to reverse the segment (None if no move
+        improves), and the number of insertion points priced
+    """
+    n = len(route)
+    first, last = route[i], route[i + length - 1]
+    anchors = set()
+    for anchor in neighbors.get(first, ()) + neighbors.get(last, ()):
+        if anchor == start:
+            # after the start, or after the last stop (i.e. just before returning)
+            anchors.add(-1)
+            anchors.add(n - 1 if i + length < n else i - 1)
+            continue
+        k = position.get(anchor)
+        if k is None or i <= k < i + length:
+            continue
+        # insert either after the anchor or before it
+        anchors.add(k)
+        anchors.add(k - 1 if k != i + length else i - 1)
+
+    for k in anchors:
+        if i - 1 <= k < i + length:
+            continue  # same place the segment already occupies
+        x = route[k] if k >= 0 else start
+        y = route[k + 1] if k + 1 < n else start
+        base = dist(x, y)
+        forward = dist(x, first) + dist(last, y) - base
+        backward = dist(x, last) + dist(first, y) - base
+        if min(forward, backward) < removal_gain - 1e-9:
+            return (k, backward < forward), len(anchors)
+    return None, len(anchors)
+
+
+# Registry of pluggable improvement stages, applied in order until none improves
+ROUTE_IMPROVERS = {
+    "2-opt": two_opt,
+    "or-opt": or_opt,
+}
+DEFAULT_IMPROVERS = ("2-opt", "or-opt")
+
+
+def improve_route(distance_matrix, route, start=0, improvers=DEFAULT_IMPROVERS,
+                  time_budget=DEFAULT_TIME_BUDGET, neighbor_count=DEFAULT_NEIGHBORS):
+    """
+    Runs the selected local-search stages over a constructed route.
+
+    Parameters:
+        distance_matrix (DistanceMatrix): symmetric distance table
+        route (List[int]): stops in visiting order (start excluded)
+        start (int): hub index
+        improvers (Iterable[str]): names from ROUTE_IMPROVERS, applied round-robin
+        time_budget (float): wall-clock seconds allowed for this route
+        neighbor_count (int): size of each stop's candidate neighbor list
+
+    Returns:
+        List[int]: improved route, never longer than the input
+    """
+    if len(route) < 3 or not improvers:
+        return route[:]
+
+    deadline = time.perf_counter() + time_budget
+    neighbors = build_neighbor_lists(distance_matrix, [start] + route, neighbor_count)
+    stages = [ROUTE_IMPROVERS[name] for name in improvers]
+
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for stage in stages:
+            route, changed = stage(distance_matrix, route, start, neighbors, deadline)
+            improved = improved or changed
+    return route
+
+
+def build_route(distance_matrix, stops, start=0, improvers=DEFAULT_IMPROVERS,
+                time_budget=DEFAULT_TIME_BUDGET, timing=None, exact_max_stops=EXACT_MAX_STOPS):
+    """
+    Constructs a tour over the stops and runs the improvement stage on it.
+
+    Routes with at most exact_max_stops distinct stops are also solved exactly
+    (Held-Karp, see exact_routing), so small routes are optimal unless a
+    deadline needs a longer one; 0 turns this off, and so does an empty
+    improvers list, which asks for the constructed tour alone.
+
+    Without timing the tour is built by nearest neighbor. With a RouteTiming a
+    deadline-aware insertion tour is built as well, both tours are improved,
+    and the candidate with the least deadline lateness (then fewest miles) wins,
+    so distance-only improvement can never make a deadline later. The exact
+    tour is one more candidate there: shortest, but not always on time.
+    """
+    exact = bool(improvers) and len(set(stops) - {start}) <= exact_max_stops
+    if timing is None and exact:
+        return held_karp_route(distance_matrix, stops, start)
+
+    route = nearest_neighbor_route(distance_matrix, stops, start)
+    if timing is None:
+        return improve_route(distance_matrix, route, start, improvers, time_budget)
+
+    insertion = deadline_insertion_route(distance_matrix, stops, timing, start)
+    budget = time_budget / 2
+    candidates = [insertion,
+                  improve_route(distance_matrix, insertion, start, improvers, budget),
+                  improve_route(distance_matrix, route, start, improvers, budget)]
+    if exact:
+        candidates.append(held_karp_route(distance_matrix, stops, start))
+    return min(candidates, key=lambda candidate: (round(total_lateness(distance_matrix, candidate, timing, start), 6),
+                                                  route_length(distance_matrix, candidate, start)))
+
+
+def order_packages_by_route(packages, route, start=0):
+    """
+    Orders packages to follow a route; packages sharing an address stay together
+    in their original relative order, and packages addressed to the start go first.
+    """
+    rank = {stop: p for p, stop in enumerate(route, 1)}
+    rank[start] = 0
+    return sorted(packages, key=lambda pkg: rank[pkg.address_index])
@@ -0,0 +1,161 @@
+import csv
+import math
+import os
+import random
+
+
+# ----------------------------
+# Synthetic Scenario Generator
+# ----------------------------
+#
+# Produces seeded address sets, distance tables and package manifests in the
+# same CSV layouts as addresses.csv, distances_backup.csv and packages.csv, so
+# benchmarks exercise the real loaders end to end.
+
+SERVICE_AREA_MILES = 20.0   # side of the square service area
+ROAD_FACTOR = 1.3           # road distance / straight-line distance
+STREET_NAMES = ("Main St", "State St", "Canyon Rd", "Parkway Blvd", "Lester St", "Oakland Ave",
+                "Taylorsville Blvd", "Dalton Ave S", "Price Ave", "Valley Central Station")
+DIRECTIONS = ("N", "S", "E", "W")
+PLACE_NAMES = ("Park", "Library", "City Office", "Police Dept", "Softball Complex", "Museum",
+               "Health Services", "Public Works", "Court", "Pavilion")
+DEADLINE_CHOICES = (("9:00 AM", 0.03), ("10:30 AM", 0.27), ("EOD", 0.70))
+
+GROUP_RATE = 0.02        # share of packages in "Must be delivered with" groups
+RESTRICTION_RATE = 0.03  # share with "Can only be on truck N"
+DELAY_RATE = 0.03        # share delayed on a flight
+DELAY_NOTE = "Delayed on flight---will not arrive to depot until 9:05 am"
+
+
+class Scenario:
+    """ A generated delivery network: addresses, hub-relative coordinates, distances and packages. """
+
+    def __init__(self, seed, addresses, coordinates, distances, packages):
+        self.seed = seed
+        self.addresses = addresses
+        self.coordinates = coordinates
+        self.distances = distances    # lower triangle, distances[i][j] for j <= i
+        self.packages = packages      # package CSV rows (dicts)
+
+    @property
+    def num_packages(self):
+        return len(self.packages)
+
+
+def default_address_count(num_packages):
+    """ Realistic stop density: several packages per address, capped to keep the matrix tractable. """
+    return max(27, min(3000, num_packages // 4))
+
+
+def _address_text(rng, idx, used):
+    while True:
+        number = rng.randrange(100, 9999)
+        if rng.random() < 0.5:
+            street = f"{rng.choice(DIRECTIONS)} {rng.randrange(100, 9000, 100)} {rng.choice(DIRECTIONS)}"
+        else:
+            street = rng.choice(STREET_NAMES)
+        street_line = f"{number} {street}"
+        if street_line not in used:
+            used.add(street_line)
+            return f"{rng.choice(PLACE_NAMES)} {idx}\n {street_line}", street_line
+
+
+def generate_scenario(num_packages, num_addresses=None, num_trucks=3, seed=0):
+    """
+    Generates a reproducible scenario.
+
+    Distances are straight-line distances between random points scaled by a
+    constant road factor, so the table is symmetric and satisfies the triangle
+    inequality (up to rounding to 0.001 mile). Package notes use the same phrasing as packages.csv.
+
+    Parameters:
+        num_packages (int): manifest size
+        num_addresses (int): locations including the hub at index 0 (default scales with packages)
+        num_trucks (int): truck restrictions are drawn from 1..num_trucks
+        seed (int): random seed; the same seed always yields the same scenario
+
+    Returns:
+        Scenario
+    """
+    rng = random.Random(seed)
+    num_addresses = num_addresses or default_address_count(num_packages)
+
+    coordinates = [(SERVICE_AREA_MILES / 2, SERVICE_AREA_MILES / 2)]
+    coordinates += [(rng.uniform(0, SERVICE_AREA_MILES), rng.uniform(0, SERVICE_AREA_MILES))
+                    for _ in range(num_addresses - 1)]
+
+    used = set()
+    addresses = ["Western Governors University\n4001 South 700 East,\nSalt Lake City, UT 84107"]
+    street_lines = ["4001 South 700 East"]
+    used.add(street_lines[0])
+    for idx in range(1, num_addresses):
+        entry, street_line = _address_text(rng, idx, used)
+        addresses.append(entry)
+        street_lines.append(street_line)
+
+    distances = []
+    for i, (xi, yi) in enumerate(coordinates):
+        distances.append([round(math.hypot(xi - xj, yi - yj) * ROAD_FACTOR, 3) for xj, yj in coordinates[:i + 1]])
+
+    deadlines = [choice for choice, _ in DEADLINE_CHOICES]
+    weights = [weight for _, weight in DEADLINE_CHOICES]
+    packages = []
+    for package_id in range(1, num_packages + 1):
+        packages.append({
+            "Package ID": package_id,
+            "Address": street_lines[rng.randrange(1, num_addresses)],
+            "City": "Salt Lake City", "State": "UT", "Zip": f"841{rng.randrange(0, 40):02d}",
+            "Delivery Deadline": rng.choices(deadlines, weights)[0],
+            "Weight Kilo": rng.randrange(1, 90),
+            "Special Notes": "",
+        })
+
+    # Constraint notes: groups first, then restrictions and delays on packages not in a group
+    free = list(range(num_packages))
+    rng.shuffle(free)
+    grouped = int(num_packages * GROUP_RATE)
+    while grouped >= 2 and len(free) >= 4:
+        size = min(rng.randrange(2, 5), grouped)
+        members = [free.pop() for _ in range(size)]
+        ids = [packages[m]["Package ID"] for m in members]
+        packages[members[0]]["Special Notes"] = "Must be delivered with " + ", ".join(map(str, ids[1:]))
+        grouped -= size
+
+    for _ in range(min(int(num_packages * RESTRICTION_RATE), len(free))):
+        packages[free.pop()]["Special Notes"] = f"Can only be on truck {rng.randrange(1, num_trucks + 1)}"
+    for _ in range(min(int(num_packages * DELAY_RATE), len(free))):
+        row = packages[free.pop()]
+        row["Special Notes"] = DELAY_NOTE
+        row["Delivery Deadline"] = "EOD"
+
+    return Scenario(seed, addresses, coordinates, distances, packages)
+
+
+def write_scenario(scenario, directory):
+    """
+    Writes the scenario as addresses.csv, distances.csv and packages.csv.
+
+    Returns:
+        (str, str, str): paths of the distance, address and package files
+    """
+    os.makedirs(directory, exist_ok=True)
+    distance_path = os.path.join(directory, "distances.csv")
+    address_path = os.path.join(directory, "addresses.csv")
+    package_path = os.path.join(directory, "packages.csv")
+
+    with open(address_path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        for idx, address in enumerate(scenario.addresses, 1):
+            writer.writerow([idx, address])
+
+    with open(distance_path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        for idx, row in enumerate(scenario.distances):
+            writer.writerow([idx] + row)
+
+    with open(package_path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=list(scenario.packages[0]) if scenario.packages else [])
+        writer.writeheader()
+        writer.writerows(scenario.packages)
+
+    return distance_path, address_path, package_path
@@ -0,0 +1,267 @@
+import copy
+import hashlib
+import math
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import datetime, time
+from typing import NamedTuple
+from delivery_simulation import resolve_addresses, assign_packages, route_trucks, simulate_deliveries, TRUCK_SPEED
+from delivery_timeline import DELIVERED, to_minutes
+from event_simulation import ARRIVE, RETURN
+from fleet_search import optimize_fleet
+from instrumentation import METRICS
+from routing import DEFAULT_IMPROVERS, DEFAULT_TIME_BUDGET
+from truck import Truck
+
+
+# ----------------------------
+# Side-Effect-Free Simulation
+# ----------------------------
+#
+# run_delivery_simulation() drives the caller's own Truck and Package objects,
+# which is what the interactive program and live_updates need. simulate()
+# runs the same pipeline on private copies and returns an immutable
+# SimulationResult, so the loaded data can be reused for any number of runs,
+# from several threads at once, and identical runs can be served from a cache.
+
+DEFAULT_START_TIMES = ("08:00 AM", "09:05 AM", "10:20 AM")
+DEFAULT_CAPACITY = 16
+
+
+class SimulationConfig(NamedTuple):
+    """
+    Everything about a run that is not the network or the manifest.
+
+    A plain tuple of immutable values, so it is hashable and its repr() is a
+    stable cache key component.
+    """
+    start_times: tuple = DEFAULT_START_TIMES   # one "08:00 AM" string per truck
+    speed: float = TRUCK_SPEED
+    capacity: int = DEFAULT_CAPACITY
+    drivers: int = None                        # defaults to one per truck
+    route_time_budget: float = DEFAULT_TIME_BUDGET
+    route_improvers: tuple = tuple(DEFAULT_IMPROVERS)
+    preload: tuple = ()                        # ((truck position, (package IDs, ...)), ...)
+    search_budget: float = 0.0                 # seconds of fleet-wide search after routing (0 = off)
+    search_restarts: int = 1
+    search_workers: int = 1                    # processes for the restarts
+
+    def make_trucks(self):
+        return [Truck(name=f"Truck {i}", start_time=datetime.strptime(start, "%I:%M %p"),
+                      max_capacity=self.capacity, truck_id=i)
+                for i, start in enumerate(self.start_times, 1)]
+
+
+# ----------------------------
+# SimulationResult Class
+# ----------------------------
+
+class SimulationResult:
+    """
+    Read-only outcome of one simulate() call.
+
+    Routes are stored as packed int32 address indices (one buffer per truck,
+    hub visits included, so reload trips show up as returns to index 0) and
+    package times live in a DeliveryTimeline, so a result holds no Truck or
+    Package objects and is cheap to keep in a cache or send between processes.
+    """
+    __slots__ = ("config", "truck_ids", "truck_miles", "truck_trips", "truck_end_minutes", "total_miles",
+                 "timeline", "late_packages", "unassigned_packages", "_routes")
+
+    def __init__(self, config, trucks, routes, timeline, late_packages, unassigned_packages):
+        """
+        Parameters:
+            config (SimulationConfig): settings the run used
+            trucks (List[Truck]): trucks after the run (only their totals are kept)
+            routes (List[List[int]]): address indices each truck drove through, in order
+            timeline (DeliveryTimeline): departure / delivery minutes per package
+            late_packages (Iterable[int]): IDs delivered after their deadline
+            unassigned_packages (Iterable[int]): IDs that were never loaded
+        """
+        setattr_ = object.__setattr__
+        setattr_(self, "config", config)
+        setattr_(self, "truck_ids", tuple(truck.truck_id for truck in trucks))
+        setattr_(self, "truck_miles", tuple(truck.miles for truck in trucks))
+        setattr_(self, "truck_trips", tuple(truck.trips for truck in trucks))
+        setattr_(self, "truck_end_minutes", tuple(to_minutes(truck.end_time) if truck.end_time else None
+                                                  for truck in trucks))
+        setattr_(self, "total_miles", sum(self.truck_miles))
+        setattr_(self, "timeline", timeline)
+        setattr_(self, "late_packages", tuple(late_packages))
+        setattr_(self, "unassigned_packages", tuple(unassigned_packages))
+        setattr_(self, "_routes", tuple(array('i', route).tobytes() for route in routes))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"SimulationResult is read-only (cannot set '{name}')")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"SimulationResult is read-only (cannot delete '{name}')")
+
+    def __setstate__(self, state):
+        # Unpickling restores the slots directly, past the read-only __setattr__
+        for name, value in state[1].items():
+            object.__setattr__(self, name, value)
+
+    def route(self, position):
+        """ Returns a read-only int view of the addresses truck `position` (1-based) drove through. """
+        return memoryview(self._routes[position - 1]).cast('i')
+
+    @property
+    def routes(self):
+        return tuple(self.route(position) for position in range(1, len(self._routes) + 1))
+
+    @property
+    def completion_minutes(self):
+        """ When the last truck got back to the hub (minutes after midnight), or None. """
+        ends = [end for end in self.truck_end_minutes if end is not None]
+        return max(ends) if ends else None
+
+    @property
+    def delivered_count(self):
+        return self.timeline.snapshot(math.inf).counts[DELIVERED]
+
+    def delivery_time(self, package_id):
+        """ Returns the package's delivery time as a datetime.time, or None if it was not delivered. """
+        minutes = self.timeline.delivery_minutes(package_id)
+        if minutes is None:
+            return None
+        seconds = round(minutes * 60)
+        return time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+    def status_at(self, package_id, at_time):
+        return self.timeline.status_at(package_id, at_time)
+
+    def summary(self):
+        """ Totals as a plain dict (for tables, JSON or logging). """
+        completion = self.completion_minutes
+        return {
+            "total_miles": round(self.total_miles, 2),
+            "completion": f"{int(completion) // 60:02d}:{int(completion) % 60:02d}" if completion else None,
+            "delivered": self.delivered_count,
+            "undelivered": len(self.timeline) + len(self.unassigned_packages) - self.delivered_count,
+            "deadline_misses": len(self.late_packages),
+            "late_packages": list(self.late_packages),
+            "trips": sum(self.truck_trips),
+        }
+
+
+def _driven_routes(trucks, event_log, hub=0):
+    routes = {truck.truck_id: [hub] for truck in trucks}
+    for event in event_log:
+        if event.kind == ARRIVE:
+            routes[event.truck_id].append(event.location)
+        elif event.kind == RETURN:
+            routes[event.truck_id].append(hub)
+    return [routes[truck.truck_id] for truck in trucks]
+
+
+# ----------------------------
+# Pure Entry Point
+# ----------------------------
+
+def simulate(distance_matrix, packages, config=SimulationConfig(), address_list=None, route_cache=None):
+    """
+    Assigns, routes and simulates a day without touching any of its inputs.
+
+    The packages are copied (a shallow copy is enough: every field the
+    pipeline changes is replaced, not mutated) and trucks are built from the
+    config, so concurrent calls on the same data never share mutable state.
+
+    Parameters:
+        distance_matrix (DistanceMatrix): read-only network
+        packages (Iterable[Package]): the manifest; address_index must already be set
+            unless address_list is given
+        config (SimulationConfig): fleet and routing settings
+        address_list (List[str]): resolve addresses on the copies first (optional)
+        route_cache (RouteCache): reuse routes solved by earlier runs (optional)
+
+    Returns:
+        SimulationResult
+    """
+    packages = sorted((copy.copy(pkg) for pkg in packages), key=lambda pkg: pkg.package_id)
+    if address_list is not None:
+        resolve_addresses(address_list, packages)
+
+    trucks = config.make_trucks()
+    by_id = {pkg.package_id: pkg for pkg in packages}
+    for position, package_ids in config.preload:
+        trucks[position - 1].load_packages([by_id[pid] for pid in package_ids if pid in by_id])
+
+    assigned, trips = assign_packages(packages, trucks, distance_matrix, config.speed, route_cache)
+    route_trucks(trucks, distance_matrix, config.route_improvers, config.route_time_budget, speed=config.speed,
+                 route_cache=route_cache, drivers=config.drivers)
+    if config.search_budget > 0:
+        optimize_fleet(trucks, distance_matrix, config.speed, config.search_budget, config.search_restarts,
+                       config.search_workers, fixed_ids=[pid for _, ids in config.preload for pid in ids],
+                       drivers=config.drivers)
+    simulator = simulate_deliveries(trucks, distance_matrix, config.drivers, config.speed, trips)
+
+    timeline = simulator.timeline()
+    late = [pkg.package_id for pkg in packages
+            if pkg.deadline and pkg.delivery_time and pkg.delivery_time.time() > pkg.deadline]
+    unassigned = [pkg.package_id for pkg in packages if pkg.package_id not in assigned]
+    return SimulationResult(config, trucks, _driven_routes(trucks, simulator.log), timeline, late, unassigned)
+
+
+# ----------------------------
+# Result Cache
+# ----------------------------
+
+def manifest_fingerprint(packages):
+    """ Digest of every package field the simulation reads. """
+    digest = hashlib.blake2b(digest_size=16)
+    for pkg in sorted(packages, key=lambda pkg: pkg.package_id):
+        digest.update(repr((pkg.package_id, pkg.address, pkg.deadline, pkg.address_index, pkg.truck_restriction,
+                            pkg.must_be_delivered_with, pkg.delayed_until)).encode())
+    return digest.hexdigest()
+
+
+class SimulationCache:
+    """
+    Bounded LRU cache of SimulationResults keyed by a hash of all inputs.
+
+    Results are immutable, so a hit returns the cached object itself. Safe to
+    share between threads; two threads missing on the same key at once both
+    simulate and the later result is kept. Routing improvement is time
+    budgeted, so a cached result is one valid outcome of its inputs rather
+    than the bit-identical result a fresh run would produce on a slower machine.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(distance_matrix, packages, config, address_list=None):
+        parts = (distance_matrix.fingerprint(), manifest_fingerprint(packages), repr(config),
+                 repr(address_list))
+        return hashlib.blake2b("|".join(parts).encode(), digest_size=16).hexdigest()
+
+    def simulate(self, distance_matrix, packages, config=SimulationConfig(), address_list=None, route_cache=None):
+        """ simulate(), answered from the cache when the same inputs were seen before. """
+        packages = list(packages)
+        key = self.key(distance_matrix, packages, config, address_list)
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                METRICS.increment("simulation_cache_hits")
+                return result
+
+        METRICS.increment("simulation_cache_misses")
+        result = simulate(distance_matrix, packages, config, address_list, route_cache)
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        return result
+
+    def __len__(self):
+        return len(self._results)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
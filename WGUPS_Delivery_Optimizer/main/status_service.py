@@ -0,0 +1,249 @@
+import asyncio
+import json
+from urllib.parse import urlsplit, parse_qs
+from delivery_timeline import parse_time_of_day, format_minutes
+from instrumentation import log, METRICS
+
+
+# ----------------------------
+# Delivery Status Service
+# ----------------------------
+#
+# A small HTTP/JSON server on asyncio streams (stdlib only) that keeps the
+# package table and the simulated timeline in memory:
+#
+#   GET  /health                          {"status": "ok", "packages": n}
+#   GET  /summary                         totals of the simulated day
+#   GET  /packages/<id>[?at=HH:MM]        one package (plus its status at that time)
+#   GET  /status?at=HH:MM                 number of packages per status at that time
+#   POST /packages/lookup                 {"ids": [...], "at": "HH:MM"} -> many packages at once
+#
+# Every lookup is an O(1) HashMap.search plus O(log n) timeline searches, so
+# requests are answered directly on the event loop. Bulk lookups are worked
+# off in batches of BULK_BATCH_SIZE with a yield to the loop in between, so a
+# large request never holds up the small ones queued behind it.
+
+BULK_BATCH_SIZE = 256
+MAX_BULK_IDS = 10_000
+MAX_BODY_BYTES = 1 << 20
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+    """ A client error that becomes an HTTP error response. """
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+def _time_param(value):
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise RequestError(400, f"time of day must be a string like \"10:25\", not {json.dumps(value)}")
+    try:
+        return parse_time_of_day(value)
+    except ValueError:
+        raise RequestError(400, f"invalid time of day '{value}'") from None
+
+
+def _encode_response(code, payload, keep_alive):
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    head = (f"HTTP/1.1 {code} {REASONS.get(code, 'Error')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+# ----------------------------
+# StatusService Class
+# ----------------------------
+
+class StatusService:
+    """
+    Answers package and status-at-time lookups for one simulated day.
+
+    Rubric G – Serves "what was package X doing at time t" to other systems.
+    """
+
+    def __init__(self, package_hash, timeline, summary=None):
+        """
+        Parameters:
+            package_hash (HashMap): package ID -> Package
+            timeline (DeliveryTimeline): departure / delivery times from a simulation
+            summary (dict): totals of that simulation (optional)
+        """
+        self.package_hash = package_hash
+        self.timeline = timeline
+        self.summary = summary or {}
+        self.requests = 0
+
+    @classmethod
+    def from_bundle(cls, bundle_path):
+        """
+        Loads the packages from a dataset bundle and the timeline saved by the last
+        "simulate" for it (see cli.py).
+        """
+        from dataset_bundle import open_bundle, load_result, default_result_path
+        from hashmap import HashMap
+
+        saved = load_result(default_result_path(bundle_path), bundle_path)
+        if saved is None:
+            raise ValueError(f"No current simulation result for {bundle_path} (run the 'simulate' command first)")
+        _, _, packages = open_bundle(bundle_path)
+        package_hash = HashMap()
+        package_hash.insert_many([(pkg.package_id, pkg) for pkg in packages])
+        timeline, summary = saved
+        return cls(package_hash, timeline, summary)
+
+    # ----------------------------
+    # Lookups
+    # ----------------------------
+
+    def package_record(self, package_id, at=None):
+        """ Returns the package as a JSON-ready dict (with its status at `at` minutes), or None. """
+        pkg = self.package_hash.search(package_id)
+        if pkg is None:
+            return None
+        departed = self.timeline.departure_minutes(package_id)
+        delivered = self.timeline.delivery_minutes(package_id)
+        record = {
+            "package_id": pkg.package_id,
+            "address": pkg.address,
+            "city": pkg.city,
+            "state": pkg.state,
+            "zip": pkg.zip_code,
+            "deadline": pkg.deadline.strftime("%I:%M %p") if pkg.deadline else None,
+            "weight": pkg.weight,
+            "notes": pkg.notes,
+            "departed": format_minutes(departed) if departed is not None else None,
+            "delivered": format_minutes(delivered) if delivered is not None else None,
+        }
+        if at is not None:
+            record["status"] = self.timeline.status_at(package_id, at) or "Not Scheduled"
+        return record
+
+    async def bulk_lookup(self, package_ids, at=None):
+        """ Looks up many packages, yielding to the event loop between batches. """
+        found, missing = [], []
+        for start in range(0, len(package_ids), BULK_BATCH_SIZE):
+            for package_id in package_ids[start:start + BULK_BATCH_SIZE]:
+                record = self.package_record(package_id, at)
+                if record is None:
+                    missing.append(package_id)
+                else:
+                    found.append(record)
+            await asyncio.sleep(0)
+        return {"packages": found, "missing": missing}
+
+    async def handle(self, method, target, body=b""):
+        """
+        Routes one request.
+
+        Returns:
+            (int, dict): HTTP status code and JSON payload
+        """
+        self.requests += 1
+        parts = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        path = parts.path.rstrip("/") or "/"
+        try:
+            if path == "/packages/lookup":
+                if method != "POST":
+                    raise RequestError(405, "use POST")
+                try:
+                    request = json.loads(body or b"{}")
+                    if not isinstance(request, dict) or not isinstance(request.get("ids", []), list):
+                        raise TypeError
+                    ids = [int(pid) for pid in request.get("ids", [])]
+                except (ValueError, TypeError):
+                    raise RequestError(400, 'expected JSON {"ids": [...], "at": "HH:MM"}') from None
+                if len(ids) > MAX_BULK_IDS:
+                    raise RequestError(413, f"at most {MAX_BULK_IDS} IDs per request")
+                METRICS.increment("status_bulk_ids", len(ids))
+                return 200, await self.bulk_lookup(ids, _time_param(request.get("at")))
+
+            if method != "GET":
+                raise RequestError(405, "use GET")
+            if path == "/health":
+                return 200, {"status": "ok", "packages": len(self.package_hash)}
+            if path == "/summary":
+                return 200, self.summary
+            if path == "/status":
+                at = _time_param(query.get("at"))
+                if at is None:
+                    raise RequestError(400, "missing ?at=HH:MM")
+                return 200, {"at": format_minutes(at), "counts": self.timeline.snapshot(at).counts}
+            if path.startswith("/packages/"):
+                try:
+                    package_id = int(path[len("/packages/"):])
+                except ValueError:
+                    raise RequestError(400, "package ID must be an integer") from None
+                record = self.package_record(package_id, _time_param(query.get("at")))
+                if record is None:
+                    raise RequestError(404, f"package {package_id} not found")
+                return 200, record
+            raise RequestError(404, f"no route for {path}")
+        except RequestError as error:
+            return error.code, {"error": str(error)}
+
+    # ----------------------------
+    # HTTP Server
+    # ----------------------------
+
+    async def _serve_connection(self, reader, writer):
+        """ Reads HTTP/1.1 requests from one connection (keep-alive) until the client closes it. """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    writer.write(_encode_response(400, {"error": "malformed request line"}, False))
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY_BYTES:
+                    writer.write(_encode_response(413, {"error": "request body too large"}, False))
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    code, payload = await self.handle(method.upper(), target, body)
+                except Exception:  # keep serving other requests; the traceback goes to the log
+                    log.exception(f"⚠️ Warning: Request {method} {target} failed")
+                    code, payload = 500, {"error": "internal error"}
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                writer.write(_encode_response(code, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8080):
+        """ Starts listening and returns the asyncio Server (port 0 picks a free port). """
+        server = await asyncio.start_server(self._serve_connection, host, port)
+        address = server.sockets[0].getsockname()
+        log.info("Serving %d packages on http://%s:%s", len(self.package_hash), address[0], address[1])
+        return server
+
+    async def serve_forever(self, host="127.0.0.1", port=8080):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
@@ -0,0 +1,30 @@
+import os
+import shutil
+import compiled_network
+from compiled_network import is_stale, read_header
+from delivery_helpers import compile_network_data
+
+MAIN = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_touched_source_is_hashed_once_then_restamped(tmp_path, monkeypatch):
+    distance_path = shutil.copy(os.path.join(MAIN, "distances_backup.csv"), tmp_path)
+    address_path = shutil.copy(os.path.join(MAIN, "addresses.csv"), tmp_path)
+    compiled_path = compile_network_data(distance_path, address_path)
+    compiled_stamp = os.stat(compiled_path).st_mtime_ns
+    touched = os.stat(distance_path).st_mtime_ns + 10 ** 9
+    os.utime(distance_path, ns=(touched, touched))
+
+    hashed = []
+    fingerprint = compiled_network.source_fingerprint
+    monkeypatch.setattr(compiled_network, "source_fingerprint",
+                        lambda path, with_hash=True: hashed.append(with_hash) or fingerprint(path, with_hash))
+
+    assert not is_stale(compiled_path, distance_path, address_path)
+    assert hashed.count(True) == 1
+    assert read_header(compiled_path)["distance_source"][0] == touched
+    assert os.stat(compiled_path).st_mtime_ns == compiled_stamp
+
+    hashed.clear()
+    assert not is_stale(compiled_path, distance_path, address_path)
+    assert True not in hashed
@@ -0,0 +1,31 @@
+import os
+from datetime import datetime
+from delivery_helpers import load_network_data
+from delivery_simulation import prepare_packages, assign_packages, route_trucks, simulate_deliveries, \
+    expected_departures
+from event_simulation import DEPART
+from hashmap import HashMap
+from package_loader import load_packages
+from truck import Truck
+
+MAIN = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_routes_are_planned_from_the_departure_the_drivers_allow():
+    address_list, distance_matrix = load_network_data(os.path.join(MAIN, "distances_backup.csv"),
+                                                      os.path.join(MAIN, "addresses.csv"))
+    package_hash = HashMap()
+    load_packages(os.path.join(MAIN, "packages.csv"), package_hash)
+    packages = prepare_packages(address_list, package_hash)
+    trucks = [Truck(name=f"Truck {i}", start_time=datetime.strptime("08:00 AM", "%I:%M %p"), truck_id=i)
+              for i in (1, 2, 3)]
+    assign_packages(packages, trucks, distance_matrix)
+
+    route_trucks(trucks, distance_matrix, route_time_budget=0.05, drivers=1)
+    planned = expected_departures(trucks, distance_matrix, drivers=1)
+    simulator = simulate_deliveries(trucks, distance_matrix, drivers=1)
+
+    departed = {event.truck_id: event.time.hour * 60 + event.time.minute + event.time.second / 60
+                for event in simulator.log if event.kind == DEPART}
+    assert [round(departed[truck.truck_id], 3) for truck in trucks] == [round(minutes, 3) for minutes in planned]
+    assert len(set(planned)) == len(trucks)   # one driver: nobody leaves together
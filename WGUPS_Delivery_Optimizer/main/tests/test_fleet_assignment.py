@@ -0,0 +1,30 @@
+import os
+import pytest
+from batch_runner import scenario_grid, run_scenario
+from delivery_helpers import load_network_data
+from delivery_simulation import prepare_packages
+from hashmap import HashMap
+from package_loader import load_packages
+from route_cache import RouteCache
+
+MAIN = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SPEEDS = (15, 18, 20, 25, 30, 40)
+
+
+@pytest.fixture(scope="module")
+def sample_day():
+    address_list, distance_matrix = load_network_data(os.path.join(MAIN, "distances_backup.csv"),
+                                                      os.path.join(MAIN, "addresses.csv"))
+    package_hash = HashMap()
+    load_packages(os.path.join(MAIN, "packages.csv"), package_hash)
+    return distance_matrix, prepare_packages(address_list, package_hash)
+
+
+@pytest.mark.parametrize("drivers", [1, 2, 3])
+def test_faster_fleet_never_misses_more_deadlines(sample_day, drivers):
+    distance_matrix, packages = sample_day
+    route_cache = RouteCache()
+    misses = [run_scenario(scenario, distance_matrix, packages, route_cache=route_cache)["deadline_misses"]
+              for scenario in scenario_grid(speeds=SPEEDS, drivers=(drivers,))]
+
+    assert misses == sorted(misses, reverse=True), dict(zip(SPEEDS, misses))
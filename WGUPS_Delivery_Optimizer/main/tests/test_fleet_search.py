@@ -0,0 +1,65 @@
+import math
+import os
+import pytest
+from batch_runner import scenario_grid
+from delivery_helpers import load_network_data
+from delivery_simulation import prepare_packages, assign_packages, route_trucks, expected_departures
+from fleet_search import build_problem, FleetSearch, SearchProblem
+from hashmap import HashMap
+from network_closure import build_distance_matrix
+from package_loader import load_packages
+
+MAIN = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("speed, drivers", [(18, 1), (25, 2)])
+def test_cached_schedules_track_every_applied_move(speed, drivers):
+    address_list, distance_matrix = load_network_data(os.path.join(MAIN, "distances_backup.csv"),
+                                                      os.path.join(MAIN, "addresses.csv"))
+    package_hash = HashMap()
+    load_packages(os.path.join(MAIN, "packages.csv"), package_hash)
+    packages = prepare_packages(address_list, package_hash)
+    trucks = scenario_grid(speeds=(speed,), drivers=(drivers,))[0].config().make_trucks()
+    assign_packages(packages, trucks, distance_matrix, speed)
+    route_trucks(trucks, distance_matrix, route_time_budget=0.05, speed=speed, drivers=drivers)
+    problem, _ = build_problem(trucks, speed, departures=expected_departures(trucks, distance_matrix, speed,
+                                                                             drivers))
+
+    search = FleetSearch(distance_matrix, problem, seed=3)
+    starting = list(search.lateness)
+    moves = (search.two_opt_move, search.relocate_move, search.ruin_move)
+    applied = 0
+    for n in range(3000):
+        applied += moves[n % 3](0.5)
+        for truck, route in enumerate(search.routes):
+            arrivals, _ = search._timing(truck, route)
+            lateness = sum(max(0.0, arrival - search._stop_deadline(truck, stop))
+                           for stop, arrival in zip(route, arrivals))
+            assert lateness == pytest.approx(search.lateness[truck], abs=1e-4)
+            assert lateness <= starting[truck] + 1e-4
+    assert applied
+
+
+# Hub, stop A five miles east, stop B a mile south, stop C next to A. Truck 1
+# (pinned to A) leaves at 8:00; truck 2 (pinned to B, carrying C) waits for
+# the only driver. Moving C onto truck 1 saves ten miles but brings truck 1
+# back, and truck 2 away, half a mile (half a minute at 60 mph) later.
+TWO_TRUCKS = [(0, 0), (5, 0), (0, -1), (5, 0.5)]
+
+
+@pytest.mark.parametrize("deadline, moved", [(8 * 60 + 11.5, False), (8 * 60 + 15, True)])
+def test_one_driver_search_moves_the_waiting_departure(deadline, moved):
+    matrix, _ = build_distance_matrix([[math.dist(TWO_TRUCKS[i], TWO_TRUCKS[j]) for j in range(i + 1)]
+                                       for i in range(len(TWO_TRUCKS))])
+    problem = SearchProblem(0, 60, departures=[480, 490], capacities=[16, 16], routes=[[1], [2, 3]],
+                            unit_stops=[(1,), (2,), (3,)], unit_sizes=[1, 1, 1], unit_deadlines=[{}, {2: deadline}, {}],
+                            unit_ready=[0, 0, 0], unit_lock=[0, 1, None], unit_truck=[0, 1, 1], starts=[480, 480],
+                            drivers=1)
+
+    search = FleetSearch(matrix, problem, seed=1)
+    miles, routes, unit_truck, _ = search.run(time_budget=0.2)
+
+    assert (unit_truck[2] == 0) == moved
+    assert search.lateness == [0.0, 0.0]
+    if moved:
+        assert search.departures[1] == pytest.approx(480 + miles - 2)   # truck 1's round trip, at a mile a minute
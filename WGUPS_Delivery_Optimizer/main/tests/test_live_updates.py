@@ -0,0 +1,119 @@
+import copy
+import os
+from datetime import datetime
+import pytest
+from delivery_helpers import load_network_data
+from delivery_simulation import prepare_packages, assign_packages, route_trucks
+from delivery_timeline import AT_HUB, EN_ROUTE, DELIVERED, CANCELLED
+from event_simulation import DeliverySimulator
+from hashmap import HashMap
+from live_updates import LiveDispatcher
+from package_loader import load_packages
+from truck import Truck
+
+MAIN = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHECK_TIMES = ("08:00 AM", "08:45 AM", "09:30 AM", "10:30 AM", "12:00 PM", "11:00 PM")
+
+
+def _at(clock):
+    return datetime.strptime(clock, "%I:%M %p")
+
+
+@pytest.fixture
+def day():
+    """ The sample day (main.py's fleet) loaded and routed, not yet run. """
+    address_list, distance_matrix = load_network_data(os.path.join(MAIN, "distances_backup.csv"),
+                                                      os.path.join(MAIN, "addresses.csv"))
+    package_hash = HashMap()
+    load_packages(os.path.join(MAIN, "packages.csv"), package_hash)
+    packages = prepare_packages(address_list, package_hash)
+    trucks = [Truck(name=f"Truck {i}", start_time=_at(start), truck_id=i)
+              for i, start in enumerate(("08:00 AM", "09:05 AM", "10:20 AM"), 1)]
+    trucks[1].load_packages([package_hash.search(pid) for pid in (1, 2, 3, 4)])
+    _, trips = assign_packages(packages, trucks, distance_matrix)
+    route_trucks(trucks, distance_matrix, route_time_budget=0.05, drivers=2)
+    simulator = DeliverySimulator(distance_matrix, trucks, 18, drivers=2, trips=trips)
+    return LiveDispatcher(simulator, address_list, package_hash), trucks
+
+
+def _assert_views_agree(simulator):
+    """ The simulator's own status_at and the DeliveryTimeline index tell the same story. """
+    timeline = simulator.timeline()
+    ids = [pid for pid, _, _ in simulator.package_timelines()]
+    for clock in CHECK_TIMES:
+        snapshot = timeline.snapshot(_at(clock))
+        statuses = {pid: simulator.status_at(pid, _at(clock)) for pid in ids}
+        assert snapshot.as_dict() == statuses
+        assert all(timeline.status_at(pid, _at(clock)) == status for pid, status in statuses.items())
+        assert snapshot.counts == {status: list(statuses.values()).count(status)
+                                   for status in (AT_HUB, EN_ROUTE, DELIVERED, CANCELLED)}
+
+
+def test_cancel_on_a_driving_truck_and_at_the_hub(day):
+    dispatcher, trucks = day
+    driving, waiting = trucks[0].packages[-1].package_id, trucks[2].packages[0].package_id
+    dispatcher.advance(_at("08:30 AM"))
+
+    assert dispatcher.cancel_package(driving).applied
+    assert dispatcher.cancel_package(waiting).applied
+    dispatcher.advance()
+
+    timeline = dispatcher.simulator.timeline()
+    assert timeline.snapshot(_at("11:00 PM")).counts == {AT_HUB: 0, EN_ROUTE: 0, DELIVERED: 38, CANCELLED: 2}
+    assert timeline.status_at(driving, _at("08:15 AM")) == EN_ROUTE
+    assert timeline.status_at(waiting, _at("08:15 AM")) == AT_HUB
+    assert timeline.status_at(driving, _at("08:30 AM")) == CANCELLED
+    _assert_views_agree(dispatcher.simulator)
+
+
+def test_address_change_before_departure(day):
+    dispatcher, trucks = day
+    dispatcher.advance(_at("09:00 AM"))
+
+    result = dispatcher.change_address(9, "410 S State St", "Salt Lake City", "UT", "84111")
+    assert result.applied and result.trucks == [2]
+    dispatcher.advance()
+
+    package = dispatcher.package_hash.search(9)
+    assert package.address == "410 S State St" and package.status == DELIVERED
+    _assert_views_agree(dispatcher.simulator)
+
+
+def test_delay_release_lets_the_load_leave(day):
+    dispatcher, trucks = day
+    delayed = next(pkg for pkg in trucks[1].packages if pkg.delayed_until)
+    dispatcher.advance(_at("08:30 AM"))
+
+    assert dispatcher.release_delay(delayed.package_id).applied
+    assert delayed.delayed_until == _at("08:30 AM").time()
+    dispatcher.advance()
+
+    assert dispatcher.simulator.timeline().departure_minutes(delayed.package_id) == 9 * 60 + 5
+    _assert_views_agree(dispatcher.simulator)
+
+
+def test_added_package_is_delivered_and_counted(day):
+    dispatcher, trucks = day
+    dispatcher.advance(_at("08:30 AM"))
+    package = copy.copy(dispatcher.package_hash.search(trucks[2].packages[0].package_id))
+    package.package_id, package.must_be_delivered_with, package.truck_restriction = 41, (), None
+    package.delayed_until = package.deadline = None
+
+    result = dispatcher.add_package(package)
+    assert result.applied
+    dispatcher.advance()
+
+    assert dispatcher.simulator.timeline().snapshot(_at("11:00 PM")).counts[DELIVERED] == 41
+    _assert_views_agree(dispatcher.simulator)
+
+
+def test_added_package_cannot_join_partners_that_left(day):
+    dispatcher, trucks = day
+    dispatcher.advance(_at("08:30 AM"))
+    package = copy.copy(dispatcher.package_hash.search(trucks[2].packages[0].package_id))
+    package.package_id, package.truck_restriction = 42, None
+    package.must_be_delivered_with = (trucks[0].packages[0].package_id,)
+
+    result = dispatcher.add_package(package)
+    assert not result.applied and "already left the hub" in result.message
+    assert 42 not in dispatcher.simulator.timeline()
@@ -0,0 +1,44 @@
+import math
+import random
+import pytest
+from network_closure import build_distance_matrix, close_distance_matrix, find_violations, FLOYD_WARSHALL_MAX
+
+
+def _euclidean_rows(size, seed=3):
+    rng = random.Random(seed)
+    points = [(rng.uniform(0, 10), rng.uniform(0, 10)) for _ in range(size)]
+    return [[math.dist(points[i], points[j]) for j in range(i + 1)] for i in range(size)], points
+
+
+def test_dense_table_above_floyd_warshall_limit_repairs_triangle_violation():
+    size = 210
+    assert size > FLOYD_WARSHALL_MAX
+    rows, points = _euclidean_rows(size)
+    rows[5][3] = 500.0
+    matrix, report = build_distance_matrix(rows)
+
+    closed, report = close_distance_matrix(matrix, report)
+
+    assert report.method == "dijkstra"
+    assert closed.distance(5, 3) == closed.distance(3, 5)
+    assert closed.distance(5, 3) == pytest.approx(math.dist(points[5], points[3]), rel=0.05)
+    assert report.shortened == 1
+    assert not report.clean
+
+
+def test_dense_metric_table_is_left_alone():
+    rows, _ = _euclidean_rows(FLOYD_WARSHALL_MAX + 10)
+    matrix, report = build_distance_matrix(rows)
+
+    closed, report = close_distance_matrix(matrix, report)
+
+    assert report.clean
+    assert closed.row_major().tolist() == matrix.row_major().tolist()
+
+
+def test_find_violations_flags_both_ends_of_a_bad_entry():
+    rows, _ = _euclidean_rows(FLOYD_WARSHALL_MAX + 10)
+    rows[5][3] = 500.0
+    matrix, _ = build_distance_matrix(rows)
+
+    assert find_violations(matrix) == {3, 5}
@@ -0,0 +1,33 @@
+from route_cache import RouteCache
+from routing import SOLVER_VERSION
+
+KEY = b"k" * 16
+
+
+def test_lookup_hits_only_routes_solved_with_enough_budget():
+    cache = RouteCache()
+    cache.put(KEY, [3, 1, 2], 12.5, time_budget=0.2)
+
+    assert cache.get(KEY, 0.1) == ([3, 1, 2], 12.5)
+    assert cache.get(KEY, 0.2) == ([3, 1, 2], 12.5)
+    assert cache.get(KEY, 1.0) is None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_lookup_misses_routes_from_another_solver_version():
+    cache = RouteCache()
+    cache.put(KEY, [3, 1, 2], 12.5, time_budget=5.0, solver_version=SOLVER_VERSION - 1)
+
+    assert cache.get(KEY, 0.1) is None
+
+
+def test_budget_and_version_survive_save_and_load(tmp_path):
+    path = str(tmp_path / "routes.wgrc")
+    cache = RouteCache()
+    cache.put(KEY, [3, 1, 2], 12.5, time_budget=0.5)
+    cache.save(path)
+
+    loaded = RouteCache(path=path)
+    assert loaded.entries() == cache.entries()
+    assert loaded.get(KEY, 0.5) == ([3, 1, 2], 12.5)
+    assert loaded.get(KEY, 0.6) is None
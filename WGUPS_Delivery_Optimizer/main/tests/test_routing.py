@@ -0,0 +1,30 @@
+import math
+import random
+from network_closure import build_distance_matrix
+from route_cache import route_key
+from routing import build_route, nearest_neighbor_route, route_length
+
+
+def _matrix(size=10, seed=5):
+    rng = random.Random(seed)
+    points = [(rng.uniform(0, 10), rng.uniform(0, 10)) for _ in range(size)]
+    matrix, _ = build_distance_matrix([[math.dist(points[i], points[j]) for j in range(i + 1)]
+                                       for i in range(size)])
+    return matrix
+
+
+def test_empty_improvers_return_the_constructed_tour():
+    matrix = _matrix()
+    stops = list(range(1, 10))
+
+    assert build_route(matrix, stops, improvers=()) == nearest_neighbor_route(matrix, stops)
+    assert route_length(matrix, build_route(matrix, stops)) <= route_length(matrix, build_route(matrix, stops,
+                                                                                                improvers=()))
+
+
+def test_route_key_depends_on_exact_cutoff():
+    matrix = _matrix()
+    stops = list(range(1, 10))
+
+    assert route_key(matrix, stops) == route_key(matrix, list(reversed(stops)))
+    assert route_key(matrix, stops, exact_max_stops=0) != route_key(matrix, stops)
@@ -0,0 +1,16 @@
+import asyncio
+import json
+import pytest
+from hashmap import HashMap
+from status_service import StatusService
+
+
+@pytest.mark.parametrize("body", [{"ids": "12", "at": "10:00"}, {"ids": [1, 2], "at": 930}, [1, 2],
+                                  {"ids": [None]}])
+def test_malformed_bulk_lookup_is_a_client_error(body):
+    service = StatusService(HashMap(), timeline=None)
+
+    code, payload = asyncio.run(service.handle("POST", "/packages/lookup", json.dumps(body).encode()))
+
+    assert code == 400
+    assert "error" in payload
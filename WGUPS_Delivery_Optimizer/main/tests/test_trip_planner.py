@@ -0,0 +1,43 @@
+import math
+from hashmap import Package
+from network_closure import build_distance_matrix
+from route_cache import RouteCache
+from time_windows import deadline_violations
+from trip_planner import plan_trips
+
+# The hub and seven stops around a circle three miles across. The shortest
+# tour follows the circle and reaches the far side (stop 4) 9.4 miles out,
+# 31 minutes at 18 mph; only driving straight there makes its 8:25 deadline.
+POINTS = [(3 - 3 * math.cos(k * math.pi / 4), 3 * math.sin(k * math.pi / 4)) for k in range(8)]
+FAR_SIDE = 4
+
+
+def _overflow():
+    matrix, _ = build_distance_matrix([[math.dist(POINTS[i], POINTS[j]) for j in range(i + 1)]
+                                       for i in range(len(POINTS))])
+    packages = []
+    for stop in range(1, len(POINTS)):
+        deadline = "8:25 AM" if stop == FAR_SIDE else "EOD"
+        pkg = Package(stop, f"Stop {stop}", deadline=deadline, constraints=(None, (), None))
+        pkg.address_index = stop
+        packages.append(pkg)
+    return matrix, packages
+
+
+def test_reload_trip_is_routed_against_its_deadlines():
+    matrix, packages = _overflow()
+    cache = RouteCache()
+
+    (trip,), _ = plan_trips(matrix, packages, capacity=16, route_cache=cache, speed=18, earliest_start=8 * 60)
+
+    route = [pkg.address_index for pkg in trip.packages]
+    assert route[0] == FAR_SIDE
+    assert trip.timing.start_minutes == 8 * 60 and trip.timing.deadline(FAR_SIDE) == 8 * 60 + 25
+    assert deadline_violations(matrix, route, trip.timing) == []
+
+    (untimed,), _ = plan_trips(matrix, packages, capacity=16)
+    assert deadline_violations(matrix, [pkg.address_index for pkg in untimed.packages], trip.timing)
+
+    # The timing is part of the cache key: a later departure is a different problem
+    plan_trips(matrix, packages, capacity=16, route_cache=cache, speed=18, earliest_start=9 * 60)
+    assert len(cache) == 2
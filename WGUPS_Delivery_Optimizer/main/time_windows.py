@@ -0,0 +1,219 @@
+import math
+from instrumentation import METRICS
+
+
+# ----------------------------
+# Route Timing
+# ----------------------------
+#
+# Times are minutes after midnight. A stop's deadline is the earliest
+# deadline of the packages addressed there (math.inf when it has none).
+
+class RouteTiming:
+    """ Departure time, speed and per-stop deadlines needed to schedule one truck's route. """
+
+    def __init__(self, start_minutes, speed, deadlines):
+        """
+        Parameters:
+            start_minutes (float): departure time from the hub
+            speed (float): miles per hour
+            deadlines (dict[int, float]): {address index: deadline minutes}
+        """
+        self.start_minutes = start_minutes
+        self.speed = speed
+        self.deadlines = deadlines
+
+    def deadline(self, stop):
+        return self.deadlines.get(stop, math.inf)
+
+    def minutes(self, miles):
+        return miles * 60.0 / self.speed
+
+
+def stop_deadlines(packages):
+    """ Returns {address index: earliest deadline in minutes} for the stops of packages that have a deadline. """
+    deadlines = {}
+    for pkg in packages:
+        if pkg.deadline:
+            minutes = pkg.deadline.hour * 60 + pkg.deadline.minute
+            deadlines[pkg.address_index] = min(minutes, deadlines.get(pkg.address_index, minutes))
+    return deadlines
+
+
+def schedule_route(distance_matrix, route, timing, start=0):
+    """ Returns the arrival time (minutes) at each stop of the route. """
+    arrivals = []
+    now = timing.start_minutes
+    current = start
+    for stop in route:
+        now += timing.minutes(distance_matrix.distance(current, stop))
+        arrivals.append(now)
+        current = stop
+    return arrivals
+
+
+def deadline_violations(distance_matrix, route, timing, start=0):
+    """
+    Lists the stops the route reaches after their deadline.
+
+    Returns:
+        List[(int, float, float)]: (stop, arrival minutes, deadline minutes)
+    """
+    arrivals = schedule_route(distance_matrix, route, timing, start)
+    return [(stop, arrival, timing.deadline(stop))
+            for stop, arrival in zip(route, arrivals) if arrival > timing.deadline(stop) + 1e-9]
+
+
+def total_lateness(distance_matrix, route, timing, start=0):
+    """ Sum of minutes by which stops miss their deadlines (0 for a feasible route). """
+    return sum(arrival - deadline for _, arrival, deadline in deadline_violations(distance_matrix, route, timing, start))
+
+
+# ----------------------------
+# Deadline-Aware Insertion
+# ----------------------------
+
+class DeadlineSchedule:
+    """
+    A growing route over deadline stops only, with each stop's arrival time
+    and forward slack, for asking whether one more stop still fits.
+
+    FleetAssigner keeps one per truck while placing packages, so a truck that
+    can reach each 10:30 stop on its own is not handed more of them than it
+    can reach in one run.
+    """
+
+    def __init__(self, distance_matrix, timing, start=0):
+        """
+        Parameters:
+            distance_matrix (DistanceMatrix): symmetric distance table
+            timing (RouteTiming): departure and speed (its deadlines grow as stops are inserted)
+            start (int): hub index
+        """
+        self.distance_matrix = distance_matrix
+        self.timing = timing
+        self.start = start
+        self.route = []
+        self.arrivals = []
+        self.slack = [math.inf]
+
+    def __len__(self):
+        return len(self.route)
+
+    def best_insertion(self, stop, deadline):
+        """
+        Returns:
+            (float, int): added miles and position of the cheapest insertion that keeps
+            every deadline (the stop's own included), or None if there is none
+        """
+        dist = self.distance_matrix.distance
+        route, arrivals, timing = self.route, self.arrivals, self.timing
+        if stop in timing.deadlines:
+            position = route.index(stop)
+            return (0.0, position) if arrivals[position] <= deadline + 1e-9 else None
+
+        best = None
+        for k in range(len(route) + 1):
+            prev_stop = route[k - 1] if k else self.start
+            prev_time = arrivals[k - 1] if k else timing.start_minutes
+            next_stop = route[k] if k < len(route) else self.start
+            added_miles = dist(prev_stop, stop) + dist(stop, next_stop) - dist(prev_stop, next_stop)
+            if best is not None and added_miles >= best[0]:
+                continue
+            arrival = prev_time + timing.minutes(dist(prev_stop, stop))
+            if arrival <= deadline + 1e-9 and timing.minutes(added_miles) <= self.slack[k] + 1e-9:
+                best = (added_miles, k)
+        return best
+
+    def insert(self, stop, deadline, position=None):
+        """
+        Adds a stop at `position` (from best_insertion), or at the end when the
+        position is None, i.e. when it cannot be reached in time anyway.
+        """
+        deadlines = self.timing.deadlines
+        if stop in deadlines:
+            deadlines[stop] = min(deadlines[stop], deadline)
+        else:
+            deadlines[stop] = deadline
+            k = len(self.route) if position is None else position
+            self.route.insert(k, stop)
+            self.arrivals = _arrivals_from(self.distance_matrix, self.route, self.arrivals, k, self.timing,
+                                           self.start)
+        self.slack = _forward_slack(self.route, self.arrivals, self.timing)
+
+
+def deadline_insertion_route(distance_matrix, stops, timing, start=0):
+    """
+    Builds a route by cheapest feasible insertion, tightest deadlines first.
+
+    The route keeps each stop's arrival time and its forward time slack
+    (how long arrival there could be pushed back before some later stop
+    misses its deadline). Inserting a stop before position k delays every
+    later stop by the same detour, so the insertion is deadline-feasible
+    exactly when its own arrival meets its deadline and the detour fits in
+    slack[k], which makes each candidate position an O(1) check.
+
+    A stop with no feasible position is inserted where it adds the least
+    lateness; deadline_violations() reports it afterwards.
+
+    Returns:
+        List[int]: stops in visiting order
+    """
+    dist = distance_matrix.distance
+    pending = [stop for stop in dict.fromkeys(stops) if stop != start]
+    pending.sort(key=lambda stop: (timing.deadline(stop), -dist(start, stop)))
+
+    route = []
+    arrivals = []
+    slack = [math.inf]  # slack[k] for k = 0..len(route); slack[len(route)] is the return leg
+    evaluated = 0
+
+    for stop in pending:
+        deadline = timing.deadline(stop)
+        best = None        # (added miles, position) among feasible insertions
+        fallback = None    # (added lateness, added miles, position) if none is feasible
+
+        for k in range(len(route) + 1):
+            prev_stop = route[k - 1] if k else start
+            prev_time = arrivals[k - 1] if k else timing.start_minutes
+            next_stop = route[k] if k < len(route) else start
+            added_miles = dist(prev_stop, stop) + dist(stop, next_stop) - dist(prev_stop, next_stop)
+            arrival = prev_time + timing.minutes(dist(prev_stop, stop))
+            detour = timing.minutes(added_miles)
+
+            if arrival <= deadline and detour <= slack[k] + 1e-9:
+                if best is None or added_miles < best[0]:
+                    best = (added_miles, k)
+            elif best is None:
+                lateness = max(0.0, arrival - deadline) + max(0.0, detour - slack[k])
+                if fallback is None or (lateness, added_miles) < fallback[:2]:
+                    fallback = (lateness, added_miles, k)
+
+        evaluated += len(route) + 1
+        k = best[1] if best is not None else fallback[2]
+        route.insert(k, stop)
+        arrivals = _arrivals_from(distance_matrix, route, arrivals, k, timing, start)
+        slack = _forward_slack(route, arrivals, timing)
+
+    METRICS.increment("insertion_candidates", evaluated)
+    return route
+
+
+def _arrivals_from(distance_matrix, route, arrivals, k, timing, start):
+    """ Recomputes arrival times from position k onward after an insertion at k. """
+    arrivals = arrivals[:k]
+    now = arrivals[-1] if arrivals else timing.start_minutes
+    current = route[k - 1] if k else start
+    for stop in route[k:]:
+        now += timing.minutes(distance_matrix.distance(current, stop))
+        arrivals.append(now)
+        current = stop
+    return arrivals
+
+
+def _forward_slack(route, arrivals, timing):
+    """ slack[k] = min over p >= k of deadline(route[p]) - arrival[p]; slack[len(route)] = inf. """
+    slack = [math.inf] * (len(route) + 1)
+    for k in range(len(route) - 1, -1, -1):
+        slack[k] = min(slack[k + 1], timing.deadline(route[k]) - arrivals[k])
+    return slack
@@ -0,0 +1,150 @@
+import math
+from fleet_assignment import build_units
+from routing import build_route, improve_route, nearest_neighbor_route, order_packages_by_route, DEFAULT_TIME_BUDGET
+from time_windows import RouteTiming, stop_deadlines
+
+
+# ----------------------------
+# Trip Class
+# ----------------------------
+
+class Trip:
+    """
+    One extra truckload, dispatched from the hub when a truck comes back.
+
+    The simulator hands pending trips out in list order, so plan_trips()
+    returns them sorted by priority (earliest deadline, then earliest ready time).
+    """
+    __slots__ = ("packages", "restriction", "ready", "deadline", "timing", "truck")
+
+    def __init__(self, packages, restriction=None):
+        self.packages = packages
+        self.restriction = restriction  # fleet position (1..N) the trip must use, or None
+        delays = [pkg.delayed_until for pkg in packages if pkg.delayed_until]
+        self.ready = max(delays) if delays else None
+        deadlines = [pkg.deadline.hour * 60 + pkg.deadline.minute for pkg in packages if pkg.deadline]
+        self.deadline = min(deadlines) if deadlines else math.inf
+        self.timing = None  # RouteTiming the trip was routed against (see plan_trips)
+        self.truck = None  # set by the simulator when the trip is dispatched
+
+    def priority(self):
+        ready = self.ready.hour * 60 + self.ready.minute if self.ready else 0
+        return self.deadline, ready
+
+    def __len__(self):
+        return len(self.packages)
+
+
+# ----------------------------
+# Route-First, Cluster-Second Split
+# ----------------------------
+
+def split_route(distance_matrix, units, capacity, hub=0):
+    """
+    Cuts a sequence of units into consecutive truckloads with the least total driving.
+
+    Dynamic program over the sequence: best[j] is the cheapest way to serve
+    the first j units, and each candidate trip units[i:j] costs
+    hub -> units[i] -> ... -> units[j-1] -> hub. A trip holds at most
+    `capacity` packages, so each unit is extended at most `capacity` times
+    and the split runs in O(units x capacity).
+
+    Parameters:
+        units (List[AssignmentUnit]): units in visiting order, each no larger than capacity
+
+    Returns:
+        List[List[AssignmentUnit]]: the trips, in sequence order
+    """
+    dist = distance_matrix.distance
+    n = len(units)
+    best = [0.0] + [math.inf] * n
+    cut = [0] * (n + 1)
+
+    for i in range(n):
+        outbound = best[i] + dist(hub, units[i].location)
+        load = 0
+        path = 0.0
+        for j in range(i, n):
+            load += units[j].size
+            if load > capacity:
+                break
+            if j > i:
+                path += dist(units[j - 1].location, units[j].location)
+            cost = outbound + path + dist(units[j].location, hub)
+            if cost < best[j + 1]:
+                best[j + 1] = cost
+                cut[j + 1] = i
+
+    trips = []
+    j = n
+    while j > 0:
+        trips.append(units[cut[j]:j])
+        j = cut[j]
+    trips.reverse()
+    return trips
+
+
+def plan_trips(distance_matrix, packages, capacity, hub=0, time_budget=DEFAULT_TIME_BUDGET, route_cache=None,
+               speed=None, earliest_start=0):
+    """
+    Batches packages that did not fit on the fleet's first departures into reload trips.
+
+    Packages are merged into units (see build_units) and grouped by truck
+    restriction and hub-arrival time, so a trip never waits on a delayed
+    package it does not carry. Each group is ordered along one giant tour
+    and split_route() picks the batch boundaries that minimize total driving
+    time; since the simulator gives each pending trip to whichever truck
+    returns first, less total driving means the fleet finishes sooner.
+
+    With a speed, each trip is then routed against its deadlines (see
+    Trip.timing). Which truck carries a trip, and so when it leaves, is only
+    known once the simulator runs; the timing assumes the earliest departure
+    possible (the fleet's earliest start, or when the trip's delayed packages
+    arrive), so a route it calls late is certainly late.
+
+    Parameters:
+        distance_matrix (DistanceMatrix): symmetric distance table
+        packages (List[Package]): packages with address_index set
+        capacity (int): packages per truckload
+        hub (int): address index of the hub
+        time_budget (float): seconds of route improvement shared by all groups and trips
+        route_cache (RouteCache): reuse previously solved trip routes (optional)
+        speed (float): truck speed in mph; None routes trips by distance alone
+        earliest_start (float): minutes after midnight the first truck can leave the hub
+
+    Returns:
+        (List[Trip], List[Package]): trips in dispatch order, and packages whose
+        "delivered with" group is larger than one truckload
+    """
+    groups = {}
+    too_large = []
+    for unit in build_units(packages):
+        if unit.size > capacity:
+            too_large.extend(unit.packages)
+        else:
+            groups.setdefault((unit.restriction, unit.ready), []).append(unit)
+
+    budget = time_budget / 2 / max(1, len(groups))
+    trips = []
+    for (restriction, _), units in groups.items():
+        tour = nearest_neighbor_route(distance_matrix, [unit.location for unit in units], hub)
+        tour = improve_route(distance_matrix, tour, hub, time_budget=budget)
+        rank = {stop: p for p, stop in enumerate(tour, 1)}
+        rank[hub] = 0
+        units.sort(key=lambda unit: rank[unit.location])
+        for segment in split_route(distance_matrix, units, capacity, hub):
+            trips.append(Trip([pkg for unit in segment for pkg in unit.packages], restriction))
+
+    # Re-route each trip on its own; the split only fixed which packages ride together
+    budget = time_budget / 2 / max(1, len(trips))
+    route_trip = route_cache.build_route if route_cache is not None else build_route
+    for trip in trips:
+        if speed is not None:
+            ready = trip.ready.hour * 60 + trip.ready.minute if trip.ready else 0
+            trip.timing = RouteTiming(max(earliest_start, ready), speed, stop_deadlines(trip.packages))
+        route = route_trip(distance_matrix, [pkg.address_index for pkg in trip.packages], hub,
+                           time_budget=budget, timing=trip.timing)
+        trip.packages = order_packages_by_route(trip.packages, route, hub)
+
+    trips.sort(key=Trip.priority)
+    return trips, too_large
@@ -7,6 +7,19 @@ class Truck:
         self.packages = []
         self.miles = 0
         self.end_time = None
+        self.trips = 0
+
+    def reload(self, pkg_list):
+        """ Replaces the delivered load with a new batch while the truck is back at the hub. """
+        if len(pkg_list) > self.max_capacity:
+            raise ValueError(f"{self.name} cannot load that many packages")
+        self.packages = list(pkg_list)
+
+    def begin_trip(self, departure_time):
+        """ Records a departure from the hub; start_time keeps the first one. """
+        if self.trips == 0:
+            self.start_time = departure_time
+        self.trips += 1
 
     def load_packages(self, pkg_list):
         if len(self.packages) + len(pkg_list) <= self.max_capacity: